@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the list buffers of `internal.buffers`.
+
+Translates a synthetic PDB writer, a loop appending one line per atom with `.=`, and runs the translated list buffer
+over as many atoms as given, against the string concatenation `.=` translated to `+=` would do instead: at the
+module level of a translated script and on an object attribute, as for `$self->{pdb} .= ...`, where the string is
+copied on every append, and on a function local, which CPython extends in place as long as it holds the only
+reference to the string. Each is timed on a tenth of the atoms as well, so the quadratic growth shows.
+
+Usage:
+    python benchmarks/bench_buffers.py [-n ATOMS] [-r REPEAT]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from pl2py import pl2py_snippet
+
+PERL = """my $out = '';
+foreach my $atom (@atoms) {
+    $out .= 'ATOM  ' . $atom . ' C';
+}
+my $pdb = $out;
+"""
+
+# the same loop with `.=` translated to `+=`
+CONCATENATION = """out = ''
+for atom in atoms:
+    out += 'ATOM  ' + atom + ' C'
+pdb = out
+"""
+
+LOCAL_CONCATENATION = """def write_pdb(atoms):
+    out = ''
+    for atom in atoms:
+        out += 'ATOM  ' + atom + ' C'
+    return out
+pdb = write_pdb(atoms)
+"""
+
+ATTRIBUTE_CONCATENATION = """class Structure: pass
+structure = Structure()
+structure.out = ''
+for atom in atoms:
+    structure.out += 'ATOM  ' + atom + ' C'
+pdb = structure.out
+"""
+
+def _run(code: str, atoms: list[str], repeat: int) -> tuple[float, str]:
+    """Run translated code over atoms, returning the fastest time in seconds and the PDB text it built."""
+    compiled = compile(code, '<translated>', 'exec')
+    best = float('inf')
+    for _ in range(repeat):
+        namespace = {'atoms': atoms}
+        start = time.perf_counter()
+        exec(compiled, namespace)
+        best = min(best, time.perf_counter() - start)
+    return best, namespace['pdb']
+
+def __main__():
+    parser = argparse.ArgumentParser(description="Benchmark string accumulation in translated loops")
+    parser.add_argument('-n', '--atoms', type=int, default=100000, help='Number of atoms of the synthetic structure')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of runs, the fastest is kept')
+    args = parser.parse_args()
+
+    translated = pl2py_snippet(PERL)
+    if '.append(' not in translated: raise SystemExit(f"the loop was not translated to a list buffer:\n{translated}")
+    print(translated)
+    variants = [('list buffer', translated), ('+= in the module', CONCATENATION), ('+= on an attribute', ATTRIBUTE_CONCATENATION),
+                ('+= on a local', LOCAL_CONCATENATION)]
+    for n_atoms in (args.atoms // 10, args.atoms):
+        atoms = [f'{i:5d}' for i in range(n_atoms)]
+        results = {name: _run(code, atoms, args.repeat) for name, code in variants}
+        assert len({pdb for _, pdb in results.values()}) == 1, "the variants built different PDB texts"
+        buffer_time = results['list buffer'][0]
+        print(f"{n_atoms} atoms:")
+        for name, (seconds, _) in results.items():
+            print(f"  {name:<20}{seconds * 1000:10.1f} ms ({seconds / buffer_time:.2f}x list buffer)")
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the declaration rewriting in `internal.remove_sigils`.
+
+Compares the single-pattern `_convert_declarations` with the implementation it replaced, which compiled three
+patterns per declared variable name. Lines are declarations in the form they reach remove_sigils, e.g.
+`our ($gfile, $pdbfile, $stepnum,$outputpdb,$setoutput)` once convert_syntax removed the semicolon,
+with as many distinct variable names as given, so the `re` module cache (512 patterns) is exceeded.
+
+Usage:
+    python benchmarks/bench_declarations.py [-n NAMES] [-r REPEAT]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from internal.remove_sigils import _convert_declarations, _append_typing
+
+def _per_variable_convert_declarations(line: str) -> str:
+    """The per-variable `re.sub` implementation of `_convert_declarations`, kept as the baseline."""
+    if line.find("my ") == -1 and line.find("our ") == -1 and line.find("sub ") == -1 : return line
+    group_global_declaration_match = re.search(r'our\s*\((.*?)\);', line)
+    if group_global_declaration_match:
+        variables = group_global_declaration_match.group(1).strip()
+        return f"global {variables}"
+    matches = re.findall(r'(\$|\@|\%|\&|\*)(\w+)', line)
+    if not matches and not "sub " in line: raise SyntaxError(line)
+    for sigil, var_name in matches:
+        type_hint = _append_typing(sigil)
+        line = re.sub(rf'my\s+{re.escape(sigil)}{var_name}', f'{var_name}: {type_hint}', line, count=1)
+        line = re.sub(rf'our\s+{re.escape(sigil)}{var_name}', f'{var_name.upper()}: {type_hint}', line, count=1)
+        line = re.sub(rf'sub\s+{re.escape(sigil)}{var_name}', f'def {var_name}(**args): Callable[..., any]', line, count=1)
+    return line
+
+def _lines(names: int) -> list[str]:
+    """Declaration lines using `names` distinct variable names."""
+    lines = ['our ($gfile, $pdbfile, $stepnum,$outputpdb,$setoutput)']
+    for i in range(0, names, 5):
+        lines.append('our (' + ', '.join(f'$var{j}' for j in range(i, i + 5)) + ')')
+        lines.append(f'my $local{i} = $var{i} + $var{i + 1}')
+        lines.append(f'our @list{i} = @var{i + 2}')
+    return lines
+
+def _lines_per_second(convert, lines: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            convert(line)
+    return repeat * len(lines) / (time.perf_counter() - start)
+
+def __main__():
+    parser = argparse.ArgumentParser(description="Benchmark declaration rewriting")
+    parser.add_argument('-n', '--names', type=int, default=2000, help='Number of distinct variable names')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of passes over the lines')
+    args = parser.parse_args()
+
+    lines = _lines(args.names)
+    changed = sum(_per_variable_convert_declarations(line) != _convert_declarations(line) for line in lines)
+    before = _lines_per_second(_per_variable_convert_declarations, lines, args.repeat)
+    after = _lines_per_second(_convert_declarations, lines, args.repeat)
+    print(f"{len(lines)} declaration lines, {args.names} distinct names, {args.repeat} passes")
+    print(f"pattern per variable: {before:12,.0f} lines/sec")
+    print(f"single pattern:       {after:12,.0f} lines/sec ({after / before:.2f}x)")
+    print(f"lines with different output: {changed}")
+
+    line = lines[0]
+    single_before = _lines_per_second(_per_variable_convert_declarations, [line], 20000)
+    single_after = _lines_per_second(_convert_declarations, [line], 20000)
+    print(f"{line!r}: {single_before:,.0f} -> {single_after:,.0f} lines/sec ({single_after / single_before:.2f}x)")
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the operator conversion in `internal.syntax`.
+
+Compares the single-pass rule engine used by `_convert_operators` with the chained `re.sub`
+implementation it replaced, over the lines of `src/oniom2pdb.pl2py`, and reports lines/sec for both.
+
+Usage:
+    python benchmarks/bench_operators.py [-r REPEAT]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from internal.syntax import _convert_operators
+from internal.rules import rule_stats, reset_rule_stats
+
+def _chained_convert_operators(line: str) -> str:
+    """The chained `re.sub` implementation of `_convert_operators`, kept as the baseline."""
+    line = re.sub(r' \beq\b ', ' == ', line)
+    line = re.sub(r' \bne\b ', ' != ', line)
+    line = re.sub(r' \blt\b ', ' < ', line)
+    line = re.sub(r' \bgt\b ', ' > ', line)
+    line = re.sub(r' \ble\b ', ' <= ', line)
+    line = re.sub(r' \bge\b ', ' >= ', line)
+    line = re.sub(r'(\$\w+)\s*=~\s*/(.+?)/', r'\1 = re.match(r"\2", \1)', line)
+    line = re.sub(r'(\$\w+)\s*!~\s*/(.+?)/', r'\1 = re.search(r"\2", \1)', line)
+    line = re.sub(r' x ', ' * ', line)
+    line = re.sub(r' \. ', ' + ', line)
+    line = re.sub(r' && ', 'and', line)
+    line = re.sub(r' \|\| ', 'or', line)
+    line = re.sub(r' ! ', ' not ', line)
+    line = re.sub(r' \|\|= ', ' |= ', line)
+    line = re.sub(r' &&= ', ' &= ', line)
+    line = re.sub(r' \.\+= ', ' += ', line)
+    line = re.sub(r'\blast\b', 'break', line)
+    line = re.sub(r'\bnext\b', 'continue', line)
+    line = re.sub(r'\bredo\b', 'pass', line)
+    line = re.sub(r'\bopen\s*\(\s*([\'"])(.*?)\1\s*,\s*([\'"])(.*?)([\'"])\s*\)', r'open(\2, \3\4")', line)
+    line = re.sub(r'\bclose\s*\(\s*([\'"])(.*?)\1\s*\)', r'\2.close()', line)
+    line = re.sub(r'\bdie\s*"\s*(.*?)\s*"\s*;', r'raise Exception("\1")', line)
+    line = re.sub(r'\bdie\s*"\s*(.*?)\s*"', r'raise Exception("\1")', line)
+    line = re.sub(r'\bwarn\s*"\s*(.*?)\s*"\s*;', r'warnings.warn("\1")', line)
+    line = re.sub(r'\bwarn\s*"\s*(.*?)\s*"', r'warnings.warn("\1")', line)
+    line = re.sub(r'\bsystem\s*\(\s*([\'"])(.*?)\1\s*\)', r'os.system("\2")', line)
+    return line
+
+def _lines_per_second(convert, lines: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            convert(line)
+    return repeat * len(lines) / (time.perf_counter() - start)
+
+def __main__():
+    parser = argparse.ArgumentParser(description="Benchmark Perl operator conversion")
+    parser.add_argument('-f', '--file', type=str, default=os.path.join(SRC_DIR, 'oniom2pdb.pl2py'), help='Perl file to convert')
+    parser.add_argument('-r', '--repeat', type=int, default=200, help='Number of passes over the file')
+    parser.add_argument('-s', '--stats', action='store_true', help='Print per-rule hit/skip counters of one pass')
+    args = parser.parse_args()
+
+    with open(args.file, 'r') as infile:
+        lines = [line.strip() for line in infile if line.strip()]
+
+    before = _lines_per_second(_chained_convert_operators, lines, args.repeat)
+    after = _lines_per_second(_convert_operators, lines, args.repeat)
+    changed = sum(_chained_convert_operators(line) != _convert_operators(line) for line in lines)
+    print(f"{len(lines)} lines x {args.repeat} passes from {args.file}")
+    print(f"chained re.sub: {before:12,.0f} lines/sec")
+    print(f"rule engine:    {after:12,.0f} lines/sec ({after / before:.2f}x)")
+    print(f"lines with different output: {changed}")
+
+    if args.stats:
+        reset_rule_stats()
+        for line in lines:
+            _convert_operators(line)
+        for rule, counts in rule_stats()['operators'].items():
+            print(f"{rule:>14}: {counts['hits']:6} hits {counts['skips']:6} skips")
+
+if __name__ == "__main__":
+    __main__()
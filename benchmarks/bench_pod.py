@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the POD rendering used for the module docstring.
+
+Compares the built-in streaming renderer `internal.pod` with running `perldoc` in a subprocess,
+which is what preprocess used to do for every file.
+
+Usage:
+    python benchmarks/bench_pod.py -f script.pl [-r REPEAT] [-c COMMAND]
+"""
+
+import os
+import sys
+import time
+import shlex
+import argparse
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from internal.pod import extract_pod
+
+def _seconds_per_file(render, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    return (time.perf_counter() - start) / repeat
+
+def __main__():
+    parser = argparse.ArgumentParser(description="Benchmark POD rendering")
+    parser.add_argument('-f', '--file', type=str, required=True, help='Perl file with POD documentation')
+    parser.add_argument('-r', '--repeat', type=int, default=20, help='Number of renderings')
+    parser.add_argument('-c', '--command', type=str, default='perldoc', help='External renderer to compare with, e.g. perldoc or pod2text')
+    args = parser.parse_args()
+
+    command = shlex.split(args.command) + [args.file]
+    subprocess_time = _seconds_per_file(lambda: subprocess.run(command, capture_output=True), args.repeat)
+    builtin_time = _seconds_per_file(lambda: extract_pod(args.file), args.repeat)
+    print(f"{args.file}, {args.repeat} renderings")
+    print(f"{args.command + ' subprocess:':<24}{subprocess_time * 1000:10.3f} ms/file")
+    print(f"{'built-in renderer:':<24}{builtin_time * 1000:10.3f} ms/file ({subprocess_time / builtin_time:.1f}x)")
+
+if __name__ == "__main__":
+    __main__()
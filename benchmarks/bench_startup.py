@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark of the pl2py CLI.
+
+Runs fresh interpreters and reports the time spent importing `pl2py`, read from `python -X importtime`,
+the heaviest modules it imports, and the wall time of translating one small file with the CLI.
+Pass `--src` with the src directory of another checkout (e.g. a `git worktree` of an older commit)
+to benchmark it instead, and `--compare` to compare with the JSON results of an earlier run.
+
+Usage:
+    python benchmarks/bench_startup.py [-r 10] [--src path/to/src] [-o results.json] [--compare baseline.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import write_corpus
+
+def import_times(src_dir: str) -> tuple[int, dict[str, int]]:
+    """Import `pl2py` in a fresh interpreter.
+
+    Returns:
+        tuple[int, dict[str, int]]: Cumulative import time of pl2py, in microseconds,
+            and of each module it imports directly, modules already imported by the interpreter excluded.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import pl2py'],
+                            cwd=src_dir, capture_output=True, text=True, check=True)
+    total, times = 0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line: continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        if name == 'pl2py': total = int(cumulative)
+        elif depth == 1: times[name.strip()] = int(cumulative) # children are listed before their parent
+    return total, times
+
+def run_time(src_dir: str, input_file_dir: str, output_file_dir: str) -> float:
+    """Wall time, in seconds, of translating one file with the CLI in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(src_dir, 'pl2py.py'), input_file_dir, output_file_dir],
+                   cwd=src_dir, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+def bench_startup(src_dir: str, repeat: int, n_lines: int) -> dict:
+    """Benchmark the cold start of the CLI of a src directory, keeping the fastest of `repeat` runs.
+
+    Returns:
+        dict: Import time of pl2py and of its top-level imports in ms, and wall time of a single-file run in ms.
+    """
+    total, imports = min((import_times(src_dir) for _ in range(repeat)), key=lambda run: run[0])
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_file_dir = write_corpus(os.path.join(work_dir, 'script.pl'), n_lines)
+        output_file_dir = os.path.join(work_dir, 'script.py')
+        wall = min(run_time(src_dir, input_file_dir, output_file_dir) for _ in range(repeat))
+    return {
+        'import_ms': total / 1000,
+        'imports_ms': {name: microseconds / 1000 for name, microseconds in sorted(imports.items(), key=lambda item: -item[1])},
+        'run_ms': wall * 1000,
+        'lines': n_lines,
+    }
+
+def __main__():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the pl2py CLI")
+    parser.add_argument('-r', '--repeat', type=int, default=10, help='Number of runs, the fastest is kept')
+    parser.add_argument('-n', '--lines', type=int, default=50, help='Lines of the translated file')
+    parser.add_argument('--src', type=str, default=SRC_DIR, help='src directory of the checkout to benchmark')
+    parser.add_argument('--top', type=int, default=10, help='Number of imports of pl2py listed')
+    parser.add_argument('-o', '--output', type=str, default=None, help='JSON file receiving the results')
+    parser.add_argument('--compare', type=str, default=None, help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+
+    result = bench_startup(os.path.abspath(args.src), args.repeat, args.lines)
+    print(f"import pl2py: {result['import_ms']:8.1f} ms")
+    for name, milliseconds in list(result['imports_ms'].items())[:args.top]:
+        print(f"  {name:<32}{milliseconds:8.1f} ms")
+    print(f"translate {args.lines} lines: {result['run_ms']:8.1f} ms")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=1)
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            before = json.load(file)
+        print(f"\ncompared with {args.compare}:")
+        print(f"import pl2py: {before['import_ms']:8.1f} -> {result['import_ms']:8.1f} ms ({before['import_ms'] / result['import_ms']:.2f}x)")
+        print(f"single file : {before['run_ms']:8.1f} -> {result['run_ms']:8.1f} ms ({before['run_ms'] / result['run_ms']:.2f}x)")
+
+if __name__ == "__main__":
+    __main__()
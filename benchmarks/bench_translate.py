@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Translation benchmark suite.
+
+Generates deterministic oniom2pdb style scripts and ESPT style modules with `corpus.py` at several sizes,
+translates them, and reports lines/sec of the whole translation and of each stage (preprocessing, literal masking,
+`convert_syntax`, `remove_sigils`, block conversion) together with the peak memory of a translation.
+Results are written as JSON so runs before and after a change can be compared with `--compare`.
+
+Usage:
+    python benchmarks/bench_translate.py [-n 1000 10000 100000] [--style script module] [-o results.json] [--compare baseline.json]
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import write_corpus
+from pl2py import pl2py, __version__, rules_version
+from preprocess import iter_preprocess
+from internal.syntax import convert_syntax
+from internal.remove_sigils import remove_sigils
+from internal.lexer import mask_literals
+from internal.blocks import convert_blocks
+
+def _timed(function) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def _statements(lines: list[str]) -> list[str]:
+    """Split preprocessed lines into the statements and conditions the block converter hands to the line rules."""
+    statements = []
+    def collect(statement: str) -> str:
+        statements.append(statement)
+        return statement
+    code = lines[next(i for i, line in enumerate(lines) if '=====Start Converting Now=====' in line) + 1:]
+    for _ in convert_blocks(code, collect): pass
+    return statements
+
+def _peak_memory(input_file_dir: str, output_file_dir: str) -> int:
+    """Peak of Python allocations, in bytes, while translating a file."""
+    tracemalloc.start()
+    pl2py(input_file_dir, output_file_dir)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def bench_file(input_file_dir: str, output_file_dir: str) -> dict:
+    """Benchmark the translation of one Perl file.
+
+    Args:
+        input_file_dir (str): Perl file to translate.
+        output_file_dir (str): Python file to write.
+
+    Returns:
+        dict: Number of lines, total and per-stage seconds and lines/sec, and peak memory in bytes.
+    """
+    with open(input_file_dir, 'r') as file:
+        n_lines = sum(1 for _ in file)
+    total, _ = _timed(lambda: pl2py(input_file_dir, output_file_dir))
+
+    stages = {}
+    stages['preprocess'], lines = _timed(lambda: list(iter_preprocess(input_file_dir)))
+    stages['blocks'], statements = _timed(lambda: _statements(lines))
+    stages['mask_literals'], masked = _timed(lambda: [mask_literals(statement)[0] for statement in statements])
+    stages['convert_syntax'], converted = _timed(lambda: [convert_syntax(statement) for statement in masked])
+    stages['remove_sigils'], _ = _timed(lambda: [remove_sigils(statement) for statement in converted])
+
+    return {
+        'lines': n_lines,
+        'statements': len(statements),
+        'seconds': total,
+        'lines_per_sec': n_lines / total,
+        'stages': {stage: {'seconds': seconds, 'lines_per_sec': n_lines / seconds if seconds else None}
+                   for stage, seconds in stages.items()},
+        'peak_memory': _peak_memory(input_file_dir, output_file_dir),
+    }
+
+def _compare(results: list[dict], baseline_file_dir: str) -> None:
+    with open(baseline_file_dir, 'r') as file:
+        baseline = {(result['style'], result['size']): result for result in json.load(file)['results']}
+    print(f"\ncompared with {baseline_file_dir}:")
+    for result in results:
+        before = baseline.get((result['style'], result['size']))
+        if before is None: continue
+        speedup = result['lines_per_sec'] / before['lines_per_sec']
+        memory = result['peak_memory'] / before['peak_memory']
+        print(f"{result['style']:>6} {result['size']:>9,}: {speedup:5.2f}x lines/sec, {memory:5.2f}x peak memory")
+        for stage, timing in result['stages'].items():
+            old = before['stages'].get(stage)
+            if old and old['lines_per_sec'] and timing['lines_per_sec']:
+                print(f"{'':>17}{stage:>15}: {timing['lines_per_sec'] / old['lines_per_sec']:5.2f}x")
+
+def __main__():
+    parser = argparse.ArgumentParser(description="Benchmark the translation of synthetic Perl code")
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Corpus sizes, in lines')
+    parser.add_argument('--style', type=str, nargs='+', default=['script', 'module'], choices=['script', 'module'], help='Corpus styles')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the corpus generator')
+    parser.add_argument('-o', '--output', type=str, default=None, help='JSON file receiving the results')
+    parser.add_argument('--compare', type=str, default=None, help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for style in args.style:
+            for size in args.sizes:
+                input_file_dir = write_corpus(os.path.join(work_dir, f'{style}_{size}.pl'), size, args.seed, style)
+                result = {'style': style, 'size': size, **bench_file(input_file_dir, os.path.join(work_dir, f'{style}_{size}.py'))}
+                results.append(result)
+                print(f"{style:>6} {size:>9,}: {result['lines_per_sec']:10,.0f} lines/sec, "
+                      f"peak {result['peak_memory'] / 2**20:7.1f} MiB, " +
+                      ", ".join(f"{stage} {timing['seconds']:.3f}s" for stage, timing in result['stages'].items()))
+
+    report = {
+        'pl2py_version': __version__,
+        'rules_version': rules_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=1)
+    if args.compare:
+        _compare(results, args.compare)
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Deterministic generator of realistic Perl code for benchmarks.
+
+The generated code is modelled on the TAO package: `oniom2pdb` style scripts (POD, `our` globals, argument
+parsing loops, debug prints, file scans) and `ESPT::*` style modules (blessed hash objects with `$self->{KEY}`
+fields, accessor subs, log file parsers). The same seed and size always give the same code.
+
+Usage:
+    python benchmarks/corpus.py -n 100000 -o corpus.pl [--seed 0] [--style script|module]
+"""
+
+import random
+import argparse
+from typing import Iterator
+
+_NAMES = ['gfile', 'pdbfile', 'stepnum', 'outputpdb', 'charge', 'natoms', 'energy', 'occup', 'resid', 'chain']
+_FIELDS = ['G_FILE_NAME', 'PDB_FILE_NAME', 'STEP_NUMBER', 'OUTPUT_FILE_NAME', 'ATOMS', 'CHARGES', 'ENERGY', 'DEBUG']
+_FLAGS = ['-d', '-e', '-g', '-n', '-o', '-p', '-q', '-w', '-ed', '-pdb']
+
+def _pod(name: str) -> list[str]:
+    return [
+        '=head1 NAME', '', f'{name} - generated benchmark program', '',
+        '=head1 SYNOPSIS', '', f'{name} [ -d ] [ -g Gaussian_file_name ] [ -o output_file ]', '',
+        '=head1 OPTIONS', '', '=over 16', '',
+        '=item B<-g> I<Gaussian_file_name>', '', 'Gaussian file. Can be either an input file or log file.', '',
+        '=item B<-o> I<output_file>', '', 'Output PDB file.', '',
+        '=back', '', '=cut', '',
+    ]
+
+def _argument_loop(rng: random.Random) -> list[str]:
+    lines = ['for (my $i=0; $i<=$#ARGV; $i++) {']
+    for flag in rng.sample(_FLAGS, 4):
+        name = rng.choice(_NAMES)
+        if rng.random() < 0.5:
+            lines.append(f'        ${name} = $ARGV[$i + 1] if $ARGV[$i] eq "{flag}";')
+        else:
+            lines += [f'        if ($ARGV[$i] eq "{flag}") {{', f'             ${name} = $ARGV[$i + 1];', '             $have = 1;', '          }']
+    lines.append('}')
+    return lines
+
+def _script_block(rng: random.Random, index: int) -> list[str]:
+    name = rng.choice(_NAMES)
+    other = rng.choice(_NAMES)
+    choice = rng.randrange(6)
+    if choice == 0:
+        return _argument_loop(rng)
+    if choice == 1:
+        return [f'if (${name} == 0) {{', f'  print "{name} is missing.\\n" if $debug >= 0;', '  die "Exit.\\n$!";', ' }']
+    if choice == 2:
+        return [f'open(FILEIN,${name}) || die "Could not read ${name}\\n$!\\n";', 'while (<FILEIN>){',
+                '        # skip blank lines', '        next if /^$/;',
+                f'        if ( /^\\s+Entering\\s+Gaussian\\s+System/ ){{', f'                ${other} = 1;', '                last;', '        }',
+                '    }', 'close(FILEIN);']
+    if choice == 3:
+        return [f'${name} ||= {rng.randrange(10)};', f'${other} = ${name} . ".pdb";',
+                f'print "\\nGenerate PDB file ${other} using ${name} as template.\\n"', '      if $debug >= 0;']
+    if choice == 4:
+        return [f'sub sub_{index} {{', '        my $self = shift;', f'        my ${name} = shift;',
+                f'        $self->{{{rng.choice(_FIELDS)}}} = ${name};', f'        return ${name} x {rng.randrange(1, 4)};', '}']
+    return [f'our (${name}, ${other});', f'my @list_{index} = ({", ".join(str(rng.randrange(100)) for _ in range(4))});',
+            f'my %hash_{index} = (\'{name}\' => 1, \'{other}\' => 2);', f'${name} = $hash_{index}{{\'{other}\'}};']
+
+def _module_block(rng: random.Random, index: int) -> list[str]:
+    field = rng.choice(_FIELDS)
+    choice = rng.randrange(3)
+    if choice == 0:
+        return [f'sub get_{index} {{', '    my $self = shift;', f'    return $self->{{{field}}};', '}']
+    if choice == 1:
+        return [f'sub set_{index} {{', '    my $self = shift;', '    my $value = shift;', f'    $self->{{{field}}} = $value;', '}']
+    return [f'sub parse_{index} {{', '    my $self = shift;', '    my $atoms = 0;',
+            f'    open(LOGFILE,$self->{{G_FILE_NAME}}) || die "Could not read file\\n$!\\n";', '    while (<LOGFILE>) {',
+            '        if ( /^ATOM\\s+\\d+/ or /^HETATM\\s+\\d+/ ) {', '            $atoms++;', '        }', '    }',
+            '    close(LOGFILE);', f'    $self->{{{field}}} = $atoms;', '    return $atoms;', '}']
+
+def generate_perl(n_lines: int, seed: int = 0, style: str = 'script') -> Iterator[str]:
+    """Generate Perl code, one line at a time.
+
+    Args:
+        n_lines (int): Approximate number of lines; the last block is completed, so a few more may be generated.
+        seed (int, optional): Seed of the generator. Defaults to 0.
+        style (str, optional): 'script' for oniom2pdb style programs, 'module' for ESPT style modules.
+
+    Yields:
+        str: Lines of Perl code, without line endings.
+    """
+    rng = random.Random(seed)
+    if style == 'module':
+        header = ['package ESPT::Generated;', '', 'use strict;', 'use warnings;', ''] + _pod('ESPT::Generated') + \
+                 ['sub new {', '    my $class = shift;', '    my $self = {};', '    bless($self, $class);', '    return $self;', '}', '']
+        block = _module_block
+    else:
+        header = ['#!/usr/bin/perl', '', 'use strict;', 'use warnings;', 'use File::Basename;', ''] + _pod('generated') + \
+                 ['our $version = "1.2";', 'our ($debug, $have);', '$debug ||= 0;', '']
+        block = _script_block
+    count = 0
+    for line in header:
+        yield line
+        count += 1
+    index = 0
+    while count < n_lines:
+        for line in block(rng, index) + ['']:
+            yield line
+            count += 1
+        index += 1
+    if style == 'module':
+        yield '1;'
+
+def write_corpus(output_file_dir: str, n_lines: int, seed: int = 0, style: str = 'script') -> str:
+    """Write generated Perl code to a file.
+
+    Args:
+        output_file_dir (str): Path of the Perl file to write.
+        n_lines (int): Approximate number of lines.
+        seed (int, optional): Seed of the generator. Defaults to 0.
+        style (str, optional): 'script' or 'module'.
+
+    Returns:
+        str: The path of the written file.
+    """
+    with open(output_file_dir, 'w') as file:
+        for line in generate_perl(n_lines, seed, style):
+            file.write(line + '\n')
+    return output_file_dir
+
+def __main__():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Perl corpus")
+    parser.add_argument('-n', '--lines', type=int, default=1000, help='Number of lines to generate')
+    parser.add_argument('-o', '--output', type=str, required=True, help='Output Perl file')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generator')
+    parser.add_argument('--style', type=str, default='script', choices=['script', 'module'], help='oniom2pdb style script or ESPT style module')
+    args = parser.parse_args()
+    write_corpus(args.output, args.lines, args.seed, args.style)
+
+if __name__ == "__main__":
+    __main__()
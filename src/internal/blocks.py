@@ -0,0 +1,298 @@
+"""
+Statement- and block-aware streaming converter.
+
+Perl code is fed one physical line at a time. Continuation lines are joined into complete statements,
+braces are tracked with a stack of open blocks, and every statement is emitted as Python with the
+indentation of its block, in a single forward pass. Memory is bounded by the nesting depth and the
+length of the statement being read, not by the size of the file.
+"""
+
+import re
+from typing import Callable, Collection, Iterable, Iterator
+
+from .lexer import Token, tokenize
+from .filehandles import convert_reads, python_handle, slurp_mode
+
+# keywords whose `keyword (...) {` header opens a block
+_CONDITION_KEYWORDS = {'if', 'elsif', 'unless', 'while', 'until', 'for', 'foreach'}
+# keywords that open a block without a condition
+_BARE_KEYWORDS = {'else', 'sub', 'do', 'eval', 'BEGIN', 'END'}
+# `import x` and `from x import y` lines, written by the preprocessor
+_PYTHON_IMPORT = re.compile(r'\s*(?:import |from [\w.]+ import )')
+# C-style counting loop `for (my $i = START; $i <= BOUND; $i++)`, counting up or down by one
+_COUNTING_LOOP = re.compile(r'^\(\s*(?:my\s+)?\$(\w+)\s*=\s*([^;]+?)\s*;\s*\$\1\s*(<=|<|>=|>)\s*([^;]+?)\s*;'
+                            r'\s*(?:\$\1\s*(\+\+|--|[+-]=\s*\d+)|(\+\+|--)\s*\$\1)\s*\)$')
+# last index and length of an array: $#name, @name, scalar(@name), scalar @name
+_LAST_INDEX = re.compile(r'^\$#\{?(\w+)\}?$')
+_LENGTH = re.compile(r'^(?:scalar\s*\(\s*@(\w+)\s*\)|scalar\s+@(\w+)|@(\w+))$')
+# loops reading a handle a line at a time: while (<FH>), while (my $line = <$fh>), while (defined($line = <FH>))
+_READ_LOOP = re.compile(r'^\(\s*(defined\s*\(\s*)?(?:(?:my\s+)?(\$\w+)\s*=\s*)?<(\$?\w*)>\s*(?(1)\))\s*\)$')
+_PYTHON_KEYWORDS = {'if': 'if', 'elsif': 'elif', 'unless': 'if not', 'while': 'while', 'until': 'while not', 'for': 'for', 'foreach': 'for'}
+
+def loop_key(header: str) -> str:
+    """Key of a loop header, e.g. '(my $i = 0; $i < @a; $i++)', the same whatever its whitespace."""
+    return ''.join(header.split())
+
+def _text(tokens: list[Token]) -> str:
+    return ''.join(token.text for token in tokens).strip()
+
+def _significant(tokens: list[Token]) -> list[Token]:
+    return [token for token in tokens if token.kind != 'space']
+
+def _opens_block(tokens: list[Token]) -> bool:
+    """Whether a '{' following these statement tokens opens a block rather than an anonymous hash."""
+    significant = _significant(tokens)
+    if not significant: return True # bare block
+    first, last = significant[0].text, significant[-1].text
+    if first in _CONDITION_KEYWORDS: return last == ')'
+    if first == 'sub': return len(significant) <= 3 # sub NAME or sub NAME(PROTO)
+    return first in _BARE_KEYWORDS and len(significant) == 1
+
+class BlockConverter:
+    """Streaming converter of Perl statements and blocks into indented Python.
+
+    Args:
+        convert_statement (Callable[[str], str]): Converts one complete Perl statement (or condition) into Python,
+            e.g. `process_each_line`. Its result may span several lines.
+        indent (str, optional): Indentation of one block level. Defaults to four spaces.
+        varying_loops (Collection[str], optional): Keys of the headers of the counting loops whose counter or bound
+            changes in their body, see `internal.loops`; they test their condition on every iteration instead of
+            iterating over a range.
+        statement_tokens (bool, optional): Whether convert_statement takes the tokens of a statement as an optional
+            second argument, so that it is not tokenized again; None is passed when they differ from the tokens of its
+            text, e.g. for a statement continued on another line.
+    """
+    def __init__(self, convert_statement: Callable[[str], str], indent: str = '    ', varying_loops: Collection[str] = (),
+                 statement_tokens: bool = False):
+        self.convert_statement = convert_statement
+        self.indent = indent
+        self.varying_loops = varying_loops
+        self.statement_tokens = statement_tokens
+        self._blocks = []        # one entry per open block, True once the block has a Python statement
+        self._pending = []       # tokens of the statement being read
+        self._parens = 0         # open ( and [ of the pending statement
+        self._braces = 0         # open expression braces ({ of hashes and subscripts) of the pending statement
+        self._slurp = None       # depth of the block in which `local $/;` makes reads return the rest of the file
+        self._stale = False      # whether the tokens of the pending statement differ from the tokens of its text
+
+    @property
+    def depth(self) -> int:
+        """Current block nesting depth."""
+        return len(self._blocks)
+
+    @property
+    def at_top_level(self) -> bool:
+        """Whether no block is open, no statement is pending and reads do not slurp, so a new converter would convert
+        the next lines the same."""
+        return not self._blocks and not self._pending and self._slurp is None
+
+    def _emit(self, text: str, depth: int) -> Iterator[str]:
+        for line in text.split('\n'):
+            yield self.indent * depth + line if line else ''
+
+    def _statement(self, text: str, tokens: list[Token] = None) -> Iterator[str]:
+        """Convert and emit a complete statement, given its tokens unless they differ from the tokens of its text."""
+        if slurp_mode(text):
+            # no Python statement, the reads of the rest of the block are converted to read()
+            if self._slurp is None: self._slurp = self.depth
+            return
+        if self._slurp is not None:
+            read = convert_reads(text, slurp=True)
+            if read != text: text, tokens = read, None
+        if self._blocks: self._blocks[-1] = True
+        yield from self._emit(self.convert_statement(text, tokens) if self.statement_tokens else self.convert_statement(text), self.depth)
+
+    def _header(self, tokens: list[Token]) -> str:
+        """Convert the header of a block, the tokens before its '{', into a Python compound statement."""
+        significant = _significant(tokens)
+        if not significant: return 'if True:'
+        keyword = significant[0].text
+        rest = _text(tokens[tokens.index(significant[0]) + 1:])
+        if keyword == 'else': return 'else:'
+        # the arguments are a list, as `shift` pops them; the header starts the body
+        if keyword == 'sub': return f'def {significant[1].text}(*args):\n{self.indent}args = list(args)'
+        if keyword not in _CONDITION_KEYWORDS: return 'if True:' # do, eval, BEGIN and END blocks run once
+        if keyword == 'while':
+            loop = self._read_loop(rest)
+            if loop is not None: return loop
+        if keyword in ('for', 'foreach'):
+            loop = self._counting_loop(rest) if ';' in rest else self._foreach_loop(tokens[tokens.index(significant[0]) + 1:])
+            if loop is not None: return loop
+        if ';' in rest:
+            # C-style for (init; test; step), each part is converted on its own
+            rest = '; '.join(self.convert_statement(part.strip()) for part in rest.split(';'))
+        else:
+            rest = self.convert_statement(rest)
+        return f'{_PYTHON_KEYWORDS[keyword]} {rest}:'
+
+    def _handle(self, name: str) -> str:
+        """Convert the handle of a read, `$fh`, `FH`, STDIN or the empty handle of `<>`."""
+        return self.convert_statement(name) if name.startswith('$') else python_handle(name)
+
+    def _read_loop(self, rest: str) -> str:
+        """Convert a `while (<FH>)` header reading a line at a time into iteration over the file, None for other loops."""
+        match = _READ_LOOP.match(rest)
+        if not match: return None
+        return f'for {self.convert_statement(match.group(2) or "$_")} in {self._handle(match.group(3))}:'
+
+    def _value(self, expression: str) -> str:
+        """Convert an expression of a loop header, with array lengths and last indexes as len()."""
+        match = _LAST_INDEX.match(expression)
+        if match: return f'len({self.convert_statement("@" + match.group(1))}) - 1'
+        match = _LENGTH.match(expression)
+        if match: return f'len({self.convert_statement("@" + next(name for name in match.groups() if name))})'
+        return self.convert_statement(expression)
+
+    @staticmethod
+    def _offset(value: str, delta: int) -> str:
+        """Add 1 or -1 to a converted expression, folding numbers and `x - 1` + 1."""
+        if re.fullmatch(r'-?\d+', value): return str(int(value) + delta)
+        if delta == 1 and value.endswith(' - 1'): return value[:-4]
+        if delta == -1 and value.endswith(' + 1'): return value[:-4]
+        return f'{value} + 1' if delta == 1 else f'{value} - 1'
+
+    def _counting_loop(self, rest: str) -> str:
+        """Convert a C-style counting loop header into `for i in range(...):`, None for other C-style loops."""
+        match = _COUNTING_LOOP.match(rest)
+        if not match: return None
+        name, start, comparison, bound, step, prefix_step = match.groups()
+        step = step or prefix_step
+        up, size = step[0] == '+', int(step[2:]) if '=' in step else 1
+        if size == 0: return None
+        if up != (comparison in ('<', '<=')): return None # e.g. counting up while $i > 0, not a bounded loop
+        variable, start, stop = self.convert_statement('$' + name), self._value(start), self._value(bound)
+        if loop_key(rest) in self.varying_loops:
+            # the body changes the counter or the bound: step, then test the condition on every iteration
+            start = str(int(start) + (-size if up else size)) if re.fullmatch(r'-?\d+', start) else f'{start} {"-" if up else "+"} {size}'
+            return f'{variable} = {start}\nwhile ({variable} := {variable} {"+" if up else "-"} {size}) {comparison} {stop}:'
+        if comparison == '<=': stop = self._offset(stop, 1)
+        elif comparison == '>=': stop = self._offset(stop, -1)
+        if not up: return f'for {variable} in range({start}, {stop}, -{size}):'
+        if size != 1: return f'for {variable} in range({start}, {stop}, {size}):'
+        return f'for {variable} in range({stop}):' if start == '0' else f'for {variable} in range({start}, {stop}):'
+
+    def _foreach_loop(self, tokens: list[Token]) -> str:
+        """Convert a `foreach my $x (LIST)` header into direct iteration, `foreach (LIST)` iterating over `$_`."""
+        significant = _significant(tokens)
+        if significant and significant[0].text in ('my', 'our', 'local'): significant = significant[1:]
+        implicit = bool(significant) and significant[0].text == '('
+        if implicit: significant = [Token('variable', '$_')] + significant
+        if len(significant) < 3 or significant[0].kind != 'variable' or significant[0].text[0] != '$' \
+                or significant[1].text != '(' or significant[-1].text != ')' or _text(significant[2:-1]) == '': return None
+        variable = self.convert_statement(significant[0].text)
+        items = tokens[tokens.index(significant[1]) + 1:tokens.index(significant[-1])]
+        ranges = [i for i, token in enumerate(items) if token.text == '..']
+        if len(ranges) == 1 and _significant(items[:ranges[0]]):
+            # a range of numbers, START..END includes END
+            start = self._value(_text(items[:ranges[0]]))
+            stop = self._offset(self._value(_text(items[ranges[0] + 1:])), 1)
+            return f'for {variable} in range({stop}):' if start == '0' else f'for {variable} in range({start}, {stop}):'
+        text = _text(items)
+        match = re.fullmatch(r'<(\$?\w*)>', text)
+        if match: return f'for {variable} in {self._handle(match.group(1))}:' # lines read one at a time, not as a list
+        match = re.fullmatch(r'(sort\s+)?(?:keys\s+%(\w+)|@(\w+))', text)
+        if match:
+            iterable = self.convert_statement('@' + (match.group(2) or match.group(3)))
+            return f'for {variable} in {"sorted(" + iterable + ")" if match.group(1) else iterable}:'
+        match = re.fullmatch(r'values\s+%(\w+)', text)
+        if match: return f'for {variable} in {self.convert_statement("@" + match.group(1))}.values():'
+        if implicit: return None # e.g. `for ($x)` aliasing $_ to a scalar
+        return f'for {variable} in ({self.convert_statement(text)}):'
+
+    def _flush(self) -> Iterator[str]:
+        """Emit the pending statement, if any."""
+        tokens, stale = self._pending, self._stale
+        while tokens and tokens[-1].kind == 'space': tokens.pop()
+        self._pending, self._parens, self._braces, self._stale = [], 0, 0, False
+        if tokens: yield from self._statement(_text(tokens), None if stale else tokens)
+
+    def feed(self, line: str) -> Iterator[str]:
+        """Feed one physical line of Perl code.
+
+        Args:
+            line (str): A line of Perl code.
+
+        Yields:
+            str: Indented Python lines, without line endings, for every statement completed by this line.
+        """
+        if not line.strip():
+            if not self._pending: yield ''
+            return
+        if not self._pending and _PYTHON_IMPORT.match(line):
+            # imports written by the preprocessor are already Python and have no ';'
+            if self._blocks: self._blocks[-1] = True
+            yield from self._emit(line.strip(), self.depth)
+            return
+        previous = None # last token of the line that is not whitespace
+        for token in tokenize(line.strip()):
+            kind, text = token
+            if not self._pending and kind not in ('space', 'comment'):
+                # after a '}' the first token of a statement is read as an operator, e.g. a '/' as a division
+                self._stale = previous == '}'
+            if kind != 'space': previous = text
+            if kind == 'comment':
+                yield from self._emit(text, self.depth)
+            elif kind == 'space':
+                if self._pending: self._pending.append(token)
+            elif text in ('(', '['):
+                self._parens += 1
+                self._pending.append(token)
+            elif text in (')', ']'):
+                self._parens -= 1
+                self._pending.append(token)
+            elif text == '{':
+                if self._parens == 0 and self._braces == 0 and _opens_block(self._pending):
+                    header = self._header(self._pending)
+                    yield from self._emit(header, self.depth)
+                    if self._blocks: self._blocks[-1] = True
+                    self._blocks.append(not header.endswith(':')) # a header may start the body of its block
+                    self._pending, self._parens = [], 0
+                else:
+                    self._braces += 1
+                    self._pending.append(token)
+            elif text == '}':
+                if self._braces > 0:
+                    self._braces -= 1
+                    self._pending.append(token)
+                elif self._blocks:
+                    # the last statement of a block may omit its ';'
+                    yield from self._flush()
+                    if not self._blocks.pop(): yield from self._emit('pass', self.depth + 1)
+                    if self._slurp is not None and self._slurp > self.depth: self._slurp = None
+                else:
+                    self._pending.append(token)
+            elif text == ';' and self._parens == 0 and self._braces == 0:
+                self._pending.append(token)
+                yield from self._flush()
+            else:
+                self._pending.append(token)
+        if self._pending:
+            # the statement continues on the next line, whose tokens are read without the end of this one
+            self._pending.append(Token('space', ' '))
+            self._stale = True
+
+    def close(self) -> Iterator[str]:
+        """Emit the last pending statement and close the blocks left open at the end of the file.
+
+        Yields:
+            str: The remaining indented Python lines.
+        """
+        yield from self._flush()
+        while self._blocks:
+            if not self._blocks.pop(): yield from self._emit('pass', self.depth + 1)
+
+def convert_blocks(lines: Iterable[str], convert_statement: Callable[[str], str], indent: str = '    ') -> Iterator[str]:
+    """Convert a stream of Perl lines into indented Python lines.
+
+    Args:
+        lines (Iterable[str]): Lines of Perl code.
+        convert_statement (Callable[[str], str]): Converts one complete Perl statement into Python.
+        indent (str, optional): Indentation of one block level. Defaults to four spaces.
+
+    Yields:
+        str: Indented Python lines, without line endings.
+    """
+    converter = BlockConverter(convert_statement, indent)
+    for line in lines:
+        yield from converter.feed(line)
+    yield from converter.close()
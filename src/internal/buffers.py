@@ -0,0 +1,201 @@
+"""
+List buffers of strings accumulated in loops.
+
+Perl builds its output by appending to a string, `$out .= sprintf(...)` inside a loop; the same in Python copies the
+string on every append, which is quadratic in the length of the output. The pre-pass over a file finds the `my`
+scalars appended to inside a loop, and their statements are rewritten to accumulate in a list instead:
+`my $out = '';` becomes `my $out = [];`, `$out .= EXPR;` `$out.append(EXPR);` and every other use of `$out` reads
+`''.join($out)`. Variables whose uses cannot all be rewritten that way (interpolated in strings, matched, modified in
+place, referenced, or sharing their name with an array or hash) keep their string.
+"""
+
+import re
+
+from .lexer import tokenize, Token
+
+# first words of the headers of loop blocks
+_LOOP_KEYWORDS = {'for', 'foreach', 'while', 'until'}
+# statement modifiers, `$out .= $x if $x;` appends only the text before them
+_MODIFIERS = {'if', 'unless', 'for', 'foreach', 'while', 'until'}
+# words taking a scalar as something else than its value, e.g. modifying it in place or aliasing it in a loop
+_MODIFYING = {'chop', 'chomp', 'substr', 'undef', 'local', 'our', 'read', 'sysread', 'open', 'tie', 'pos', 'vec', 'my', 'for', 'foreach', '\\'}
+# operators after a scalar that are not assignments
+_COMPARISONS = {'==', '!=', '<=', '>=', '=>'}
+# declarations of empty scalars, the candidate buffers
+_EMPTY_DECLARATION = re.compile(r'''\bmy\s+\$(\w+)\s*(?:;|=\s*(?:''|""|undef)\s*;)''')
+# names mentioned with any sigil, inside strings as well
+_MENTION = re.compile(r'[$@%]#?\{?(\w+)')
+# braces, parentheses, statement ends and loop keywords of the lines that are not tokenized
+_BLOCK_SYNTAX = re.compile(r'[{};()]|\b(for|foreach|while|until)\b')
+# initial values of an empty buffer
+_EMPTY = {"''", '""', 'q()', 'qq()', 'q{}', 'qq{}', 'undef'}
+# builtins returning strings, whose values are appended as they are
+_STRING_FUNCTIONS = {'sprintf', 'join', 'lc', 'uc', 'lcfirst', 'ucfirst'}
+
+def _scalar(token: Token) -> str:
+    """Return the name of a `$name` scalar token, None for other tokens."""
+    if token.kind != 'variable' or token.text[0] != '$' or not token.text[1:].isidentifier(): return None
+    return token.text[1:]
+
+def _interpolated(text: str) -> set[str]:
+    """Names of the variables a string literal may interpolate, whatever its quotes."""
+    names, pos = set(), text.find('$')
+    while pos != -1:
+        name = text[pos + 1:].lstrip('{')
+        end = next((i for i, char in enumerate(name) if not (char.isalnum() or char == '_')), len(name))
+        if end: names.add(name[:end])
+        pos = text.find('$', pos + 1)
+    return names
+
+def _is_string(tokens: list[Token], value: str) -> bool:
+    """Whether an appended value is a string, rather than e.g. a number that Perl's `.=` would stringify."""
+    if len(tokens) == 1 and tokens[0].kind == 'string': return True
+    return bool(tokens) and (tokens[0].kind == 'word' and tokens[0].text in _STRING_FUNCTIONS or value.startswith("''.join("))
+
+class BufferTable:
+    """Scalars of a file accumulated in loops, rewritten as list buffers.
+
+    Lines are fed in file order, the table follows the blocks across lines to know which appends are in a loop.
+    Only the lines mentioning a scalar declared empty (`my $x;` or `my $x = '';`) since its declaration are tokenized,
+    other lines are scanned for their braces; a name mentioned in a line that was not tokenized cannot become a buffer.
+    """
+    def __init__(self):
+        self._candidates = set() # scalars declared empty, whose uses are tokenized from their declaration on
+        self._skipped = set()    # names mentioned in lines that were not tokenized
+        self._appended = set()   # scalars appended to inside a loop
+        self._excluded = set()   # scalars with a use that cannot be rewritten
+        self._statement = []     # significant tokens of the statement being fed
+        self._partial = False    # whether the statement being fed started in a line that was not tokenized
+        self._header = False     # whether it is the header of a loop, for statements starting in such lines
+        self._parens = 0         # open parentheses of the statement being fed, a ';' inside them does not end it
+        self._loops = []         # for each open brace, whether it is in a loop
+        self._names = None
+        self._key = None
+
+    @property
+    def names(self) -> frozenset[str]:
+        """Names of the scalars rewritten as list buffers."""
+        if self._names is None: self._names = frozenset((self._appended & self._candidates) - self._excluded)
+        return self._names
+
+    @property
+    def key(self) -> str:
+        """Text identifying the buffers of this table, e.g. for cache keys."""
+        if self._key is None: self._key = repr(sorted(self.names))
+        return self._key
+
+    def feed(self, line: str, tokens: list[Token] = None) -> None:
+        """Record the appends and the other uses of the scalars in one line of code, given its tokens if they are known."""
+        stripped = line.lstrip()
+        if not stripped or stripped[0] == '#': return # blank or comment line
+        mentioned = set(_MENTION.findall(line)) if '$' in line or '@' in line or '%' in line else set()
+        if 'my' in line:
+            for name in _EMPTY_DECLARATION.findall(line):
+                if name not in self._skipped: self._candidates.add(name)
+        if self._statement or mentioned & self._candidates:
+            self._feed_tokens(line, tokens)
+        else:
+            self._skipped |= mentioned
+            self._feed_blocks(line)
+        self._names, self._key = None, None
+
+    def _feed_blocks(self, line: str) -> None:
+        """Follow the blocks of a line that is not tokenized."""
+        boundary = 0
+        for match in _BLOCK_SYNTAX.finditer(line):
+            if match.group(1):
+                # a loop keyword starting a statement
+                if not line[boundary:match.start()].strip() and (boundary or not self._partial): self._header = True
+                continue
+            if match.group() in '()':
+                self._parens = self._parens + 1 if match.group() == '(' else max(self._parens - 1, 0)
+                continue
+            if match.group() == ';':
+                if self._parens: continue # e.g. in the header of a C-style for loop
+                self._header = self._partial = False
+            else: self._end_statement(match.group())
+            boundary = match.end()
+        rest = line[boundary:].strip()
+        if rest and rest[0] != '#': self._partial = True
+
+    def _feed_tokens(self, line: str, tokens: list[Token] = None) -> None:
+        """Record the statements of a tokenized line."""
+        for token in tokens if tokens is not None else tokenize(line):
+            if token.kind in ('space', 'comment'): continue
+            if token.kind in ('string', 'regex'):
+                self._excluded |= _interpolated(token.text)
+            elif token.kind == 'variable' and token.text[0] in '@%' or token.text.startswith('$#'):
+                self._excluded.add(token.text.lstrip('$#@%{').rstrip('}')) # an array or hash of the same name
+            if token.text == '(': self._parens += 1
+            elif token.text == ')': self._parens = max(self._parens - 1, 0)
+            if token.text in ('{', '}') or token.text == ';' and not self._parens:
+                self._end_statement(token.text)
+            else:
+                self._statement.append(token)
+
+    def _end_statement(self, end: str) -> None:
+        """Record the statement fed so far, ended by a ';' or a brace."""
+        statement, self._statement = self._statement, []
+        partial, self._partial = self._partial, False
+        self._parens = 0
+        header, self._header = self._header if partial or not statement else statement[0].text in _LOOP_KEYWORDS, False
+        in_loop = bool(self._loops) and self._loops[-1]
+        if end == '{':
+            # hash braces and blocks alike, a block is in a loop if it is a loop or inside one
+            self._loops.append(in_loop or header)
+        elif end == '}' and self._loops:
+            self._loops.pop()
+        for i, token in enumerate(statement):
+            name = _scalar(token)
+            if name is None: continue
+            previous = statement[i - 1].text if i else None
+            following = statement[i + 1].text if i + 1 < len(statement) else end
+            if partial:
+                self._excluded.add(name) # the start of the statement was not tokenized
+            elif i == 0 and following == '.=':
+                if in_loop: self._appended.add(name)
+            elif i == 1 and previous == 'my' and following in (';', '='):
+                pass # declared, rewritten as an empty list
+            elif i == 0 and following == '=':
+                pass # the whole string is assigned
+            elif previous in _MODIFYING or previous in ('++', '--') or previous == '(' and i > 1 and statement[i - 2].text in _MODIFYING \
+                    or following in ('[', '{', '->', '=~', '!~', '++', '--') or following.endswith('=') and following not in _COMPARISONS \
+                    or following == 'x' and i + 2 < len(statement) and statement[i + 2].text == '=': # x=
+                self._excluded.add(name)
+
+    def rewrite(self, line: str, tokens: list[Token] = None) -> str:
+        """Rewrite a statement for the list buffers of the file.
+
+        Args:
+            line (str): A Perl statement, with its sigils and literals.
+            tokens (list[Token], optional): The tokens of the statement, tokenized if not given.
+
+        Returns:
+            str: The statement appending to and joining the buffers.
+        """
+        names = self.names
+        if not names or '$' not in line: return line
+        if tokens is None: tokens = tokenize(line)
+        significant = [i for i, token in enumerate(tokens) if token.kind not in ('space', 'comment')]
+        if not any(_scalar(tokens[i]) in names for i in significant): return line
+        parts = [token.text for token in tokens]
+        last = significant[-1] if tokens[significant[-1]].text != ';' else significant[-1] - 1
+        first = 1 if tokens[significant[0]].text == 'my' else 0
+        target = significant[first] if len(significant) > first and _scalar(tokens[significant[first]]) in names else None
+        operator = tokens[significant[first + 1]].text if target is not None and len(significant) > first + 1 else None
+        for i in significant:
+            if i != target and _scalar(tokens[i]) in names: parts[i] = f"''.join({tokens[i].text})"
+        if target is None: return ''.join(parts)
+        # the value ends at a statement modifier, if any
+        end = next((i for i in significant if i > target and tokens[i].kind == 'word' and tokens[i].text in _MODIFIERS), last + 1)
+        value = ''.join(parts[significant[first + 1] + 1:end]).strip() if operator else ''
+        # `.=` stringifies what it appends, ''.join() only takes strings
+        if value and value not in _EMPTY and not _is_string([tokens[i] for i in significant if significant[first + 1] < i < end], value):
+            value = f'str({value})'
+        head, tail = ''.join(parts[:target + 1]), ''.join(parts[end:]).rstrip()
+        if tail and tail != ';': tail = ' ' + tail.lstrip()
+        if operator == '.=':
+            return f'{head}.append({value}){tail}'
+        if operator in ('=', ';', None) and (first or operator == '='):
+            return f'{head} = [{"" if value in _EMPTY else value}]{tail}'
+        return ''.join(parts)
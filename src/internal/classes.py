@@ -0,0 +1,240 @@
+"""
+Classes of the blessed packages of a Perl file.
+
+Perl objects are blessed hashes, e.g. `my $self = { NAME => $name }; bless $self, $class;`, whose fields the
+conversion rules turn into attribute accesses (`$self->{NAME}` into `self.NAME`). The pre-pass over a file collects the
+keys used on `$self` in each package that blesses, and the package statement is translated into a class with these
+keys as `__slots__`, so objects store their fields compactly and access them as attributes rather than through a dict.
+The constructors of the package create instances of the class instead of hashes:
+
+    class Atom:
+        __slots__ = ('NAME', 'charge')
+
+        def __init__(self, **fields):
+            unknown = fields.keys() - set(self.__slots__)
+            if unknown: raise TypeError(f"Atom has no fields {', '.join(sorted(unknown))}")
+            for name in self.__slots__: setattr(self, name, fields.get(name))
+
+Packages using keys that are not known in advance (`$self->{$key}`, `keys %$self`) or inheriting from another
+package keep their hashes.
+"""
+
+import re
+from typing import Iterable
+
+from .lexer import tokenize, Token
+from .blocks import _opens_block
+
+# package statements, the start of the package every following statement belongs to
+_PACKAGE = re.compile(r'\s*package\s+([\w:]+)\s*;')
+
+def _class_name(package: str) -> str:
+    """Python name of the class of a package, e.g. 'ESPT_Atom' for ESPT::Atom."""
+    return package.replace('::', '_')
+
+def _key(token: Token) -> str:
+    """Return the hash key of a bareword or quoted key token, None if it is not a valid attribute name."""
+    text = token.text
+    if token.kind == 'string' and len(text) > 1 and text[0] in '\'"' and text[-1] == text[0]: text = text[1:-1]
+    elif token.kind != 'word': return None
+    return text if text.isidentifier() else None
+
+def _literal_keys(tokens: list[Token], start: int) -> list[str]:
+    """Return the keys of the hash literal whose '{' is tokens[start], None if one is not a valid attribute name."""
+    keys, depth = [], 0
+    for i in range(start, len(tokens)):
+        text = tokens[i].text
+        if text in ('{', '[', '('): depth += 1
+        elif text in ('}', ']', ')'): depth -= 1
+        elif text == '=>' and depth == 1:
+            key = _key(tokens[i - 1])
+            if key is None: return None
+            keys.append(key)
+        if depth == 0: break
+    return keys
+
+class ClassTable:
+    """Blessed packages of a file, with the fields of their objects.
+
+    Lines are fed in file order during the pre-pass and joined into statements, as the block converter sees them, so
+    the keys of a hash literal spanning several lines are all collected. During the conversion, `package` follows the package the
+    statements being converted belong to; it is set by `definition` and, for conversions starting in the middle of a
+    file, from `package_after`.
+    """
+    def __init__(self):
+        self.package = None     # package of the statements being converted, None for main
+        self._fields = {}       # package -> dict of its keys, in order of first use
+        self._blessed = set()   # packages that bless
+        self._excluded = set()  # packages whose objects keep their hashes
+        self._current = None    # package of the lines being fed
+        self._statement = []    # significant tokens of the statement being fed
+        self._parens = 0        # open ( and [ of the statement being fed
+        self._braces = 0        # open expression braces of the statement being fed
+        self._names = None
+        self._key = None
+
+    @property
+    def names(self) -> dict[str, tuple[str, ...]]:
+        """Slots of the class of each blessed package, keyed by package name."""
+        if self._names is None:
+            self._names = {package: tuple(self._fields.get(package, ())) for package in self._fields.keys() | self._blessed
+                           if package in self._blessed and package not in self._excluded and package is not None}
+        return self._names
+
+    @property
+    def key(self) -> str:
+        """Text identifying the classes of this table, e.g. for cache keys."""
+        if self._key is None: self._key = repr(sorted(self.names.items()))
+        return self._key
+
+    def _add(self, keys: list[str]) -> None:
+        """Record keys of the objects of the current package, None meaning a key that is not an attribute name."""
+        if keys is None: self._excluded.add(self._current)
+        else: self._fields.setdefault(self._current, {}).update(dict.fromkeys(keys))
+
+    def feed(self, line: str, tokens: list[Token] = None) -> None:
+        """Record the package, blesses and object keys of one line of code, once its statements are complete, given the
+        tokens of the line if they are known."""
+        if not self._statement and 'package' not in line and 'bless' not in line and 'self' not in line and 'ISA' not in line \
+                and 'use' not in line: return
+        for token in tokens if tokens is not None else tokenize(line):
+            kind, text = token
+            if kind in ('space', 'comment'): continue
+            if text in ('(', '['): self._parens += 1
+            elif text in (')', ']'): self._parens = max(self._parens - 1, 0)
+            elif text == '{':
+                if self._parens == 0 and self._braces == 0 and _opens_block(self._statement):
+                    self._end_statement() # a block header
+                    continue
+                self._braces += 1
+            elif text == '}':
+                if self._braces == 0:
+                    self._end_statement() # the end of a block
+                    continue
+                self._braces -= 1
+            elif text == ';' and self._parens == 0 and self._braces == 0:
+                self._end_statement()
+                continue
+            self._statement.append(token)
+        self._names, self._key = None, None
+
+    def _end_statement(self) -> None:
+        """Record the package, blesses and object keys of the statement fed so far."""
+        tokens, self._statement, self._parens, self._braces = self._statement, [], 0, 0
+        for i, (kind, text) in enumerate(tokens):
+            following = tokens[i + 1].text if i + 1 < len(tokens) else None
+            if kind == 'word' and text == 'package' and following is not None and tokens[i + 1].kind == 'word':
+                self._current = tokens[i + 1].text
+            elif kind == 'word' and text == 'bless':
+                self._blessed.add(self._current)
+                start = i + 1 if following == '{' else i + 2 if following == '(' and i + 2 < len(tokens) and tokens[i + 2].text == '{' else None
+                if start is not None: self._add(_literal_keys(tokens, start))
+            elif kind == 'variable' and text == '@ISA' or kind == 'word' and text in ('parent', 'base') and i and tokens[i - 1].text == 'use':
+                self._excluded.add(self._current)
+            elif kind == 'variable' and text == '$self':
+                previous = tokens[i - 1].text if i else None
+                if following == '->' and i + 2 < len(tokens) and tokens[i + 2].text == '{':
+                    key = _key(tokens[i + 3]) if i + 4 < len(tokens) and tokens[i + 4].text == '}' else None
+                    self._add(None if key is None else [key])
+                elif following == '->' and i + 2 < len(tokens) and tokens[i + 2].text == '[' or previous in ('%', '@') \
+                        or previous == '{' and i > 1 and tokens[i - 2].text in ('%', '@'):
+                    self._excluded.add(self._current) # dereferenced as a whole
+                elif following == '=' and i + 2 < len(tokens) and tokens[i + 2].text == '{':
+                    self._add(_literal_keys(tokens, i + 2))
+
+    def package_after(self, lines: Iterable[str], package: str) -> str:
+        """Return the package in effect after lines of code, given the package before them."""
+        for line in lines:
+            if line.lstrip().startswith('package'):
+                match = _PACKAGE.match(line)
+                if match: package = match.group(1)
+        return package
+
+    def definition(self, statement: str) -> str:
+        """Follow a package statement, returning the Python definition of its class.
+
+        Args:
+            statement (str): A Perl statement.
+
+        Returns:
+            str: The class definition if the statement starts a blessed package, None otherwise.
+        """
+        if not statement.startswith('package'): return None
+        match = _PACKAGE.match(statement)
+        if not match: return None
+        self.package = match.group(1)
+        if self.package not in self.names: return None
+        return '\n'.join([
+            f'class {_class_name(self.package)}:',
+            f'    __slots__ = {self.names[self.package]!r}',
+            '',
+            '    def __init__(self, **fields):',
+            '        unknown = fields.keys() - set(self.__slots__)',
+            f'        if unknown: raise TypeError(f"{_class_name(self.package)} has no fields {{\', \'.join(sorted(unknown))}}")',
+            '        for name in self.__slots__: setattr(self, name, fields.get(name))',
+            '',
+        ])
+
+    def _instance(self, tokens: list[Token], significant: list[int], start: int, parts: list[str]) -> int:
+        """Rewrite the hash literal starting at significant[start] into a call of the class, returning the position after it."""
+        depth = 0
+        for position in range(start, len(significant)):
+            i = significant[position]
+            text = tokens[i].text
+            if text in ('{', '[', '('): depth += 1
+            elif text in ('}', ']', ')'): depth -= 1
+            elif text == '=>' and depth == 1:
+                key = significant[position - 1]
+                parts[key] = _key(tokens[key])
+                parts[key + 1:i + 1] = [''] * (i - key - 1) + ['=']
+                if i + 1 < len(tokens) and tokens[i + 1].kind == 'space': parts[i + 1] = ''
+            if depth == 0:
+                parts[significant[start]] = f'{_class_name(self.package)}('
+                parts[i] = ')'
+                # no spaces inside the parentheses
+                if tokens[significant[start] + 1].kind == 'space': parts[significant[start] + 1] = ''
+                if tokens[i - 1].kind == 'space': parts[i - 1] = ''
+                return position + 1
+        return len(significant)
+
+    def rewrite(self, line: str, tokens: list[Token] = None) -> str:
+        """Rewrite a statement of a blessed package for its class.
+
+        Hashes blessed or assigned to `$self` become instances of the class, `{ NAME => $name }` becoming
+        `Atom(NAME=$name)`, `bless REF, CLASS` becomes the reference alone, and quoted keys of `$self` become barewords.
+
+        Args:
+            line (str): A Perl statement, with its sigils and literals.
+            tokens (list[Token], optional): The tokens of the statement, tokenized if not given.
+
+        Returns:
+            str: The statement creating and using instances of the class.
+        """
+        if self.package not in self.names or ('self' not in line and 'bless' not in line): return line
+        if tokens is None: tokens = tokenize(line)
+        significant = [i for i, token in enumerate(tokens) if token.kind not in ('space', 'comment')]
+        texts = [tokens[i].text for i in significant]
+        parts = [token.text for token in tokens]
+        for position, i in enumerate(significant):
+            if texts[position] == '$self' and texts[position + 1:position + 3] == ['->', '{'] and position + 4 < len(texts) \
+                    and tokens[significant[position + 3]].kind == 'string' and texts[position + 4] == '}':
+                parts[significant[position + 3]] = _key(tokens[significant[position + 3]]) # $self->{'key'}
+            elif texts[position] == '$self' and texts[position + 1:position + 3] == ['=', '{']:
+                self._instance(tokens, significant, position + 2, parts)
+            elif texts[position] == 'bless' and tokens[i].kind == 'word' and position + 1 < len(texts):
+                opened = texts[position + 1] == '('
+                reference = position + 1 + opened
+                if reference == len(texts): continue
+                end = self._instance(tokens, significant, reference, parts) if texts[reference] == '{' else reference + 1
+                # the class argument runs to the end of the statement, or to the parenthesis closing bless( or an enclosing call
+                depth, close = 0, end
+                while close < len(texts) and texts[close] != ';':
+                    if texts[close] in ('(', '[', '{'): depth += 1
+                    elif texts[close] in (')', ']', '}'): depth -= 1
+                    if depth < 0:
+                        close += opened
+                        break
+                    close += 1
+                parts[i:significant[reference]] = [''] * (significant[reference] - i)
+                if close > end: parts[significant[end]:significant[close - 1] + 1] = [''] * (significant[close - 1] + 1 - significant[end])
+        return ''.join(parts)
@@ -0,0 +1,71 @@
+"""
+Reads of file handles.
+
+Perl scripts read their input a record at a time with `<FH>`, and the outputs of Gaussian and the other programs they
+parse can be several gigabytes, so the reads are translated to the methods of Python file objects that do not hold
+more of the file than the Perl code does:
+
+- loop headers `while (<FH>)`, `while (my $line = <$fh>)` and `foreach my $line (<FH>)` iterate over the file,
+  `for line in FH:`, reading one line at a time,
+- `<FH>` is `FH.readline()`, and assigned to an array `FH.readlines()`,
+- slurps, `do { local $/; <FH> }` and the reads of a block in which `local $/;` unsets the record separator, are
+  `FH.read()`.
+
+`<STDIN>` reads `sys.stdin`, and loops over `<>` read the files named on the command line, or the standard input,
+with `fileinput.input()`; the pre-pass over a file records which of these modules its header imports.
+"""
+
+import re
+
+# reads of a handle: $fh, FH or STDIN; glob patterns such as <*.log> are not handles
+_READ = re.compile(r'(?P<slurp>do\s*\{\s*local\s+\$/\s*(?:=\s*undef\s*)?;\s*<(?P<whole>\$?\w+)>\s*;?\s*\})'
+                   r'|(?P<array>@\w+\s*=\s*)?<(?P<handle>\$?\w+)>')
+# every read of a handle, for the modules the file has to import
+_HANDLE = re.compile(r'<(\$?\w*)>')
+# modules of the Python file objects of the standard handles
+_MODULES = {'STDIN': 'sys', '': 'fileinput', 'ARGV': 'fileinput'}
+# statements unsetting the record separator, so that reads return the rest of the file
+_SLURP_MODE = re.compile(r'(?:local\s+\$/(?:\s*=\s*undef)?|(?:local\s+)?\$/\s*=\s*undef|undef\s*\(?\s*\$/\s*\)?)\s*;?')
+
+def python_handle(name: str) -> str:
+    """Return the Python file object of a Perl handle, e.g. 'sys.stdin' for STDIN; lexical handles keep their sigil."""
+    if name in ('', 'ARGV'): return 'fileinput.input()'
+    return 'sys.stdin' if name == 'STDIN' else name
+
+def slurp_mode(statement: str) -> bool:
+    """Whether a statement unsets the record separator, `local $/;` or `undef $/;`."""
+    return '$/' in statement and _SLURP_MODE.fullmatch(statement) is not None
+
+def convert_reads(line: str, slurp: bool = False) -> str:
+    """Convert the reads of file handles of a statement into calls of the methods of Python file objects.
+
+    Args:
+        line (str): A Perl statement, with its sigils.
+        slurp (bool, optional): Whether the record separator is unset, so that every read returns the rest of the file.
+
+    Returns:
+        str: The statement with `FH.readline()`, `FH.readlines()` and `FH.read()` instead of `<FH>`.
+    """
+    if '<' not in line or '>' not in line: return line
+    def read(match: re.Match) -> str:
+        if match.group('slurp'): return f'{python_handle(match.group("whole"))}.read()'
+        name = match.group('handle')
+        if name == 'ARGV': return match.group() # fileinput.input() can only be opened once
+        handle = python_handle(name)
+        if match.group('array'): return f'{match.group("array")}[{handle}.read()]' if slurp else f'{match.group("array")}{handle}.readlines()'
+        return f'{handle}.read()' if slurp else f'{handle}.readline()'
+    return _READ.sub(read, line)
+
+class HandleTable:
+    """Standard handles read by a file, and the modules their Python file objects need."""
+    def __init__(self):
+        self.modules = set()
+
+    def feed(self, line: str) -> None:
+        """Record the standard handles read in one line of code."""
+        if '<' not in line or '>' not in line: return
+        self.modules.update(_MODULES[name] for name in _HANDLE.findall(line) if name in _MODULES)
+
+    def imports(self) -> list[str]:
+        """Return the import lines of the modules, empty if the file reads no standard handle."""
+        return [f'import {module}' for module in sorted(self.modules)]
@@ -0,0 +1,187 @@
+"""
+Perl lexer.
+
+Splits a line of Perl code into tokens once (variables, string/regex literals, numbers, barewords, operators,
+whitespace and comments), so the conversion stages do not each have to re-parse the raw text.
+The token stream is also used to mask the literals of a line, which keeps the regex based conversion rules
+from misfiring inside strings and regexes (e.g. ` x ` or `;` in a quoted string).
+"""
+
+import re
+from typing import NamedTuple
+
+class Token(NamedTuple):
+    """A lexical token of Perl code.
+
+    Args:
+        kind (str): One of 'space', 'comment', 'variable', 'string', 'regex', 'number', 'word' or 'op'.
+        text (str): The source text of the token.
+    """
+    kind: str
+    text: str
+
+_SPACE = re.compile(r'\s+')
+_VARIABLE = re.compile(r'\$#\{?\w+\}?|[$@]\w+(?:::\w+)*|\$\^\w|\$[!@/\\,;.&`\'+<>0-9]')
+_SIGIL_VARIABLE = re.compile(r'[%&*]\w+(?:::\w+)*')
+_NUMBER = re.compile(r'0[xX][0-9a-fA-F]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?|\.\d+')
+_WORD = re.compile(r'[A-Za-z_]\w*(?:::\w+)*')
+_OPERATOR = re.compile(r'<=>|\*\*=|\|\|=|&&=|//=|\.\.\.|=~|!~|->|=>|==|!=|<=|>=|&&|\|\||//|\.\.|\+\+|--|\*\*|\+=|-=|\*=|/=|\.=|<<|>>|[^\s\w]')
+_FLAGS = re.compile(r'[a-z]*')
+
+# quote-like operators, with the number of delimited parts they take
+_QUOTE_LIKE = {'q': 1, 'qq': 1, 'qw': 1, 'qr': 1, 'm': 1, 's': 2, 'tr': 2, 'y': 2}
+_CLOSING = {'(': ')', '[': ']', '{': '}', '<': '>'}
+# barewords after which an operand is expected: a '/' starts a regex rather than a division, '%' a hash rather than a modulo
+_REGEX_KEYWORDS = {'if', 'unless', 'while', 'until', 'and', 'or', 'not', 'split', 'grep', 'map', 'return', 'when', 'my', 'our', 'local'}
+
+def _scan_delimited(line: str, pos: int, opening: str) -> int:
+    """Return the position after the closing delimiter of a literal whose opening delimiter is at line[pos - 1]."""
+    closing = _CLOSING.get(opening, opening)
+    depth = 1
+    while pos < len(line):
+        char = line[pos]
+        if char == '\\':
+            pos += 2
+            continue
+        if char == closing and closing != opening:
+            depth -= 1
+        elif char == opening and closing != opening:
+            depth += 1
+        elif char == closing:
+            depth = 0
+        pos += 1
+        if depth == 0: return pos
+    return len(line) # unterminated literal, runs to the end of the line
+
+def _scan_quote_like(line: str, pos: int, parts: int) -> int:
+    """Return the end of a quote-like literal (q//, s///, tr{}{}, ...) whose first delimiter is at line[pos]."""
+    opening = line[pos]
+    end = _scan_delimited(line, pos + 1, opening)
+    if parts == 2:
+        if opening in _CLOSING:
+            # s{...}{...}: the replacement has its own delimiters, possibly after whitespace
+            space = _SPACE.match(line, end)
+            start = space.end() if space else end
+            if start < len(line): end = _scan_delimited(line, start + 1, line[start])
+        else:
+            # s/.../.../: the middle delimiter is shared by both parts
+            end = _scan_delimited(line, end, opening)
+    return _FLAGS.match(line, end).end()
+
+def _expects_operand(previous: Token) -> bool:
+    """Whether the next token is in operand position, i.e. '/' starts a regex and '%', '&', '*' are sigils."""
+    if previous is None: return True
+    if previous.kind == 'op': return previous.text not in (')', ']', '}')
+    if previous.kind == 'word': return previous.text in _REGEX_KEYWORDS
+    return False
+
+def tokenize(line: str) -> list[Token]:
+    """Split a line of Perl code into tokens.
+
+    Joining the text of the tokens gives back the line.
+
+    Args:
+        line (str): A line of Perl code.
+
+    Returns:
+        list[Token]: The tokens of the line.
+    """
+    tokens = []
+    previous = None # last token that is not whitespace
+    pos = 0
+    while pos < len(line):
+        char = line[pos]
+        operand = _expects_operand(previous)
+        previous_text = previous.text if previous else None
+        if char.isspace():
+            match = _SPACE.match(line, pos)
+            tokens.append(Token('space', match.group()))
+            pos = match.end()
+            continue
+        if char == '#':
+            token = Token('comment', line[pos:])
+        elif char in '$@' and (match := _VARIABLE.match(line, pos)):
+            token = Token('variable', match.group())
+        elif char in '%&*' and operand and (match := _SIGIL_VARIABLE.match(line, pos)):
+            token = Token('variable', match.group())
+        elif char in '"\'`':
+            token = Token('string', line[pos:_scan_delimited(line, pos + 1, char)])
+        elif char == '/' and operand:
+            end = _scan_delimited(line, pos + 1, '/')
+            token = Token('regex', line[pos:_FLAGS.match(line, end).end()])
+        elif char.isdigit() or (char == '.' and line[pos + 1:pos + 2].isdigit()):
+            token = Token('number', _NUMBER.match(line, pos).group())
+        elif char.isalpha() or char == '_':
+            word = _WORD.match(line, pos).group()
+            end = pos + len(word)
+            delimiter = line[end:end + 1]
+            if word in _QUOTE_LIKE and delimiter and not delimiter.isspace() and not delimiter.isalnum() \
+                    and delimiter not in '=,;:)}>_' and previous_text != '->':
+                end = _scan_quote_like(line, end, _QUOTE_LIKE[word])
+                token = Token('regex' if word in ('m', 's', 'tr', 'y', 'qr') else 'string', line[pos:end])
+            else:
+                token = Token('word', word)
+        else:
+            token = Token('op', _OPERATOR.match(line, pos).group())
+        tokens.append(token)
+        previous = token
+        pos += len(token.text)
+    return tokens
+
+# placeholder of a masked literal; the NUL delimiters keep its digits from being matched as part of a name
+_PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+_INTERPOLATED = re.compile(r'[$@](\w+)')
+
+def mask_literals(line: str, renames: dict[str, str] = None, tokens: list[Token] = None) -> tuple[str, list[str]]:
+    """Replace the content of the string and regex literals and the comments of a line by placeholders.
+
+    Quotes and regex delimiters are kept, so rules matching e.g. `die "..."` or `=~ /.../` still apply,
+    but nothing inside a literal can be matched by a conversion rule.
+    Interpolated variables of double-quoted strings and regexes lose their sigils, like the rest of the line.
+
+    Args:
+        line (str): A line of Perl code.
+        renames (dict[str, str], optional): Python names of the interpolated variables that are renamed,
+            see `SymbolTable.renames`.
+        tokens (list[Token], optional): The tokens of the line, when the caller has them, so it is not tokenized again.
+
+    Returns:
+        tuple[str, list[str]]: The masked line and the literal texts to restore with `unmask_literals`.
+    """
+    if '"' not in line and "'" not in line and '/' not in line and '#' not in line and '`' not in line:
+        return line, [] # nothing to mask, skip tokenizing
+    literals = []
+    parts = []
+    for kind, text in tokens if tokens is not None else tokenize(line):
+        if kind not in ('string', 'regex', 'comment'):
+            parts.append(text)
+            continue
+        # keep the quotes of "...", '...', `...` and the slashes of /.../flags around the placeholder
+        head, tail = '', ''
+        if kind == 'string' and text[0] in '"\'`' and len(text) > 1 and text[-1] == text[0]:
+            head, text, tail = text[0], text[1:-1], text[-1]
+        elif kind == 'regex' and text[0] == '/':
+            body_end = text.rfind('/')
+            if body_end > 0:
+                head, text, tail = '/', text[1:body_end], text[body_end:]
+        if not text:
+            parts.append(head + tail)
+            continue
+        if head in ('"', '/', '`'):
+            text = _INTERPOLATED.sub(lambda match: renames.get(match.group(1), match.group(1)), text) if renames else _INTERPOLATED.sub(r'\1', text)
+        parts.append(f'{head}\x00{len(literals)}\x00{tail}')
+        literals.append(text)
+    return ''.join(parts), literals
+
+def unmask_literals(line: str, literals: list[str]) -> str:
+    """Restore the literals masked by `mask_literals`.
+
+    Args:
+        line (str): A masked line, possibly converted since.
+        literals (list[str]): The literals returned by `mask_literals`.
+
+    Returns:
+        str: The line with its literals restored.
+    """
+    if not literals: return line
+    return _PLACEHOLDER.sub(lambda match: literals[int(match.group(1))], line)
@@ -0,0 +1,82 @@
+"""
+Counting loops whose counter or bound changes in their body.
+
+A C-style loop `for (my $i = 0; $i < @a; $i++)` is translated into `for i in range(len(a)):`, which computes its
+bound once and sets the counter on every iteration, whatever the body does with them. Perl tests the condition again
+after every iteration, so a body assigning the counter (`$i--` after a `splice`) or changing the length of the array
+of the bound (`splice`, `push`, `pop`, `shift`, `unshift`, or assigning the array) behaves differently. The pre-pass
+over a file records the headers of such loops, and they are translated into `while` loops testing the condition on
+every iteration instead.
+"""
+
+import re
+
+from .lexer import Token, tokenize
+from .blocks import _COUNTING_LOOP, loop_key
+
+# operators assigning the scalar before them
+_ASSIGNMENTS = {'=', '+=', '-=', '*=', '/=', '%=', '**=', '.=', 'x=', '||=', '&&=', '//=', '|=', '&=', '^=', '<<=', '>>=', '++', '--'}
+# builtins changing the length of the array they take first
+_RESIZING = {'splice', 'push', 'pop', 'shift', 'unshift', 'undef'}
+# arrays whose length or last index is a bound: @a, $#a, scalar(@a)
+_BOUND_ARRAY = re.compile(r'(?:@|\$#)\{?(\w+)')
+
+class LoopTable:
+    """Headers of the counting loops of a file whose counter or bound array changes in their body.
+
+    Lines are fed in file order; only the lines of a `for` header or of the body of a counting loop are tokenized.
+    Loops are keyed by their header text, so two loops with the same header share their translation.
+    """
+    def __init__(self):
+        self.varying = set()  # keys of the headers of the loops translated into while loops
+        self._loops = []      # open counting loops: key, counter, bound arrays and brace depth of their body
+        self._depth = 0       # open braces since the outermost open loop
+        self._header = None   # tokens of the for header being read, None outside headers
+        self._parens = 0      # open parentheses of the header being read
+        self._pending = None  # loop whose header was read, until the '{' of its body
+
+    def feed(self, line: str, tokens: list[Token] = None) -> None:
+        """Record the changes of the counters and bound arrays of the open counting loops in one line of code, given
+        its tokens if they are known."""
+        if not self._loops and self._header is None and self._pending is None and 'for' not in line: return
+        tokens = [token for token in (tokens if tokens is not None else tokenize(line)) if token.kind not in ('space', 'comment')]
+        for i, (kind, text) in enumerate(tokens):
+            if self._loops: self._check(tokens, i)
+            if self._header is not None:
+                self._header.append(text)
+                if text == '(': self._parens += 1
+                elif text == ')':
+                    self._parens -= 1
+                    if self._parens == 0: self._end_header()
+            elif kind == 'word' and text in ('for', 'foreach') and i + 1 < len(tokens) and tokens[i + 1].text == '(':
+                self._header, self._parens = [], 0
+            elif text == '{':
+                self._depth += 1
+                if self._pending is not None: self._loops.append(self._pending + (self._depth,))
+                self._pending = None
+            elif text == '}':
+                if self._loops and self._loops[-1][3] == self._depth: self._loops.pop()
+                self._depth = self._depth - 1 if self._loops else 0
+            elif text == ';':
+                self._pending = None
+
+    def _end_header(self) -> None:
+        """Record the header just read, if it is the header of a counting loop."""
+        header, self._header = ' '.join(self._header), None
+        match = _COUNTING_LOOP.match(header)
+        if match: self._pending = (loop_key(header), match.group(1), set(_BOUND_ARRAY.findall(match.group(4))))
+
+    def _check(self, tokens: list, i: int) -> None:
+        """Mark the open loops whose counter or bound array tokens[i] changes."""
+        kind, text = tokens[i]
+        if kind != 'variable': return
+        previous = tokens[i - 1].text if i else None
+        following = tokens[i + 1].text if i + 1 < len(tokens) else None
+        for key, counter, arrays, _ in self._loops:
+            if text == '$' + counter and (following in _ASSIGNMENTS or previous in ('++', '--')):
+                self.varying.add(key)
+            elif text[0] == '@' and text[1:] in arrays and (following == '=' or previous in _RESIZING
+                                                            or previous == '(' and i > 1 and tokens[i - 2].text in _RESIZING):
+                self.varying.add(key)
+            elif text.startswith('$#') and text[2:] in arrays and following in _ASSIGNMENTS:
+                self.varying.add(key)
@@ -0,0 +1,110 @@
+"""
+On-disk manifest of translated files.
+
+For every translated Perl file the manifest records the hash of the source, the pl2py version, the hash of the
+rule set used and the hash of the produced output. A file whose entry still matches all of them does not need
+to be preprocessed or converted again.
+"""
+
+import os
+import json
+import hashlib
+
+def file_hash(file_dir: str) -> str:
+    """Return the sha256 hex digest of a file's content.
+
+    Args:
+        file_dir (str): Path of the file.
+
+    Returns:
+        str: Hex digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(file_dir, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def rule_set_hash(source_files: list[str], extra: str = "") -> str:
+    """Return a hash identifying a rule set, from the source of the modules implementing it.
+
+    Args:
+        source_files (list[str]): Paths of the modules implementing the conversion rules.
+        extra (str, optional): Additional text to hash, e.g. the options the files are translated with.
+
+    Returns:
+        str: Hex digest of the rule set.
+    """
+    digest = hashlib.sha256(extra.encode('utf-8'))
+    for source_file in sorted(source_files):
+        digest.update(file_hash(source_file).encode('ascii'))
+    return digest.hexdigest()
+
+def _stat(file_dir: str) -> list[int]:
+    """Return the size and modification time of a file, used to avoid rehashing unchanged files."""
+    stat = os.stat(file_dir)
+    return [stat.st_size, stat.st_mtime_ns]
+
+class Manifest:
+    """Content-hash manifest consulted before translating a file.
+
+    Args:
+        manifest_dir (str): Path of the JSON manifest file. It is created on the first save.
+    """
+    def __init__(self, manifest_dir: str):
+        self.manifest_dir = manifest_dir
+        self.entries = {}
+        if os.path.exists(manifest_dir):
+            with open(manifest_dir, 'r') as file:
+                self.entries = json.load(file)
+
+    def _matches(self, file_dir: str, recorded_hash: str, recorded_stat: list[int]) -> bool:
+        """Check a file against its recorded hash, skipping the hash when its size and mtime are unchanged."""
+        if not os.path.exists(file_dir): return False
+        if _stat(file_dir) == recorded_stat: return True
+        return file_hash(file_dir) == recorded_hash
+
+    def is_up_to_date(self, input_file_dir: str, output_file_dir: str, version: str, rules_hash: str) -> bool:
+        """Check whether the output of a file is still valid for its source, the translator version and the rule set.
+
+        Args:
+            input_file_dir (str): Perl source file.
+            output_file_dir (str): Translated Python file.
+            version (str): pl2py version.
+            rules_hash (str): Hash of the rule set, see `rule_set_hash`.
+
+        Returns:
+            bool: True if the file does not need to be translated again.
+        """
+        entry = self.entries.get(os.path.abspath(input_file_dir))
+        if entry is None: return False
+        if entry['output'] != os.path.abspath(output_file_dir): return False
+        if entry['version'] != version or entry['rules_hash'] != rules_hash: return False
+        return self._matches(input_file_dir, entry['source_hash'], entry['source_stat']) \
+            and self._matches(output_file_dir, entry['output_hash'], entry['output_stat'])
+
+    def record(self, input_file_dir: str, output_file_dir: str, version: str, rules_hash: str) -> None:
+        """Record a successful translation of a file.
+
+        Args:
+            input_file_dir (str): Perl source file.
+            output_file_dir (str): Translated Python file.
+            version (str): pl2py version.
+            rules_hash (str): Hash of the rule set, see `rule_set_hash`.
+        """
+        self.entries[os.path.abspath(input_file_dir)] = {
+            'output': os.path.abspath(output_file_dir),
+            'version': version,
+            'rules_hash': rules_hash,
+            'source_hash': file_hash(input_file_dir),
+            'source_stat': _stat(input_file_dir),
+            'output_hash': file_hash(output_file_dir),
+            'output_stat': _stat(output_file_dir),
+        }
+
+    def save(self) -> None:
+        """Write the manifest to disk, replacing the previous version atomically."""
+        temp_dir = self.manifest_dir + '.tmp'
+        with open(temp_dir, 'w') as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(temp_dir, self.manifest_dir)
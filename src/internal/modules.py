@@ -0,0 +1,193 @@
+"""
+Perl module dependencies.
+
+`use` and `require` statements are converted into Python imports matching the translated module layout
+(`ESPT::ONIOMtoPDB` is translated to `ESPT/ONIOMtoPDB.py` and imported as `ESPT.ONIOMtoPDB`), and resolved
+against lib paths to build the dependency graph of a program. The graph is translated in topological waves:
+every module of a wave only depends on modules of earlier waves.
+"""
+
+import os
+import re
+from typing import Iterable, NamedTuple
+
+# `use Module VERSION LIST;` and `require Module;`, possibly indented and followed by a comment
+_USE = re.compile(r'^(\s*)(use|require)\s+([A-Za-z_]\w*(?:::\w+)*)\s*(.*?)\s*;\s*(?:#.*)?$')
+_VERSION = re.compile(r'^v?\d[\d._]*\s*')
+_QW = re.compile(r'^qw\s*[(\[{/<]\s*(.*?)\s*[)\]}/>]$', re.S)
+_QUOTED = re.compile(r'''['"]([^'"]*)['"]''')
+
+# pragmas and modules without a Python counterpart, their `use` line is dropped
+_DROPPED = {'strict', 'diagnostics', 'utf8', 'integer', 'feature', 'Exporter', 'FindBin'}
+# pragmas with arguments that are not imports, left for the later conversion stages
+_KEPT = {'constant', 'vars', 'overload'}
+# Perl core modules and the Python module replacing them
+_PYTHON_MODULES = {'warnings': 'warnings', 'File::Basename': 'os', 'File::Spec': 'os', 'Cwd': 'os', 'Getopt::Long': 'argparse'}
+
+def python_module(module: str) -> str:
+    """Return the Python module name of a Perl module, e.g. 'ESPT.ONIOMtoPDB' for 'ESPT::ONIOMtoPDB'."""
+    return _PYTHON_MODULES.get(module, module.replace('::', '.'))
+
+def _import_list(arguments: str) -> list[str]:
+    """Return the names imported by the argument list of a `use` statement, None if it cannot be read."""
+    if not arguments: return []
+    match = _QW.match(arguments)
+    if match: return match.group(1).split()
+    if arguments.startswith('(') and arguments.endswith(')'): arguments = arguments[1:-1].strip()
+    names = _QUOTED.findall(arguments)
+    if _QUOTED.sub('', arguments).strip(' ,'): return None # expressions, not a plain list of names
+    return names
+
+def python_import(line: str) -> str:
+    """Convert a `use` or `require` statement into a Python import.
+
+    Args:
+        line (str): A line of Perl code.
+
+    Returns:
+        str: The Python line, keeping the indentation; '' if the statement has no Python equivalent and is dropped;
+            None if the line is not a `use`/`require` of a module, or has arguments that are not an import list.
+    """
+    match = _USE.match(line)
+    if not match: return None
+    indent, keyword, module, arguments = match.groups()
+    if module in _DROPPED: return ''
+    if module in _KEPT: return None
+    if module == 'lib':
+        paths = _import_list(arguments)
+        if not paths: return None
+        return indent + 'import sys; ' + '; '.join(f'sys.path.insert(0, "{path}")' for path in reversed(paths))
+    if module in ('base', 'parent'):
+        parents = [name for name in _import_list(arguments) or [] if name != '-norequire']
+        return indent + '; '.join(f'import {python_module(parent)}' for parent in parents) if parents else None
+    names = _import_list(_VERSION.sub('', arguments))
+    if names is None: return None
+    if module in _PYTHON_MODULES or not names:
+        return f'{indent}import {python_module(module)}'
+    if any(name.startswith(':') for name in names):
+        return f'{indent}from {python_module(module)} import *' # export tags
+    return f'{indent}from {python_module(module)} import {", ".join(name.lstrip("$@%&") for name in names)}'
+
+class Dependency(NamedTuple):
+    """A module a Perl file depends on.
+
+    Args:
+        module (str): Perl module name, e.g. 'ESPT::ONIOMtoPDB'.
+        line (int): Line number of the `use` or `require` statement.
+    """
+    module: str
+    line: int
+
+def scan_dependencies(input_file_dir: str) -> tuple[list[str], list[Dependency]]:
+    """Find the lib paths and the module dependencies of a Perl file.
+
+    `$FindBin::Bin` and relative lib paths are taken relative to the directory of the file.
+
+    Args:
+        input_file_dir (str): Perl file.
+
+    Returns:
+        tuple[list[str], list[Dependency]]: The paths of its `use lib` statements and the modules it uses or requires.
+    """
+    directory = os.path.dirname(os.path.abspath(input_file_dir))
+    lib_paths, dependencies = [], []
+    in_pod = False
+    with open(input_file_dir, 'r') as file:
+        for number, line in enumerate(file, 1):
+            if line.startswith('='):
+                in_pod = not line.startswith('=cut')
+                continue
+            if in_pod or ('use' not in line and 'require' not in line): continue
+            match = _USE.match(line)
+            if not match: continue
+            module, arguments = match.group(3), match.group(4)
+            if module == 'lib':
+                for path in _import_list(arguments) or []:
+                    path = re.sub(r'\$FindBin::(?:Real)?Bin|\$\{FindBin::(?:Real)?Bin\}', lambda _: directory, path)
+                    lib_paths.append(os.path.normpath(os.path.join(directory, path)))
+            elif module in ('base', 'parent'):
+                dependencies.extend(Dependency(parent, number) for parent in _import_list(arguments) or [] if parent != '-norequire')
+            elif module not in _DROPPED and module not in _KEPT and module not in _PYTHON_MODULES:
+                dependencies.append(Dependency(module, number))
+    return lib_paths, dependencies
+
+def resolve_module(module: str, lib_paths: Iterable[str]) -> str:
+    """Find the .pm file of a module in lib paths.
+
+    Args:
+        module (str): Perl module name.
+        lib_paths (Iterable[str]): Directories searched in order, like @INC.
+
+    Returns:
+        str: Path of the module file, None if it is not in any lib path (e.g. a CPAN module).
+    """
+    relative = os.path.join(*module.split('::')) + '.pm'
+    for lib_path in lib_paths:
+        path = os.path.join(lib_path, relative)
+        if os.path.isfile(path): return os.path.normpath(path)
+    return None
+
+class ModuleGraph:
+    """Dependency graph of Perl programs and the modules they use, found through lib paths.
+
+    Args:
+        roots (Iterable[str]): Perl files to translate with their dependencies.
+        lib_paths (Iterable[str], optional): Lib paths searched before the `use lib` paths of each file.
+    """
+    def __init__(self, roots: Iterable[str], lib_paths: Iterable[str] = ()):
+        self.lib_paths = list(lib_paths)
+        self.dependencies = {}      # file -> files it depends on
+        self.modules = {}           # file -> Perl module name, None for the root programs
+        self.unresolved = {}        # file -> modules not found in any lib path
+        pending = [(os.path.normpath(root), None, self.lib_paths) for root in roots]
+        while pending:
+            path, module, inherited_paths = pending.pop()
+            if path in self.dependencies: continue
+            lib_paths, dependencies = scan_dependencies(path)
+            # lib paths of a program also apply to the modules it loads, like @INC
+            search_paths = list(dict.fromkeys(self.lib_paths + lib_paths + inherited_paths))
+            self.modules[path] = module
+            self.dependencies[path] = []
+            for dependency in dependencies:
+                resolved = resolve_module(dependency.module, search_paths)
+                if resolved is None:
+                    self.unresolved.setdefault(path, []).append(dependency.module)
+                    continue
+                if resolved not in self.dependencies[path]: self.dependencies[path].append(resolved)
+                pending.append((resolved, dependency.module, search_paths))
+
+    def waves(self) -> list[list[str]]:
+        """Order the files in waves, each depending only on the files of earlier waves.
+
+        Files in a dependency cycle cannot be ordered; they are translated together in one wave.
+
+        Returns:
+            list[list[str]]: Sorted files of each wave, dependencies first.
+        """
+        remaining = {path: set(dependencies) for path, dependencies in self.dependencies.items()}
+        waves = []
+        while remaining:
+            wave = sorted(path for path, dependencies in remaining.items() if not dependencies & remaining.keys())
+            if not wave: wave = sorted(remaining) # cycle
+            waves.append(wave)
+            for path in wave:
+                del remaining[path]
+        return waves
+
+    def output_path(self, path: str, output_dir: str) -> str:
+        """Return the translated file of a file of the graph.
+
+        Modules are written at the path of their Python module name, so the imports of the translated programs
+        resolve, e.g. <output_dir>/ESPT/ONIOMtoPDB.py; programs are written at the top of the output directory.
+
+        Args:
+            path (str): A file of the graph.
+            output_dir (str): Output directory, None to write each .py file next to its Perl source.
+
+        Returns:
+            str: Path of the translated file.
+        """
+        if output_dir is None: return re.sub(r'\.[^.]*$', '.py', path)
+        module = self.modules[path]
+        if module is None: return os.path.join(output_dir, re.sub(r'\.[^.]*$', '.py', os.path.basename(path)))
+        return os.path.join(output_dir, *module.split('::')) + '.py'
@@ -0,0 +1,194 @@
+"""
+Registry of the conversion passes applied to every Perl statement.
+
+Each `Pass` declares how it matches (a function, or regex rules) which literals a line must contain for it to
+do anything, and which passes it has to run after. A `PassRegistry` orders the registered passes by these
+dependencies and builds a `Pipeline`:
+
+- passes whose triggers occur nowhere in a file are left out of the pipeline of that file,
+- adjacent regex passes that do not depend on each other are fused into a single `RuleSet` scan,
+- passes can be disabled by name, and project-specific passes can be registered next to the default ones.
+"""
+
+from typing import Callable, Iterable, NamedTuple
+
+from .rules import Rule, RuleSet, KeywordIndex
+from .syntax import _OPERATOR_RULES, _convert_print, _convert_oneline_if, _delete_semicolon
+from .remove_sigils import remove_sigils
+from .filehandles import convert_reads
+
+class Pass(NamedTuple):
+    """A conversion pass over one Perl statement.
+
+    Args:
+        name (str): Unique name of the pass.
+        function (Callable[[str], str], optional): Converts a statement. Either function or rules is given.
+        rules (tuple[Rule, ...], optional): Regex rules applied in a single scan; such passes can be fused.
+        triggers (tuple[str, ...], optional): Literals one of which a statement must contain for the pass to change it.
+            Defaults to the triggers of the rules; a pass without triggers always runs.
+        after (tuple[str, ...], optional): Names of the passes whose output this pass works on.
+        produces (tuple[str, ...], optional): Literals the pass may add to a statement, e.g. the ';' closing a converted
+            print, so the passes they trigger run even on files that do not contain them.
+    """
+    name: str
+    function: Callable[[str], str] = None
+    rules: tuple[Rule, ...] = ()
+    triggers: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    produces: tuple[str, ...] = ()
+
+    @property
+    def all_triggers(self) -> tuple[str, ...]:
+        """Triggers of the pass, including those of its rules; empty if any rule can match without a trigger."""
+        if self.triggers or not self.rules: return self.triggers
+        if not all(rule.triggers for rule in self.rules): return ()
+        return tuple(dict.fromkeys(trigger for rule in self.rules for trigger in rule.triggers))
+
+class Pipeline:
+    """An ordered list of conversion stages, callable on a statement.
+
+    Args:
+        stages (list[tuple[str, Callable[[str], str]]]): Name and function of each stage. A stage fusing
+            several regex passes is named after all of them, joined by '+'.
+    """
+    def __init__(self, stages: list[tuple[str, Callable[[str], str]]]):
+        self.stages = stages
+
+    @property
+    def names(self) -> list[str]:
+        """Names of the stages, in order."""
+        return [name for name, _ in self.stages]
+
+    def __call__(self, line: str) -> str:
+        for _, function in self.stages:
+            line = function(line)
+        return line
+
+    def timed(self, profiler) -> 'Pipeline':
+        """Return the same pipeline with every stage timed by a `Profiler`, as the stage 'pass.<name>'."""
+        return Pipeline([(name, profiler.wrap(f'pass.{name}', function)) for name, function in self.stages])
+
+class PassRegistry:
+    """Ordered collection of passes building the pipelines.
+
+    Args:
+        passes (Iterable[Pass], optional): Passes to register, in order.
+    """
+    def __init__(self, passes: Iterable[Pass] = ()):
+        self.passes = {}
+        self._index = None
+        self._pipelines = {}
+        for pass_ in passes:
+            self.register(pass_)
+
+    def register(self, pass_: Pass, replace: bool = False) -> None:
+        """Register a pass.
+
+        Args:
+            pass_ (Pass): The pass. Registration order breaks ties between passes that do not depend on each other.
+            replace (bool, optional): Replace a registered pass of the same name instead of raising ValueError.
+        """
+        if (pass_.function is None) == (not pass_.rules):
+            raise ValueError(f"Pass {pass_.name} needs either a function or rules")
+        if pass_.name in self.passes and not replace:
+            raise ValueError(f"Pass {pass_.name} is already registered")
+        self.passes[pass_.name] = pass_
+        self._index, self._pipelines = None, {}
+
+    def unregister(self, name: str) -> None:
+        """Remove a registered pass."""
+        del self.passes[name]
+        self._index, self._pipelines = None, {}
+
+    def signature(self) -> str:
+        """Return a text identifying the registered passes, for cache keys and translator hashes."""
+        return repr([(pass_.name, getattr(pass_.function, '__qualname__', None), pass_.rules, pass_.after, pass_.produces) for pass_ in self.passes.values()])
+
+    def needed(self, lines: Iterable[str]) -> frozenset:
+        """Return the names of the passes that can change some of the given lines.
+
+        Args:
+            lines (Iterable[str]): Lines of a file, scanned once; the scan stops when every pass is needed.
+
+        Returns:
+            frozenset: Names of the passes triggered by the lines or by the literals the needed passes produce, and
+                of the passes without triggers.
+        """
+        if self._index is None:
+            self._index = KeywordIndex('passes', {name: pass_.all_triggers for name, pass_ in self.passes.items()})
+        needed = set()
+        for line in lines:
+            # padded, so that triggers delimited by spaces also match at the ends of a line
+            needed.update(self._index.candidates(f' {line.strip()} '))
+            if len(needed) == len(self.passes): break
+        # the output of a needed pass may trigger other passes
+        produced = set()
+        while True:
+            literals = {literal for name in needed for literal in self.passes[name].produces} - produced
+            if not literals: break
+            produced |= literals
+            needed.update(name for name, pass_ in self.passes.items()
+                          if any(trigger in f' {literal} ' for trigger in pass_.all_triggers for literal in literals))
+        return frozenset(needed)
+
+    def _order(self, names: list[str]) -> list[Pass]:
+        """Order passes so that every pass comes after the passes it depends on, keeping registration order otherwise."""
+        remaining = list(names)
+        ordered = []
+        while remaining:
+            for name in remaining:
+                if not any(dependency in remaining for dependency in self.passes[name].after): break
+            else:
+                raise ValueError(f"Passes depend on each other in a cycle: {', '.join(remaining)}")
+            remaining.remove(name)
+            ordered.append(self.passes[name])
+        return ordered
+
+    def pipeline(self, needed: Iterable[str] = None, disabled: Iterable[str] = ()) -> Pipeline:
+        """Build the pipeline of a selection of passes.
+
+        Args:
+            needed (Iterable[str], optional): Names of the passes to run, e.g. from `needed`. Defaults to all.
+            disabled (Iterable[str], optional): Names of the passes not to run.
+
+        Returns:
+            Pipeline: The ordered, fused stages. Pipelines are cached per selection.
+        """
+        unknown = set(disabled) - set(self.passes)
+        if unknown: raise ValueError(f"Unknown pass: {', '.join(sorted(unknown))}")
+        selected = tuple(name for name in self.passes if (needed is None or name in needed) and name not in disabled)
+        pipeline = self._pipelines.get(selected)
+        if pipeline is None:
+            pipeline = self._pipelines[selected] = Pipeline(self._fuse(self._order(list(selected))))
+        return pipeline
+
+    def _fuse(self, ordered: list[Pass]) -> list[tuple[str, Callable[[str], str]]]:
+        """Merge runs of adjacent regex passes that do not depend on each other into one rule set."""
+        groups = []
+        for pass_ in ordered:
+            last = groups[-1] if groups else None
+            if last and pass_.rules and last[0].rules and not any(other.name in pass_.after for other in last):
+                last.append(pass_)
+            else:
+                groups.append([pass_])
+        stages = []
+        for group in groups:
+            name = '+'.join(pass_.name for pass_ in group)
+            if group[0].function is not None:
+                stages.append((name, group[0].function))
+            else:
+                rules = [rule._replace(name=f'{pass_.name}.{rule.name}') for pass_ in group for rule in pass_.rules]
+                stages.append((name, RuleSet(rules, name=f'pass:{name}').sub))
+        return stages
+
+# The default conversion of a statement: reads of file handles, convert_syntax (operators, print, postfix if,
+# semicolons), remove_sigils, then `$self->{key}` to `self.key`
+PASSES = PassRegistry([
+    Pass('readline', convert_reads, triggers=('<',)),
+    Pass('operators', rules=tuple(_OPERATOR_RULES.rules)),
+    Pass('print', _convert_print, triggers=('print ',), after=('operators',), produces=(';',)),
+    Pass('oneline_if', _convert_oneline_if, triggers=('if',), after=('print',), produces=(';',)),
+    Pass('semicolon', _delete_semicolon, triggers=(';',), after=('oneline_if',)),
+    Pass('remove_sigils', remove_sigils, after=('semicolon', 'readline')),
+    Pass('arrow', rules=(Rule('arrow', r'(\w+)->\{(\w+)\}', r'\1.\2', ('->{',)),), after=('remove_sigils',)),
+])
@@ -0,0 +1,188 @@
+"""
+Streaming POD (Plain Old Documentation) renderer.
+
+Renders the POD blocks of a Perl file into plain text, in the layout of `perldoc`/`pod2text`, one source line at a time.
+This lets the preprocessor build the module docstring in the same pass that strips the POD from the code,
+without running `perldoc` in a subprocess.
+"""
+
+import re
+import textwrap
+
+# Formatting codes, innermost first: `B<text>` and the `C<< text >>` form with multiple brackets
+_FORMAT_CODE = re.compile(r'([A-Z])<<+\s(.*?)\s>>+|([A-Z])<([^<>]*)>')
+_ENTITIES = {'lt': '<', 'gt': '>', 'verbar': '|', 'sol': '/'}
+
+def _entity(name: str) -> str:
+    """Return the character of a POD `E<name>` escape."""
+    if name in _ENTITIES: return _ENTITIES[name]
+    if name.startswith(('0x', '0X')): return chr(int(name, 16))
+    if name.isdigit(): return chr(int(name))
+    import html # named entities are rare, html is only imported when one is found
+    return html.unescape(f'&{name};')
+
+def _format_code(match: re.Match) -> str:
+    code, text = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+    if code == 'I': return f'*{text}*'
+    if code == 'C': return f'"{text}"'
+    if code == 'L': return text.split('|', 1)[0] if '|' in text else text
+    if code == 'E': return _entity(text)
+    if code in 'XZ': return ''
+    return text # B, F, S
+
+def render_formatting(text: str) -> str:
+    """Replace the POD formatting codes of a text by their plain text rendering.
+
+    Args:
+        text (str): POD paragraph text.
+
+    Returns:
+        str: The text without formatting codes.
+    """
+    previous = None
+    while previous != text:
+        previous, text = text, _FORMAT_CODE.sub(_format_code, text)
+    return text
+
+class PodRenderer:
+    """Incremental POD to text renderer.
+
+    Feed every line of a Perl file to `feed`; lines belonging to POD blocks are consumed and rendered,
+    code lines are left to the caller. `render` returns the text rendered so far, `drain` streams it instead.
+
+    Args:
+        width (int, optional): Column at which paragraphs are wrapped. Defaults to 76, like perldoc.
+    """
+    def __init__(self, width: int = 76):
+        self.width = width
+        self.in_pod = False
+        self._output = []       # rendered lines not drained yet
+        self._emitted = False   # some text was rendered, the next block is separated from it
+        self._paragraph = []
+        self._overs = []        # indentation width of each open =over
+        self._item = None       # label of the last =item, waiting for its paragraph
+        self._heading = False   # the last block was a heading, which is not followed by a blank line
+
+    @property
+    def _margin(self) -> int:
+        return 4 + sum(self._overs)
+
+    def feed(self, line: str) -> bool:
+        """Feed one source line.
+
+        Args:
+            line (str): A line of the Perl file.
+
+        Returns:
+            bool: True if the line is part of a POD block and should be stripped from the code.
+        """
+        if not self.in_pod:
+            if not line.startswith('='): return False
+            self.in_pod = True
+        if line.startswith('=cut'):
+            self._flush()
+            self._flush_item()
+            self.in_pod = False
+            return True
+        if line.strip() == '':
+            self._flush()
+        else:
+            self._paragraph.append(line.rstrip('\n'))
+        return True
+
+    def render(self) -> str:
+        """Return the rendered text of all POD fed so far.
+
+        Returns:
+            str: Plain text documentation, empty if the file had no POD.
+        """
+        self._flush()
+        self._flush_item()
+        return '\n'.join(self._output) + '\n\n' if self._output else ''
+
+    def drain(self, final: bool = False) -> list[str]:
+        """Return the lines rendered since the last call and forget them, so long POD is rendered in bounded memory.
+
+        Args:
+            final (bool, optional): Also render the paragraph still being collected, at the end of the file.
+
+        Returns:
+            list[str]: Rendered lines, without newlines; joined with newlines they continue the previous ones.
+        """
+        if final:
+            self._flush()
+            self._flush_item()
+        lines, self._output = self._output, []
+        return lines
+
+    def _emit(self, lines: list[str], heading: bool = False) -> None:
+        if self._emitted and not self._heading: self._output.append('')
+        self._output.extend(lines)
+        self._emitted = True
+        self._heading = heading
+
+    def _flush(self) -> None:
+        """Render the paragraph collected so far."""
+        if not self._paragraph: return
+        paragraph, self._paragraph = self._paragraph, []
+        if paragraph[0].startswith('='):
+            command, _, text = paragraph[0].partition(' ')
+            self._command(command[1:], ' '.join([text.strip()] + [line.strip() for line in paragraph[1:]]).strip())
+        elif paragraph[0][:1].isspace():
+            self._verbatim(paragraph)
+        else:
+            self._ordinary(render_formatting(' '.join(line.strip() for line in paragraph)))
+
+    def _flush_item(self) -> None:
+        """Render an =item label that was not followed by a paragraph."""
+        if self._item is None: return
+        label, self._item = self._item, None
+        self._emit([' ' * (self._margin - (self._overs[-1] if self._overs else 0)) + label])
+
+    def _command(self, command: str, text: str) -> None:
+        if command.startswith('head'):
+            self._flush_item()
+            self._emit([('' if command == 'head1' else '  ') + render_formatting(text)], heading=True)
+        elif command == 'over':
+            self._flush_item()
+            self._overs.append(int(text) if text.isdigit() else 4)
+        elif command == 'item':
+            self._flush_item()
+            self._item = render_formatting(text)
+        elif command == 'back':
+            self._flush_item()
+            if self._overs: self._overs.pop()
+        # =pod, =begin, =end, =for and =encoding produce no text
+
+    def _ordinary(self, text: str) -> None:
+        margin = ' ' * self._margin
+        if self._item is None:
+            self._emit(textwrap.wrap(text, self.width, initial_indent=margin, subsequent_indent=margin))
+            return
+        label, self._item = self._item, None
+        over = self._overs[-1] if self._overs else 0
+        label_margin = ' ' * (self._margin - over)
+        if len(label) < over:
+            # short labels share the first line with the paragraph
+            self._emit(textwrap.wrap(text, self.width, initial_indent=label_margin + label.ljust(over), subsequent_indent=margin))
+        else:
+            self._emit([label_margin + label] + textwrap.wrap(text, self.width, initial_indent=margin, subsequent_indent=margin))
+
+    def _verbatim(self, lines: list[str]) -> None:
+        self._flush_item()
+        self._emit([' ' * self._margin + line.expandtabs() for line in lines])
+
+def extract_pod(input_file_dir: str) -> str:
+    """Render the POD documentation of a Perl file.
+
+    Args:
+        input_file_dir (str): The Perl file.
+
+    Returns:
+        str: Plain text documentation of the file.
+    """
+    renderer = PodRenderer()
+    with open(input_file_dir, 'r') as file:
+        for line in file:
+            renderer.feed(line)
+    return renderer.render()
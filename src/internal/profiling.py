@@ -0,0 +1,165 @@
+"""
+Per-stage timing of the translation pipeline.
+
+A `Profiler` records the wall time and the number of calls of every stage of a translation (preprocessing,
+block conversion, the line rules and their rule functions, file output). Stages are timed by wrapping the
+functions implementing them for the duration of a translation, so nothing is paid when no profiler is used.
+Callbacks registered on the profiler see every timing as it is recorded.
+`LatencyStats` keeps request latencies of long-running processes such as the translation server.
+"""
+
+import json
+import time
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+from .rules import rule_stats, reset_rule_stats
+
+class Profiler:
+    """Wall time and call counts per stage.
+
+    Args:
+        callback (Callable[[str, float], None], optional): Called with the stage name and the seconds spent
+            every time a stage is timed. More callbacks can be added with `add_callback`.
+    """
+    def __init__(self, callback: Callable[[str, float], None] = None):
+        self.stages = {}        # stage name -> [calls, seconds]
+        self.callbacks = [callback] if callback else []
+
+    def add_callback(self, callback: Callable[[str, float], None]) -> None:
+        """Register a function called with (stage, seconds) for every timing recorded."""
+        self.callbacks.append(callback)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record one call of a stage.
+
+        Args:
+            stage (str): Name of the stage.
+            seconds (float): Wall time of the call.
+        """
+        counts = self.stages.setdefault(stage, [0, 0.0])
+        counts[0] += 1
+        counts[1] += seconds
+        for callback in self.callbacks:
+            callback(stage, seconds)
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Time the body of a `with` statement as one call of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def wrap(self, stage: str, function: Callable) -> Callable:
+        """Return a version of a function recording every call as a call of a stage."""
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return timed
+
+    def iterate(self, stage: str, iterable: Iterable) -> Iterator:
+        """Iterate, recording the time spent producing each item as a call of a stage."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record(stage, time.perf_counter() - start)
+                return
+            self.record(stage, time.perf_counter() - start)
+            yield item
+
+    @contextmanager
+    def instrument(self, module, names: Iterable[str], prefix: str = ''):
+        """Time the functions of a module while the body of a `with` statement runs.
+
+        The module attributes are replaced by timed wrappers and restored afterwards,
+        so callers looking the functions up in the module globals are timed too. Not thread-safe.
+
+        Args:
+            module: Module, or object, holding the functions.
+            names (Iterable[str]): Names of the functions to time.
+            prefix (str, optional): Prefix of the stage names, e.g. 'syntax.'.
+        """
+        originals = {name: getattr(module, name) for name in names}
+        for name, function in originals.items():
+            setattr(module, name, self.wrap(prefix + name, function))
+        try:
+            yield self
+        finally:
+            for name, function in originals.items():
+                setattr(module, name, function)
+
+    def report(self) -> dict:
+        """Return the recorded timings.
+
+        Returns:
+            dict: 'stages' maps each stage to its calls, total seconds and mean seconds per call;
+                'rules' holds the hit/skip counters of the keyword-indexed rule sets.
+        """
+        return {
+            'stages': {stage: {'calls': calls, 'seconds': seconds, 'mean': seconds / calls if calls else 0.0}
+                       for stage, (calls, seconds) in sorted(self.stages.items(), key=lambda item: -item[1][1])},
+            'rules': rule_stats(),
+        }
+
+    def reset(self) -> None:
+        """Forget the recorded timings and the rule counters."""
+        self.stages = {}
+        reset_rule_stats()
+
+    def dump_json(self, output_file_dir: str) -> None:
+        """Write the report to a JSON file."""
+        with open(output_file_dir, 'w') as file:
+            json.dump(self.report(), file, indent=1)
+
+    def summary(self) -> str:
+        """Return the stage timings as a table."""
+        rows = [f"{'stage':<40}{'calls':>10}{'seconds':>12}"]
+        for stage, timing in self.report()['stages'].items():
+            rows.append(f"{stage:<40}{timing['calls']:>10}{timing['seconds']:>12.4f}")
+        return '\n'.join(rows)
+
+class LatencyStats:
+    """Thread-safe latency statistics of the requests of a long-running process.
+
+    Args:
+        window (int, optional): Number of recent latencies kept per operation for the percentiles. Defaults to 10000.
+    """
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts = {}       # operation -> number of requests
+        self._latencies = {}    # operation -> recent latencies, in seconds
+
+    def record(self, operation: str, seconds: float) -> None:
+        """Record the latency of one request."""
+        with self._lock:
+            self._counts[operation] = self._counts.get(operation, 0) + 1
+            self._latencies.setdefault(operation, deque(maxlen=self.window)).append(seconds)
+
+    def report(self) -> dict:
+        """Return the number of requests and the mean, median, 95th percentile and maximum latency in ms of each operation."""
+        with self._lock:
+            latencies = {operation: sorted(recent) for operation, recent in self._latencies.items()}
+            counts = dict(self._counts)
+        return {
+            operation: {
+                'count': counts[operation],
+                'mean_ms': 1000 * sum(recent) / len(recent),
+                'p50_ms': 1000 * recent[len(recent) // 2],
+                'p95_ms': 1000 * recent[min(len(recent) - 1, int(len(recent) * 0.95))],
+                'max_ms': 1000 * recent[-1],
+            }
+            for operation, recent in latencies.items()
+        }
@@ -0,0 +1,190 @@
+"""
+Precompiled regexes of translated modules.
+
+Perl match and substitution literals (`$x =~ /pat/i`, `$x !~ m{pat}`, `$x =~ s/a/b/g`) are collected by the pre-pass
+over a file and written at the top of the translated module as `_RE_n = re.compile(...)` constants, so translated
+code does not look its patterns up in the `re` cache on every call; call sites use the methods of the constants.
+Patterns interpolating variables cannot be compiled once, they are left to the conversion rules.
+"""
+
+import re
+from typing import NamedTuple
+
+from .lexer import Token, tokenize, _scan_delimited, _CLOSING
+
+# Perl modifiers kept in the compiled pattern and their Python flags; /g selects the method at the call site
+_FLAGS = {'i': 're.I', 'm': 're.M', 's': 're.S', 'x': 're.X'}
+_CALL_FLAGS = set('go') # /o (compile once) is what the constants do anyway
+# variables interpolated in a pattern or replacement, unless the sigil is escaped
+_INTERPOLATION = re.compile(r'(?<!\\)(?:\\\\)*[$@](?:\{|\w|::)')
+# Perl-only pattern syntax and its Python spelling
+_PATTERN_SYNTAX = [
+    (re.compile(r'\(\?<(?=[A-Za-z_])'), '(?P<'),     # named group (?<name>...)
+    (re.compile(r'\\k<(\w+)>'), r'(?P=\1)'),         # named backreference \k<name>
+    (re.compile(r'(?<!\\)((?:\\\\)*)\\z'), r'\1\\Z'), # end of string
+]
+# capture groups in a replacement, $1, ${1} and $&
+_GROUP = re.compile(r'(?<!\\)((?:\\\\)*)\$(?:(\d+)|\{(\d+)\}|(&))')
+# escaped sigils of a replacement, \$ inserting a literal $
+_ESCAPED_SIGIL = re.compile(r'(?<!\\)((?:\\\\)*)\\([$@])')
+
+class Regex(NamedTuple):
+    """A Perl regex compiled into a module-level constant.
+
+    Args:
+        pattern (str): Python pattern.
+        flags (str): Perl modifiers compiled into the pattern, sorted, e.g. 'ix'.
+    """
+    pattern: str
+    flags: str
+
+def _python_string(text: str) -> str:
+    """Return a Python literal of a pattern or replacement, raw whenever possible."""
+    trailing = len(text) - len(text.rstrip('\\'))
+    if '\n' not in text and trailing % 2 == 0:
+        if '"' not in text: return f'r"{text}"'
+        if "'" not in text: return f"r'{text}'"
+    return repr(text)
+
+def parse_regex(text: str) -> tuple[str, str, str, str]:
+    """Split a match or substitution literal.
+
+    Args:
+        text (str): A regex token, e.g. '/a+/i', 'm{a+}', 's/a/b/g' or 's{a} {b}'.
+
+    Returns:
+        tuple[str, str, str, str]: Operator ('m' or 's'), pattern, replacement (None for matches) and modifiers;
+            None for transliterations, qr// and unterminated literals.
+    """
+    if text[0] == '/': operator, start = 'm', 0
+    elif text[0] in 'ms' and len(text) > 1 and not text[1].isalnum(): operator, start = text[0], 1
+    else: return None
+    opening = text[start]
+    closing = _CLOSING.get(opening, opening)
+    end = _scan_delimited(text, start + 1, opening)
+    if text[end - 1] != closing or end - 1 == start: return None
+    pattern, replacement = text[start + 1:end - 1], None
+    if operator == 's':
+        if opening in _CLOSING:
+            # s{...}{...}: the replacement has its own delimiters, possibly after whitespace
+            start = len(text) - len(text[end:].lstrip())
+            if start == len(text): return None
+            opening = text[start]
+            closing = _CLOSING.get(opening, opening)
+            end = _scan_delimited(text, start + 1, opening)
+            if text[end - 1] != closing or end - 1 == start: return None
+            replacement = text[start + 1:end - 1]
+        else:
+            start = end - 1
+            end = _scan_delimited(text, end, opening)
+            if text[end - 1] != closing or end - 1 == start: return None
+            replacement = text[start + 1:end - 1]
+        replacement = replacement.replace('\\' + closing, closing)
+    return operator, pattern, replacement, text[end:]
+
+def _compiled(text: str) -> tuple[str, Regex, str]:
+    """Return the operator, the constant and the Python replacement of a literal, None if it cannot be hoisted."""
+    parsed = parse_regex(text)
+    if parsed is None: return None
+    operator, pattern, replacement, flags = parsed
+    if any(flag not in _FLAGS and flag not in _CALL_FLAGS for flag in flags): return None # e.g. s///e
+    if _INTERPOLATION.search(pattern): return None
+    if replacement is not None:
+        if re.search(r'\\[lLuUEQ]', replacement): return None # case modification escapes
+        replacement = _GROUP.sub(lambda match: match.group(1) + '\\g<' + (match.group(2) or match.group(3) or '0') + '>', replacement)
+        if _INTERPOLATION.search(replacement): return None
+        replacement = _ESCAPED_SIGIL.sub(r'\1\2', replacement)
+    for syntax, python in _PATTERN_SYNTAX:
+        pattern = syntax.sub(python, pattern)
+    return operator, Regex(pattern, ''.join(sorted(set(flags) & set(_FLAGS)))), replacement
+
+def _list_context(texts: list[str]) -> bool:
+    """Whether an expression following these statement tokens is in list context, assigned to an array or a list."""
+    if not texts or texts[-1] != '=': return False
+    target = texts[1:-1] if texts[0] in ('my', 'our', 'local') else texts[:-1]
+    return bool(target) and (target[0][0] == '@' or target[0] == '(')
+
+def _match_operands(tokens: list) -> list[tuple[int, int, int]]:
+    """Find the `$x =~ regex` and `$x !~ regex` of tokens, as (variable, operator, regex) token indexes.
+
+    Global matches are only found in list context, where they return every match: in scalar context, e.g. the
+    condition of `while ($x =~ /p/g)`, they iterate over the matches with the position of the string, which `findall`
+    does not do, and they are left to the conversion rules.
+    """
+    significant = [i for i, token in enumerate(tokens) if token.kind not in ('space', 'comment')]
+    found = []
+    for position, i in enumerate(significant):
+        if tokens[i].text not in ('=~', '!~') or position == 0 or position + 1 == len(significant): continue
+        variable, regex = significant[position - 1], significant[position + 1]
+        if tokens[variable].kind != 'variable' or tokens[variable].text[0] != '$' or tokens[regex].kind != 'regex': continue
+        parsed = parse_regex(tokens[regex].text)
+        if parsed is not None and parsed[0] == 'm' and 'g' in parsed[3] \
+                and not _list_context([tokens[j].text for j in significant[:position - 1]]): continue
+        found.append((variable, i, regex))
+    return found
+
+class RegexTable:
+    """Match and substitution regexes of a file, each with the name of its module-level constant."""
+    def __init__(self):
+        self.names = {}         # Regex -> name of its constant, in order of first use
+        self._key = None
+
+    @property
+    def key(self) -> str:
+        """Text identifying the constants of this table, e.g. for cache keys."""
+        if self._key is None: self._key = repr(list(self.names.items()))
+        return self._key
+
+    def feed(self, line: str, tokens: list[Token] = None) -> None:
+        """Record the regexes matched against variables in one line of code, given its tokens if they are known."""
+        if '=~' not in line and '!~' not in line: return # no match, skip tokenizing
+        if tokens is None: tokens = tokenize(line)
+        for _, _, regex in _match_operands(tokens):
+            compiled = _compiled(tokens[regex].text)
+            if compiled is not None and compiled[1] not in self.names:
+                self.names[compiled[1]] = f'_RE_{len(self.names) + 1}'
+                self._key = None
+
+    def constants(self) -> list[str]:
+        """Return the lines defining the constants, `import re` first; empty if the file matches no regex."""
+        if not self.names: return []
+        lines = ['import re']
+        for regex, name in self.names.items():
+            flags = ' | '.join(_FLAGS[flag] for flag in regex.flags)
+            lines.append(f'{name} = re.compile({_python_string(regex.pattern)}{", " + flags if flags else ""})')
+        return lines
+
+    def rewrite(self, line: str, tokens: list[Token] = None) -> str:
+        """Replace the matches and substitutions of a statement by calls to the constants.
+
+        `$x =~ /p/` becomes `_RE_n.search($x)`, `$x !~ /p/` `not _RE_n.search($x)`, `@all = $x =~ /p/g` `@all = _RE_n.findall($x)`
+        and a `$x =~ s/p/r/` statement `$x = _RE_n.sub(r"r", $x, count=1)`, without count for /g.
+        Regexes that are not in the table, or substitutions inside a larger expression, are left unchanged.
+
+        Args:
+            line (str): A Perl statement, with its sigils and literals.
+            tokens (list[Token], optional): The tokens of the statement, tokenized if not given.
+
+        Returns:
+            str: The statement calling the constants.
+        """
+        if not self.names or ('=~' not in line and '!~' not in line): return line
+        if tokens is None: tokens = tokenize(line)
+        parts = [token.text for token in tokens]
+        significant = [token for token in tokens if token.kind not in ('space', 'comment')]
+        for variable, operator, regex in _match_operands(tokens):
+            compiled = _compiled(tokens[regex].text)
+            if compiled is None or compiled[1] not in self.names: continue
+            kind, constant, replacement = compiled
+            name, target, flags = self.names[constant], tokens[variable].text, parse_regex(tokens[regex].text)[3]
+            if kind == 's':
+                # only whole statements, the substitution is an assignment in Python
+                if tokens[operator].text != '=~' or len(significant) not in (3, 4) or (len(significant) == 4 and significant[3].text != ';'): continue
+                call = f'{target} = {name}.sub({_python_string(replacement)}, {target}{"" if "g" in flags else ", count=1"})'
+            elif 'g' in flags:
+                call = f'{name}.findall({target})'
+            else:
+                call = f'{name}.search({target})'
+            if tokens[operator].text == '!~': call = f'not {call}'
+            parts[variable:regex + 1] = [call] + [''] * (regex - variable)
+        return ''.join(parts)
@@ -1,5 +1,13 @@
 import re
-import argparse
+
+from .rules import KeywordIndex
+
+# Trigger keywords of each conversion step of remove_sigils; a step is skipped when none of its keywords is in the line.
+_PREFILTER = KeywordIndex('remove_sigils', {
+    '_array_hash_init': ('my', 'our', '{'),
+    '_convert_declarations': ('my ', 'our ', 'sub '),
+    '_convert_shift': ('shift',),
+})
 
 def _append_typing(sigil: str) -> str:
     """return a string of python type hints based on Perl sigils.
@@ -27,29 +35,30 @@ def _convert_shift(line: str) -> str:
     line = re.sub(r'shift', 'args.pop(0)', line)
     return line
     
+# `my $var`, `our $var` and `sub $name` declarations, rewritten in a single scan of the line
+_DECLARATION = re.compile(r'\b(my|our|sub)\s+([$@%&*])(\w+)')
+_GROUP_GLOBAL_DECLARATION = re.compile(r'our\s*\((.*?)\);') # our (var1, var2, ...)
+_SIGIL_VARIABLE = re.compile(r'(\$|\@|\%|\&|\*)(\w+)')
+
+def _declaration(match: re.Match) -> str:
+    """Python equivalent of one declaration matched by _DECLARATION."""
+    keyword, sigil, var_name = match.groups()
+    if keyword == 'sub': return f'def {var_name}(**args): Callable[..., any]' # function declaration
+    type_hint = _append_typing(sigil)
+    if keyword == 'our': return f'{var_name.upper()}: {type_hint}' # global variable declaration
+    return f'{var_name}: {type_hint}' # local variable declaration
+
 def _convert_declarations(line: str) -> str:
     # Handle declarations (e.g., `my $scalar;`) that weren't matched above
     if line.find("my ") == -1 and line.find("our ") == -1 and line.find("sub ") == -1 : return line # if the string does not have "my", does not find "our", and does not find "sub"
-    group_global_declaration_match = re.search(r'our\s*\((.*?)\);', line) # our (var1, var2, ...)
+    group_global_declaration_match = _GROUP_GLOBAL_DECLARATION.search(line)
     if group_global_declaration_match:
         variables = group_global_declaration_match.group(1).strip()
         return f"global {variables}"
     
-    # Handle local variable declaration
-    matches = re.findall(r'(\$|\@|\%|\&|\*)(\w+)', line)
-    if not matches and not "sub " in line: raise SyntaxError(f"Given Perl code does not have sigils upon initilization of variables or subroutine!\nIssue occured at: {line}")
-    for sigil, var_name in matches:
-        type_hint = _append_typing(sigil)
-            
-        # local variable declaration
-        line = re.sub(rf'my\s+{re.escape(sigil)}{var_name}', f'{var_name}: {type_hint}', line, count=1)
-        # global variable declaration
-        line = re.sub(rf'our\s+{re.escape(sigil)}{var_name}', f'{var_name.upper()}: {type_hint}', line, count=1)
-        #function declaration
-        func_name = var_name
-        line = re.sub(rf'sub\s+{re.escape(sigil)}{func_name}', f'def {func_name}(**args): Callable[..., any]', line, count=1)
-        # print(line)
-    return line
+    if not "sub " in line and not _SIGIL_VARIABLE.search(line): raise SyntaxError(f"Given Perl code does not have sigils upon initilization of variables or subroutine!\nIssue occured at: {line}")
+    # one precompiled pattern for every declaration, instead of a pattern compiled per variable name
+    return _DECLARATION.sub(_declaration, line)
 
 def _remove_final_sigils(line: str) -> str:
     """remove the rest of the sigils, not previously matched with any patterns, from a line.
@@ -106,13 +115,15 @@ def remove_sigils(line: str) -> str:
     """
     line = line.strip()
 
-    line = _array_hash_init(line)
-    line = _convert_declarations(line)
-    line = _convert_shift(line)
+    selected = _PREFILTER.candidates(line)
+    if '_array_hash_init' in selected: line = _array_hash_init(line)
+    if '_convert_declarations' in selected: line = _convert_declarations(line)
+    if '_convert_shift' in selected: line = _convert_shift(line)
     
     return _remove_final_sigils(line)
 
 def __main__():
+    import argparse
     parser = argparse.ArgumentParser(description="Remove sigils from Perl variable names in a string.")
     parser.add_argument('-l', '--line', type=str, required=False, default="$value = $hash{'key'};", help='Input line containing Perl code')
     parser.add_argument('-f', '--file', type=str, required=False, help='Input file containing Perl code to process line by line')
@@ -0,0 +1,159 @@
+"""
+Single-pass regex rule engine.
+
+Every conversion rule is a (pattern, replacement) pair that used to be applied with its own `re.sub` call.
+A `RuleSet` compiles all of its rules into one combined alternation and dispatches each match back to the
+rule that produced it, so a line is scanned once no matter how many rules there are.
+
+Rules may also declare trigger keywords. A `KeywordIndex` finds every trigger of a line in one scan and
+selects only the rules that can possibly match, so lines without any trigger skip the rules entirely.
+Hit/skip counters of every index are available through `rule_stats()` for tuning.
+"""
+
+import re
+import weakref
+from typing import NamedTuple
+
+class Rule(NamedTuple):
+    """A single regex substitution rule.
+
+    Args:
+        name (str): Short identifier of the rule, used for debugging and statistics.
+        pattern (str): Regex pattern to match. Numbered backreferences (`\\1`) are allowed.
+        repl (str): Replacement template, in the same syntax as `re.sub`.
+        triggers (tuple[str, ...], optional): Literal strings, one of which occurs in every match of the rule.
+            A rule without triggers is tried on every line.
+    """
+    name: str
+    pattern: str
+    repl: str
+    triggers: tuple[str, ...] = ()
+
+_BACKREF = re.compile(r'(?<!\\)\\(\d{1,2})')
+
+# every KeywordIndex still in use, for rule_stats(); indices of discarded rule sets and pipelines drop out
+_INDICES = weakref.WeakSet()
+
+def _shift_backrefs(text: str, offset: int, template: bool) -> str:
+    """Renumber the numbered backreferences of a rule so they point into the combined pattern."""
+    if template:
+        return _BACKREF.sub(lambda m: f'\\g<{int(m.group(1)) + offset}>', text)
+    return _BACKREF.sub(lambda m: f'(?:\\{int(m.group(1)) + offset})', text)
+
+class KeywordIndex:
+    """Precomputed trigger-keyword index selecting the candidate rules of a line.
+
+    All trigger literals are searched with a single scan of the line. Since the scan reports only the longest
+    trigger starting at each position, every literal also enables the rules triggered by its prefixes.
+
+    Args:
+        name (str): Name of the index, used as the key in `rule_stats()`.
+        triggers (dict[str, tuple[str, ...]]): Trigger literals of each rule name. Rules with no triggers are
+            always candidates.
+    """
+    def __init__(self, name: str, triggers: dict[str, tuple[str, ...]]):
+        self.name = name
+        self.names = list(triggers)
+        self._always = frozenset(rule for rule, literals in triggers.items() if not literals)
+        literals = sorted({literal for group in triggers.values() for literal in group}, key=len, reverse=True)
+        self._pattern = re.compile('(?=(' + '|'.join(map(re.escape, literals)) + '))') if literals else None
+        self._by_literal = {
+            literal: frozenset(rule for rule, group in triggers.items() if any(literal.startswith(t) for t in group))
+            for literal in literals
+        }
+        self.lines = 0
+        self.hits = dict.fromkeys(self.names, 0)
+        _INDICES.add(self)
+
+    def candidates(self, line: str) -> frozenset:
+        """Return the names of the rules that may match the line, and count them as hits.
+
+        Args:
+            line (str): The input line.
+
+        Returns:
+            frozenset: Names of the candidate rules.
+        """
+        self.lines += 1
+        found = set(self._pattern.findall(line)) if self._pattern else ()
+        if not found:
+            selected = self._always
+        else:
+            selected = self._always.union(*(self._by_literal[literal] for literal in found))
+        for rule in selected:
+            self.hits[rule] += 1
+        return selected
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Return the number of lines on which each rule was run (hits) or skipped (skips)."""
+        return {rule: {'hits': hits, 'skips': self.lines - hits} for rule, hits in self.hits.items()}
+
+    def reset_stats(self) -> None:
+        """Reset all hit/skip counters to zero."""
+        self.lines = 0
+        self.hits = dict.fromkeys(self.names, 0)
+
+def rule_stats() -> dict[str, dict[str, dict[str, int]]]:
+    """Return the hit/skip counters of every keyword index in use, keyed by index name."""
+    return {index.name: index.stats() for index in _INDICES}
+
+def reset_rule_stats() -> None:
+    """Reset the hit/skip counters of every keyword index."""
+    for index in _INDICES:
+        index.reset_stats()
+
+class RuleSet:
+    """An ordered collection of rules applied in a single left-to-right scan.
+
+    When several rules could match at the same position, the one listed first wins, just like
+    the chained `re.sub` calls it replaces. Only the rules selected by the keyword index are part of
+    the scan; the combined pattern of each selection is compiled once and cached.
+
+    Args:
+        rules (list[Rule]): The rules, in priority order.
+        name (str, optional): Name of the rule set, used as the key in `rule_stats()`.
+    """
+    def __init__(self, rules: list[Rule], name: str = 'rules'):
+        self.rules = list(rules)
+        self.index = KeywordIndex(name, {rule.name: rule.triggers for rule in self.rules})
+        self._compiled = {}
+
+    def _compile(self, selected: frozenset):
+        """Compile the combined pattern and replacement callback of a selection of rules."""
+        parts = []
+        dispatch = {}
+        offset = 1
+        for index, rule in enumerate(self.rules):
+            if rule.name not in selected: continue
+            group_name = f'_r{index}'
+            inner_groups = re.compile(rule.pattern).groups
+            parts.append(f'(?P<{group_name}>{_shift_backrefs(rule.pattern, offset, template=False)})')
+            if _BACKREF.search(rule.repl):
+                dispatch[group_name] = (True, _shift_backrefs(rule.repl, offset, template=True))
+            else:
+                # constant replacement, expand its escapes once instead of for every match
+                dispatch[group_name] = (False, re.match('', '').expand(rule.repl))
+            offset += inner_groups + 1
+
+        def replace(match: re.Match) -> str:
+            is_template, repl = dispatch[match.lastgroup]
+            return match.expand(repl) if is_template else repl
+
+        return re.compile('|'.join(parts)), replace
+
+    def sub(self, line: str) -> str:
+        """Apply every rule of the set to a line in one pass.
+
+        Args:
+            line (str): The input line.
+
+        Returns:
+            str: The line with all rule substitutions applied.
+        """
+        selected = self.index.candidates(line)
+        if not selected: return line
+        compiled = self._compiled.get(selected)
+        if compiled is None:
+            compiled = self._compiled[selected] = self._compile(selected)
+        pattern, replace = compiled
+        return pattern.sub(replace, line)
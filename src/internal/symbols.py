@@ -0,0 +1,163 @@
+"""
+File-wide symbol table of a Perl file.
+
+A pre-pass over the whole file records every declared variable and subroutine (name, sigil, scope and
+declaration line). References are then rewritten with a single precompiled pattern and a dict lookup per
+variable, so every use of an `our` global gets the same Python name as its declaration, not only the
+declaration line itself. The regexes the file matches are collected in the same pass, see `internal.regexes`,
+and so are the strings it accumulates in loops, see `internal.buffers`, the fields of its objects, see
+`internal.classes`, the standard handles it reads, see `internal.filehandles`, and the counting loops whose counter
+or bound changes in their body, see `internal.loops`.
+"""
+
+import re
+from typing import Iterable, Iterator, NamedTuple
+
+from .lexer import tokenize
+from .regexes import RegexTable
+from .buffers import BufferTable
+from .classes import ClassTable
+from .filehandles import HandleTable
+from .loops import LoopTable
+
+class Symbol(NamedTuple):
+    """A declared Perl variable or subroutine.
+
+    Args:
+        name (str): Name without the sigil.
+        sigil (str): '$', '@', '%', or '&' for subroutines.
+        scope (str): 'our', 'my' or 'sub'.
+        line (int): Line number of the declaration, starting at 1.
+    """
+    name: str
+    sigil: str
+    scope: str
+    line: int
+
+# variable references: $name, @name, %name and $#name (last index of @name)
+_REFERENCE = re.compile(r'(\$#|[$@%])(\w+)')
+
+class SymbolTable:
+    """Declarations of a Perl file, and the Python names of its globals.
+
+    A variable declared with `our` and never with `my` is a global; all its references are renamed to the upper
+    case name its declaration gets. Names declared with both are left alone, since their scope depends on the block.
+    Tables compare equal when they rename the same globals, hoist the same regexes, buffer the same strings and define
+    the same classes, since lines are then converted the same way.
+    """
+    def __init__(self):
+        self.symbols = {}       # name -> list of Symbol, first declaration of each sigil and scope
+        self.regexes = RegexTable()
+        self.buffers = BufferTable()
+        self.classes = ClassTable()
+        self.handles = HandleTable() # only adds imports to the header, not part of the key
+        self.loops = LoopTable()     # only changes loop headers, which are not cached, not part of the key
+        self._renames = None
+        self._key = None
+
+    def declare(self, symbol: Symbol) -> None:
+        """Record a declaration. Only the first declaration of a name with a given sigil and scope is kept,
+        so e.g. the `my $self` of every method takes a single entry."""
+        declarations = self.symbols.setdefault(symbol.name, [])
+        if any(other.sigil == symbol.sigil and other.scope == symbol.scope for other in declarations): return
+        declarations.append(symbol)
+        self._renames, self._key = None, None
+
+    def lookup(self, name: str) -> list[Symbol]:
+        """Return the declarations of a name, empty if it was never declared."""
+        return self.symbols.get(name, [])
+
+    @property
+    def renames(self) -> dict[str, str]:
+        """Python names of the globals whose name changes, keyed by Perl name."""
+        if self._renames is None:
+            self._renames = {}
+            for name, symbols in self.symbols.items():
+                scopes = {symbol.scope for symbol in symbols}
+                if 'our' in scopes and 'my' not in scopes and name != name.upper():
+                    self._renames[name] = name.upper()
+        return self._renames
+
+    @property
+    def key(self) -> str:
+        """Text identifying the renames, regex constants, buffers and classes of this table, e.g. for cache keys."""
+        if self._key is None: self._key = repr(sorted(self.renames.items()))
+        return self._key + self.regexes.key + self.buffers.key + self.classes.key
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SymbolTable) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def feed(self, line: str, number: int) -> None:
+        """Record the declarations of one line of code.
+
+        Args:
+            line (str): A line of Perl code.
+            number (int): Its line number.
+        """
+        # the tokens of a declaration are shared with the tables, which tokenize the other lines they need
+        tokens = tokenize(line) if 'my' in line or 'our' in line or 'sub' in line else None
+        self.regexes.feed(line, tokens)
+        self.buffers.feed(line, tokens)
+        self.classes.feed(line, tokens)
+        self.handles.feed(line)
+        self.loops.feed(line, tokens)
+        if tokens is None: return # no declaration
+        tokens = [token for token in tokens if token.kind not in ('space', 'comment')]
+        for i, (kind, text) in enumerate(tokens):
+            if kind != 'word' or i + 1 == len(tokens): continue
+            following = tokens[i + 1]
+            if text == 'sub' and following.kind == 'word':
+                self.declare(Symbol(following.text, '&', 'sub', number))
+            elif text in ('my', 'our'):
+                # my $x, or a list my ($x, @y)
+                variables = [following] if following.text != '(' else \
+                    [token for token in tokens[i + 2:next((j for j in range(i + 2, len(tokens)) if tokens[j].text == ')'), len(tokens))]]
+                for token in variables:
+                    if token.kind == 'variable' and token.text[0] in '$@%' and token.text[1:].isidentifier():
+                        self.declare(Symbol(token.text[1:], token.text[0], text, number))
+
+    def scan(self, lines: Iterable[str]) -> Iterator[str]:
+        """Record the declarations of the code lines of a file, skipping its POD.
+
+        Args:
+            lines (Iterable[str]): Lines of a Perl file.
+
+        Yields:
+            str: The lines, unchanged, so the scan can be shared with another pre-pass over the file.
+        """
+        in_pod = False
+        for number, line in enumerate(lines, 1):
+            if line.startswith('='):
+                in_pod = not line.startswith('=cut')
+            elif not in_pod:
+                self.feed(line, number)
+            yield line
+
+    def rewrite(self, line: str) -> str:
+        """Rename the references of a line to the globals of the file.
+
+        Args:
+            line (str): A line of Perl code, with its sigils.
+
+        Returns:
+            str: The line with every global renamed, sigils kept.
+        """
+        renames = self.renames
+        if not renames: return line
+        return _REFERENCE.sub(lambda match: match.group(1) + renames.get(match.group(2), match.group(2)), line)
+
+def build_symbol_table(lines: Iterable[str]) -> SymbolTable:
+    """Build the symbol table of a Perl file.
+
+    Args:
+        lines (Iterable[str]): Lines of the file.
+
+    Returns:
+        SymbolTable: Its declarations.
+    """
+    table = SymbolTable()
+    for _ in table.scan(lines): pass
+    return table
@@ -1,53 +1,58 @@
 import re
-import argparse
 
-def _convert_operators(line: str) -> str:
-    """Convert Perl operators to Python equivalents."""
+from .rules import Rule, RuleSet
+
+# Perl operators and builtins with their Python equivalents, in priority order,
+# each with the literal trigger that has to occur in the line for the rule to apply.
+# Rules that are delimited by spaces use lookarounds so that neighbouring operators
+# sharing a space (e.g. `$a x 3 . $b`) are still all converted in a single scan.
+_OPERATOR_RULES = RuleSet([
     # Convert Perl's ' eq ', ' ne ', ' lt ', ' gt ', ' le ', ' ge ' to Python's ' == ', ' != ', ' < ', ' > ', ' <= ', ' >= '
-    line = re.sub(r' \beq\b ', ' == ', line)
-    line = re.sub(r' \bne\b ', ' != ', line)
-    line = re.sub(r' \blt\b ', ' < ', line)
-    line = re.sub(r' \bgt\b ', ' > ', line)
-    line = re.sub(r' \ble\b ', ' <= ', line)
-    line = re.sub(r' \bge\b ', ' >= ', line)
+    Rule('eq', r'(?<= )eq(?= )', '==', (' eq ',)),
+    Rule('ne', r'(?<= )ne(?= )', '!=', (' ne ',)),
+    Rule('lt', r'(?<= )lt(?= )', '<', (' lt ',)),
+    Rule('gt', r'(?<= )gt(?= )', '>', (' gt ',)),
+    Rule('le', r'(?<= )le(?= )', '<=', (' le ',)),
+    Rule('ge', r'(?<= )ge(?= )', '>=', (' ge ',)),
 
     # Convert Perl's ' =~ ', ' !~ ' to Python's ' re.match(), ' re.search()'
-    line = re.sub(r'(\$\w+)\s*=~\s*/(.+?)/', r'\1 = re.match(r"\2", \1)', line)
-    line = re.sub(r'(\$\w+)\s*!~\s*/(.+?)/', r'\1 = re.search(r"\2", \1)', line)
+    Rule('match', r'(\$\w+)\s*=~\s*/(.+?)/', r'\1 = re.match(r"\2", \1)', ('=~',)),
+    Rule('not_match', r'(\$\w+)\s*!~\s*/(.+?)/', r'\1 = re.search(r"\2", \1)', ('!~',)),
 
     # Convert Perl's ' x ', ' . ' to Python's ' * ', ' + '
-    line = re.sub(r' x ', ' * ', line)
-    line = re.sub(r' \. ', ' + ', line)
+    Rule('repeat', r'(?<= )x(?= )', '*', (' x ',)),
+    Rule('concat', r'(?<= )\.(?= )', '+', (' . ',)),
     # Convert Perl's ' && ', ' || ', ' ! ', to Python's ' and ', ' or ', ' not '
-    line = re.sub(r' && ', 'and', line)
-    line = re.sub(r' \|\| ', 'or', line)
-    line = re.sub(r' ! ', ' not ', line)
+    Rule('and', r' && ', 'and', (' && ',)),
+    Rule('or', r' \|\| ', 'or', (' || ',)),
+    Rule('not', r'(?<= )!(?= )', 'not', (' ! ',)),
     # Convert Perl's ' ||= ', ' &&= ', ' .= ' to Python's ' |= ', ' &= ', ' += '
-    line = re.sub(r' \|\|= ', ' |= ', line)
-    line = re.sub(r' &&= ', ' &= ', line)
-    line = re.sub(r' \.\+= ', ' += ', line)
+    Rule('or_assign', r'(?<= )\|\|=(?= )', '|=', (' ||= ',)),
+    Rule('and_assign', r'(?<= )&&=(?= )', '&=', (' &&= ',)),
+    Rule('concat_assign', r'(?<= )\.\+=(?= )', '+=', (' .+= ',)),
 
     # Convert Perl's 'last', 'next', 'redo' to Python's 'break', 'continue', 'pass'
-    line = re.sub(r'\blast\b', 'break', line)
-    line = re.sub(r'\bnext\b', 'continue', line)
-    line = re.sub(r'\bredo\b', 'pass', line)
+    Rule('last', r'\blast\b', 'break', ('last',)),
+    Rule('next', r'\bnext\b', 'continue', ('next',)),
+    Rule('redo', r'\bredo\b', 'pass', ('redo',)),
 
     # Convert Perl's 'open' to Python's 'open'
-    line = re.sub(r'\bopen\s*\(\s*([\'"])(.*?)\1\s*,\s*([\'"])(.*?)([\'"])\s*\)', r'open(\2, \3\4")', line)
+    Rule('open', r'\bopen\s*\(\s*([\'"])(.*?)\1\s*,\s*([\'"])(.*?)([\'"])\s*\)', r'open(\2, \3\4")', ('open',)),
     # Convert Perl's 'close' to Python's 'close'
-    line = re.sub(r'\bclose\s*\(\s*([\'"])(.*?)\1\s*\)', r'\2.close()', line)
+    Rule('close', r'\bclose\s*\(\s*([\'"])(.*?)\1\s*\)', r'\2.close()', ('close',)),
 
     # Convert Perl's 'die' to Python's 'raise Exception'
-    line = re.sub(r'\bdie\s*"\s*(.*?)\s*"\s*;', r'raise Exception("\1")', line)
-    line = re.sub(r'\bdie\s*"\s*(.*?)\s*"', r'raise Exception("\1")', line)
+    Rule('die', r'\bdie\s*"\s*(.*?)\s*"(?:\s*;)?', r'raise Exception("\1")', ('die',)),
     # Convert Perl's 'warn' to Python's 'warnings.warn'
-    line = re.sub(r'\bwarn\s*"\s*(.*?)\s*"\s*;', r'warnings.warn("\1")', line)
-    line = re.sub(r'\bwarn\s*"\s*(.*?)\s*"', r'warnings.warn("\1")', line)
+    Rule('warn', r'\bwarn\s*"\s*(.*?)\s*"(?:\s*;)?', r'warnings.warn("\1")', ('warn',)),
 
     #Convert Perl's 'system' to Python's 'os.system'
-    line = re.sub(r'\bsystem\s*\(\s*([\'"])(.*?)\1\s*\)', r'os.system("\2")', line)
-    
-    return line
+    Rule('system', r'\bsystem\s*\(\s*([\'"])(.*?)\1\s*\)', r'os.system("\2")', ('system',)),
+], name='operators')
+
+def _convert_operators(line: str) -> str:
+    """Convert Perl operators to Python equivalents in a single scan of the line."""
+    return _OPERATOR_RULES.sub(line)
 
 def _convert_print(line: str) -> str:
     """Convert Perl's print statements to Python's print function."""
@@ -92,6 +97,7 @@ def convert_syntax(line: str) -> str:
     return line
 
 def __main__():
+    import argparse
     parser = argparse.ArgumentParser(description="convert Perl syntax to Python syntax")
     parser.add_argument('-l', '--line', type=str, required=False, help='Input line to convert')
     parser.add_argument('-f', '--file', type=str, required=False, help='Input file to convert')
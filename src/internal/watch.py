@@ -0,0 +1,70 @@
+"""
+Polling file watcher.
+
+Polls a set of files with `os.stat` and reports the files whose content changed since the last poll.
+Size and modification time are checked first, the content is only hashed when they differ, so saving a file
+without changing it, or touching it, does not report it. Only the standard library is used.
+"""
+
+import os
+import time
+from typing import Callable, Iterator
+
+from .manifest import file_hash
+
+class Watcher:
+    """Watch files for content changes.
+
+    Args:
+        collect (Callable[[], list[str]]): Returns the files to watch; called on every poll, so new files are picked up.
+        interval (float, optional): Seconds between two polls. Defaults to 0.2.
+    """
+    def __init__(self, collect: Callable[[], list[str]], interval: float = 0.2):
+        self.collect = collect
+        self.interval = interval
+        self._stats = {}        # file -> (size, mtime) at the last poll
+        self._hashes = {}       # file -> content hash at the last poll
+
+    def poll(self) -> list[str]:
+        """Check the watched files once.
+
+        Returns:
+            list[str]: Files that are new or whose content changed since the last poll, in the order of `collect`.
+                Every file is new on the first poll.
+        """
+        changed = []
+        current = set()
+        for path in self.collect():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue # deleted between collect and stat
+            current.add(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._stats.get(path) == signature: continue
+            self._stats[path] = signature
+            digest = file_hash(path)
+            if self._hashes.get(path) == digest: continue
+            self._hashes[path] = digest
+            changed.append(path)
+        # forget deleted files, so they are reported again if they come back
+        for path in set(self._stats) - current:
+            del self._stats[path]
+            self._hashes.pop(path, None)
+        return changed
+
+    def changes(self, max_polls: int = None) -> Iterator[list[str]]:
+        """Poll forever, or max_polls times, yielding the changed files of every poll that found some.
+
+        Args:
+            max_polls (int, optional): Number of polls before stopping. Defaults to polling until interrupted.
+
+        Yields:
+            list[str]: The files changed since the previous poll.
+        """
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            if polls: time.sleep(self.interval)
+            polls += 1
+            changed = self.poll()
+            if changed: yield changed
@@ -10,87 +10,739 @@ Larry Wall, for the first postmodern computer language.
 Guido van Rossum, for an excellent programming language.
 """
 
+import os
 import re
+import sys
+import glob
+import time
+import functools
+import itertools
+from collections import deque
 
-from internal.write_to_file import write_to_file
-from internal.write_pydoc import write_pydoc
-from internal.syntax import convert_syntax
-from internal.remove_sigils import remove_sigils
-from preprocess import preprocess
+from internal.lexer import mask_literals, unmask_literals
+from internal.blocks import BlockConverter
+from internal.profiling import Profiler
+from internal.passes import PASSES, Pipeline
+from internal.symbols import SymbolTable
+import internal.remove_sigils as sigils
+from preprocess import read_lines, iter_preprocess, iter_code
 
-def process_each_line(line:str) -> str:
+def process_each_line(line:str, pipeline:Pipeline = None, symbols:SymbolTable = None, tokens:list = None) -> str:
     """
     The periodic looping logic for each line of Perl code to convert. 
     This function processes a single line of Perl code, converting it to Python syntax.
 
     Args:
         line (str): Perl code line to process.
+        pipeline (Pipeline, optional): Conversion passes to apply, see `internal.passes`. Defaults to every registered pass.
+        symbols (SymbolTable, optional): Symbol table of the file, used to rename its globals consistently.
+        tokens (list, optional): Tokens of the line, when the block converter has them, so it is not tokenized again.
 
     Returns:
         str: Converted Python code line.
     """
-    line = convert_syntax(line)
-    line = remove_sigils(line)
-    line = re.sub(r'(\w+)->\{(\w+)\}', r'\1.\2', line)
-    return line
+    # tokenize once and hide string/regex literals and comments from the conversion rules
+    if symbols is None:
+        line, literals = mask_literals(line, tokens=tokens)
+    else:
+        # matches of the regexes hoisted into module constants, and strings accumulated in list buffers,
+        # are rewritten before their literals are masked; a rewritten line is tokenized again
+        for rewrite in (symbols.regexes.rewrite, symbols.buffers.rewrite):
+            rewritten = rewrite(line, tokens)
+            if rewritten != line: line, tokens = rewritten, None
+        line, literals = mask_literals(line, symbols.renames, tokens)
+        line = symbols.rewrite(line)
+    line = (pipeline if pipeline is not None else PASSES.pipeline())(line)
+    return unmask_literals(line, literals)
 
-def pl2py(input_file_dir:str, 
-          output_file_dir:str = None, 
-          pydoc_dir:str = "", 
-          verbose:bool = False,
-          shebang:str = '#!/usr/bin/python3',
-          author:str = "Zerui Ma",
-          credits:str = "\n"
-          ) -> None:
+# options of pl2py that change the translated output
+OUTPUT_OPTIONS = ('shebang', 'author', 'credits', 'disabled_passes')
 
-    output_file_dir = output_file_dir if output_file_dir else re.sub(r'\.[^.]*$', '.py', input_file_dir)
-    
+@functools.lru_cache(maxsize=None)
+def rules_version() -> str:
+    """
+    Hash of the modules implementing the conversion rules, identifying the rule set of this process.
+    Every module under internal/ is hashed, with this file and preprocess.py, so a new module needs no registration.
+
+    Returns:
+        str: Hex digest of the rule set.
+    """
+    from internal.manifest import rule_set_hash
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    source_files = [__file__, os.path.join(src_dir, 'preprocess.py')] + glob.glob(os.path.join(src_dir, 'internal', '*.py'))
+    return rule_set_hash(source_files)
+
+@functools.lru_cache(maxsize=None)
+def _translator_hash(output_options:tuple, passes:str) -> str:
+    import hashlib
+    return hashlib.sha256((rules_version() + passes + repr(output_options)).encode('utf-8')).hexdigest()
+
+def translator_hash(**options) -> str:
+    """
+    Hash of the conversion rule set and registered passes together with the options that change the translated output.
+
+    Args:
+        **options: Keyword arguments of pl2py; missing output options take their default value.
+
+    Returns:
+        str: Hex digest, recorded in the manifest to invalidate outputs when the rules change.
+    """
+    import inspect
+    parameters = inspect.signature(pl2py).parameters
+    return _translator_hash(tuple(tuple(value) if isinstance(value, list) else value
+                                  for value in (options.get(name, parameters[name].default) for name in OUTPUT_OPTIONS)), PASSES.signature())
+
+# bounded LRU cache in front of process_each_line, disabled until set_line_cache is called
+_cached_process_line = None
+# (hits, misses, maxsize, currsize) of the line caches of the worker processes of the pools of this process,
+# by pool number and process id, as of the last job each of them ran
+_worker_caches = {}
+
+def _process_line_for_rules(line:str, rules:str, pipeline:Pipeline, symbols:SymbolTable) -> str:
+    """process_each_line keyed on the rule set, pipeline and renamed globals as well, so cached lines never outlive the rules that produced them."""
+    return process_each_line(line, pipeline, symbols)
+
+def set_line_cache(maxsize:int) -> None:
+    """
+    Enable a bounded LRU cache of converted lines, shared by every file translated in this process.
+    Perl code is repetitive, so identical stripped lines are converted only once.
+    Each worker process of a batch or of a file converted in chunks has a cache of its own, of the same size.
+    The statistics of the caches start over.
+
+    Args:
+        maxsize (int): Maximum number of cached lines; 0 disables the cache.
+    """
+    global _cached_process_line
+    _cached_process_line = functools.lru_cache(maxsize=maxsize)(_process_line_for_rules) if maxsize > 0 else None
+    _worker_caches.clear()
+
+def _line_cache_counts() -> tuple:
+    """(hits, misses, maxsize, currsize) of the line cache of this process, None if the cache is disabled."""
+    return tuple(_cached_process_line.cache_info()) if _cached_process_line is not None else None
+
+def line_cache_info() -> dict:
+    """
+    Statistics of the line caches of this process and of the worker processes it translated with, summed.
+
+    Returns:
+        dict: hits, misses, maxsize, currsize and hit_rate of the caches, None if no cache is enabled.
+    """
+    caches = list(_worker_caches.values())
+    if _cached_process_line is not None: caches.append(_line_cache_counts())
+    if not caches: return None
+    hits, misses, maxsize, currsize = (sum(column) for column in zip(*caches))
+    lookups = hits + misses
+    return {'hits': hits, 'misses': misses, 'maxsize': maxsize, 'currsize': currsize,
+            'hit_rate': hits / lookups if lookups else 0.0}
+
+def _tee_to_file(lines, output_file_dir:str):
+    """Yield lines unchanged while also writing them to a file."""
+    with open(output_file_dir, 'w') as outfile:
+        for line in lines:
+            outfile.write(line)
+            yield line
+
+def _scan_lines(lines, disabled_passes:tuple) -> tuple[Pipeline, SymbolTable]:
+    """Pre-pass over the lines of a file, building the pipeline of the passes they need and their symbol table."""
+    symbols = SymbolTable()
+    lines = symbols.scan(lines)
+    needed = PASSES.needed(lines)
+    for _ in lines: pass # every pass may be needed before the end of the file, the symbol table needs every line
+    return PASSES.pipeline(needed, disabled_passes), symbols
+
+def _scan_file(input_file_dir:str, disabled_passes:tuple, use_mmap:bool = False) -> tuple[Pipeline, SymbolTable]:
+    """Pre-pass over a file, building the pipeline of the passes its lines need and its symbol table in one read."""
+    return _scan_lines(read_lines(input_file_dir, use_mmap), disabled_passes)
+
+# lines of code in each chunk of a file translated by several processes
+CHUNK_LINES = 5000
+
+def _statement_chunks(lines, chunk_lines:int):
+    """
+    Split code lines into chunks of about chunk_lines lines, each cut before an unindented line following the end of a statement or block.
+    The scan only looks at the first and last characters of the lines, so a cut may still fall inside a block or a statement,
+    e.g. in a heredoc; the chunks are checked when they are converted, see `_convert_chunks`.
+    """
+    chunk, previous = [], ''
+    for line in lines:
+        if len(chunk) >= chunk_lines and line[:1] not in ' \t\n})]#' and previous.endswith((';', '}')):
+            yield chunk
+            chunk = []
+        chunk.append(line)
+        if line.strip(): previous = line.rstrip()
+    if chunk: yield chunk
+
+def _in_packages(convert_statement, symbols:SymbolTable):
+    """
+    Wrap a statement conversion to follow the packages of a file, translating blessed packages into classes and
+    rewriting their statements for them, see `internal.classes`. Statements are rewritten before the line cache,
+    since the same statement converts differently in different packages.
+    """
+    classes = symbols.classes
+    if not classes.names: return convert_statement
+    def convert(statement:str, tokens:list = None) -> str:
+        definition = classes.definition(statement)
+        if definition is not None: return definition
+        rewritten = classes.rewrite(statement, tokens)
+        return convert_statement(statement, tokens) if rewritten == statement else convert_statement(rewritten)
+    return convert
+
+def _statement_converter(disabled_passes:tuple, symbols:SymbolTable):
+    """Statement conversion with every pass, through the line cache when it is enabled."""
+    pipeline = PASSES.pipeline(disabled=disabled_passes)
+    if _cached_process_line is not None: return _in_packages(lambda statement, tokens = None: _cached_process_line(statement, rules_version(), pipeline, symbols), symbols)
+    return _in_packages(lambda statement, tokens = None: process_each_line(statement, pipeline, symbols, tokens), symbols)
+
+def _convert_chunk(job:tuple) -> tuple[list[str], bool]:
+    """
+    Convert a chunk of code lines with a new block converter, in a worker process.
+
+    Args:
+        job (tuple): (code lines, disabled passes, symbol table of the file, package the chunk starts in).
+
+    Returns:
+        tuple[list[str], bool]: The Python lines and whether the chunk ended at the top level, outside any block or statement.
+    """
+    lines, disabled_passes, symbols, package = job
+    symbols.classes.package = package
+    converter = BlockConverter(_statement_converter(disabled_passes, symbols), varying_loops=symbols.loops.varying, statement_tokens=True)
+    return [converted for line in lines for converted in converter.feed(line)], converter.at_top_level
+
+def _convert_chunks(lines, write, workers:int, disabled_passes:tuple, symbols:SymbolTable) -> None:
+    """
+    Convert code lines in statement-aligned chunks on a process pool, writing the Python lines in order.
+
+    Each chunk is converted by a new block converter, which converts it like the sequential conversion when the previous
+    chunk ended at the top level. When a cut fell inside a block or statement, the lines of the chunk are replayed into a
+    converter of this process, which converts the following chunks itself until one ends at the top level again.
+    """
+    line_cache = _cached_process_line.cache_info().maxsize if _cached_process_line is not None else 0
+    carry = None # converter continuing across chunks that did not end at the top level
+    def jobs():
+        package = None
+        for chunk in _statement_chunks(lines, CHUNK_LINES):
+            yield chunk, disabled_passes, symbols, package
+            package = symbols.classes.package_after(chunk, package)
+    with _Pool(workers, line_cache) as pool:
+        for (chunk, _, _, package), (output, at_top_level) in pool.imap(_convert_chunk, jobs()):
+            if carry is None:
+                for converted in output:
+                    write(converted + '\n')
+                if at_top_level: continue
+                symbols.classes.package = package
+                carry = BlockConverter(_statement_converter(disabled_passes, symbols), varying_loops=symbols.loops.varying, statement_tokens=True)
+                for line in chunk:
+                    for _ in carry.feed(line): pass # already written from the output of the worker
+                continue
+            for line in chunk:
+                for converted in carry.feed(line):
+                    write(converted + '\n')
+            if carry.at_top_level: carry = None
+    if carry is not None:
+        for converted in carry.close():
+            write(converted + '\n')
+
+def _convert_file(input_file_dir:str, output_file_dir:str, verbose:bool, shebang:str, keep_preprocessed:bool, disabled_passes:tuple = (), profiler:Profiler = None, use_mmap:bool = False, workers:int = 1) -> None:
+    """Preprocess and convert a Perl file, timing the preprocessing, block conversion and output stages when profiled."""
     if verbose: print(f"Preprocessing file: {input_file_dir}")
-    preprocessed_file_dir = re.sub(r'\.[^.]*$', '.pl2py', output_file_dir)
-    preprocess(input_file_dir, preprocessed_file_dir, shebang = shebang)
-    if verbose: print(f"File preprocessed. pl2py file created: {preprocessed_file_dir}")
+    # preprocessed lines are streamed straight into the conversion loop,
+    # the intermediate .pl2py file is only written when asked for
+    lines = iter_preprocess(input_file_dir, shebang = shebang, use_mmap = use_mmap)
+    if keep_preprocessed:
+        preprocessed_file_dir = re.sub(r'\.[^.]*$', '.pl2py', output_file_dir)
+        lines = _tee_to_file(lines, preprocessed_file_dir)
+        if verbose: print(f"pl2py file will be written to: {preprocessed_file_dir}")
+    if profiler is not None: lines = profiler.iterate('preprocess', lines)
 
     # Flags for tracking if file has reached the pydoc section
     doc_content = True
-    # Open the preprocessed file and convert each line
-    with open(preprocessed_file_dir, 'r') as infile, \
-        open(output_file_dir, 'w') as outfile:
-        if verbose: print(f"Converting file: {preprocessed_file_dir} to {output_file_dir}")
-        for line in infile:
+    if profiler is None:
+        pipeline, symbols = _scan_file(input_file_dir, disabled_passes, use_mmap)
+    else:
+        with profiler.stage('scan'):
+            pipeline, symbols = _scan_file(input_file_dir, disabled_passes, use_mmap)
+    if verbose: print(f"Passes: {', '.join(pipeline.names)}\nRenamed globals: {symbols.renames}")
+    if _cached_process_line is not None:
+        # cached lines are converted by the full pipeline, shared by every file, passes a file does not need leave its lines unchanged
+        pipeline = PASSES.pipeline(disabled=disabled_passes)
+        if profiler is not None: pipeline = pipeline.timed(profiler)
+        convert_statement = lambda statement, tokens = None: _cached_process_line(statement, rules_version(), pipeline, symbols)
+    else:
+        if profiler is not None: pipeline = pipeline.timed(profiler)
+        convert_statement = lambda statement, tokens = None: process_each_line(statement, pipeline, symbols, tokens)
+    converter = BlockConverter(_in_packages(convert_statement, symbols), varying_loops=symbols.loops.varying, statement_tokens=True)
+    feed, close = converter.feed, converter.close
+    if profiler is not None:
+        # block conversion time includes the line rules it calls
+        feed = lambda line: profiler.iterate('blocks', converter.feed(line))
+        close = lambda: profiler.iterate('blocks', converter.close())
+    # Convert each preprocessed line, statements are emitted indented once complete
+    with open(output_file_dir, 'w') as outfile:
+        write = outfile.write if profiler is None else profiler.wrap('write', outfile.write)
+        if verbose: print(f"Converting file: {input_file_dir} to {output_file_dir}")
+        for line in lines:
             # Copy the pydocs at the beginning of the file
             # write all lines before line with '=====Start Converting Now====='
             if doc_content:
-                if ('=====Start Converting Now=====' in line): doc_content = False; continue
-                outfile.write(line)
-                continue
-            
-            line = line.strip()
-            if verbose: print(f'Processing line: {line}')
-            if line == '' or line.startswith('#'): # Skip empty lines and comments
-                outfile.write(line+'\n')
+                if ('=====Start Converting Now=====' in line):
+                    doc_content = False
+                    for constant in symbols.handles.imports() + symbols.regexes.constants():
+                        write(constant + '\n')
+                    continue
+                write(line)
                 continue
+            if workers > 1 and profiler is None:
+                # the code lines left are converted in chunks by several processes
+                _convert_chunks(itertools.chain((line,), lines), write, workers, disabled_passes, symbols)
+                return
+
+            if verbose: print(f'Processing line: {line.strip()}')
+            for converted in feed(line):
+                write(converted + '\n')
+        for converted in close():
+            write(converted + '\n')
+
+def pl2py_line(line:str, disabled_passes:tuple = ()) -> str:
+    """
+    Translate one Perl statement with the conversion passes, through the line cache when it is enabled.
+
+    Args:
+        line (str): Perl statement.
+        disabled_passes (tuple, optional): Names of the conversion passes not to run.
+
+    Returns:
+        str: The Python statement.
+    """
+    pipeline = PASSES.pipeline(disabled=disabled_passes)
+    if _cached_process_line is not None: return _cached_process_line(line, rules_version(), pipeline, None)
+    return process_each_line(line, pipeline)
+
+def pl2py_snippet(code:str, disabled_passes:tuple = ()) -> str:
+    """
+    Translate a piece of Perl code, e.g. a few lines pasted in an editor, without the header of a translated file.
+
+    Args:
+        code (str): Perl code.
+        disabled_passes (tuple, optional): Names of the conversion passes not to run.
+
+    Returns:
+        str: The Python code.
+    """
+    lines = code.splitlines(keepends=True)
+    pipeline, symbols = _scan_lines(lines, disabled_passes)
+    if _cached_process_line is not None:
+        pipeline = PASSES.pipeline(disabled=disabled_passes)
+        convert_statement = lambda statement, tokens = None: _cached_process_line(statement, rules_version(), pipeline, symbols)
+    else:
+        convert_statement = lambda statement, tokens = None: process_each_line(statement, pipeline, symbols, tokens)
+    converter = BlockConverter(_in_packages(convert_statement, symbols), varying_loops=symbols.loops.varying, statement_tokens=True)
+    converted = [python for line in iter_code(lines) for python in converter.feed(line)]
+    converted += converter.close()
+    return '\n'.join(symbols.handles.imports() + symbols.regexes.constants() + converted)
+
+def pl2py(input_file_dir:str, 
+          output_file_dir:str = None, 
+          pydoc_dir:str = "", 
+          verbose:bool = False,
+          shebang:str = '#!/usr/bin/python3',
+          author:str = "Zerui Ma",
+          credits:str = "\n",
+          keep_preprocessed:bool = False,
+          manifest_dir:str = None,
+          profile:str = None,
+          profiler:Profiler = None,
+          disabled_passes:tuple = (),
+          use_mmap:bool = False,
+          workers:int = 1
+          ) -> None:
+    """
+    Translate a Perl file into Python.
+
+    Args:
+        input_file_dir (str): Perl file to translate.
+        output_file_dir (str, optional): Python file to write. Defaults to the input file name with the .py extension.
+        pydoc_dir (str, optional): Directory for the generated pydoc.
+        verbose (bool, optional): Print the progress of the translation.
+        shebang (str, optional): Shebang replacing the Perl one.
+        author (str, optional): Author written in the metadata.
+        credits (str, optional): Credits written in the metadata.
+        keep_preprocessed (bool, optional): Also write the intermediate .pl2py file.
+        manifest_dir (str, optional): Manifest file; the translation is skipped when the output is up to date in it.
+        profile (str, optional): 'json' writes the wall time and call counts of every stage to <output>.profile.json,
+            'pstats' writes cProfile stats to <output>.pstats. Defaults to no profiling.
+        profiler (Profiler, optional): Profiler receiving the stage timings, e.g. with callbacks registered on it.
+        disabled_passes (tuple, optional): Names of the conversion passes not to run, see `internal.passes`.
+        use_mmap (bool, optional): Read the input through a memory map. Memory stays bounded either way, the file is streamed.
+        workers (int, optional): Number of processes converting the file in chunks cut at statement boundaries, for huge files.
+            The output is the same as the conversion in this process, the default. Not used when profiling per stage.
+    """
+
+    output_file_dir = output_file_dir if output_file_dir else re.sub(r'\.[^.]*$', '.py', input_file_dir)
 
-            # Process the line and write to the output file
-            outfile.write(process_each_line(line) + '\n')
+    # skip files whose source, translator version and rule set did not change since the last run
+    if manifest_dir:
+        from internal.manifest import Manifest
+        manifest = Manifest(manifest_dir)
+        rules_hash = translator_hash(shebang=shebang, author=author, credits=credits, disabled_passes=disabled_passes)
+        if manifest.is_up_to_date(input_file_dir, output_file_dir, __version__, rules_hash):
+            if verbose: print(f"{output_file_dir} is up to date, skipping {input_file_dir}")
+            return
     
+    if profile == 'pstats':
+        import cProfile
+        cprofile = cProfile.Profile()
+        cprofile.runcall(_convert_file, input_file_dir, output_file_dir, verbose, shebang, keep_preprocessed, disabled_passes, profiler, use_mmap, workers)
+        cprofile.dump_stats(output_file_dir + '.pstats')
+        if verbose: print(f"cProfile stats written to: {output_file_dir}.pstats")
+    elif profile == 'json' or profiler is not None:
+        if profiler is None:
+            profiler = Profiler()
+            profiler.reset()
+        # the passes are timed by the pipeline, the functions looked up in the module globals on every call are wrapped here
+        with profiler.instrument(sys.modules[__name__], ('process_each_line', 'mask_literals', 'unmask_literals')), \
+             profiler.instrument(sigils, ('_array_hash_init', '_convert_declarations', '_convert_shift', '_remove_final_sigils'), 'remove_sigils.'):
+            _convert_file(input_file_dir, output_file_dir, verbose, shebang, keep_preprocessed, disabled_passes, profiler, use_mmap)
+        if profile == 'json':
+            profiler.dump_json(output_file_dir + '.profile.json')
+            if verbose: print(f"Profile written to: {output_file_dir}.profile.json")
+    else:
+        _convert_file(input_file_dir, output_file_dir, verbose, shebang, keep_preprocessed, disabled_passes, use_mmap=use_mmap, workers=workers)
+
     if verbose: print(f"File converted and written to: {output_file_dir}")
+    if manifest_dir:
+        manifest.record(input_file_dir, output_file_dir, __version__, rules_hash)
+        manifest.save()
     # if pydoc_dir:
+    #     from internal.write_pydoc import write_pydoc # pulls in pydoc, only imported when documentation is written
     #     write_pydoc(output_file_dir, output_dir=pydoc_dir)
     #     if verbose: print(f"Documentation written for {output_file_dir}")
 
-def __main__() -> None:
+# Perl sources picked up when a directory is translated in batch mode
+PERL_EXTENSIONS = ('.pl', '.pm')
+
+def collect_inputs(input_pattern:str) -> list[str]:
+    """
+    Collect the Perl files to translate in batch mode.
+
+    Args:
+        input_pattern (str): A directory, searched recursively for .pl and .pm files, or a glob pattern.
+
+    Returns:
+        list[str]: Sorted paths of the matching files.
+    """
+    if os.path.isdir(input_pattern):
+        files = [os.path.join(root, name)
+                 for root, _, names in os.walk(input_pattern)
+                 for name in names if name.endswith(PERL_EXTENSIONS)]
+    else:
+        files = [path for path in glob.glob(input_pattern, recursive=True) if os.path.isfile(path)]
+    return sorted(files)
+
+def _input_root(input_pattern:str, input_files:list[str]) -> str:
+    """Directory whose layout is mirrored in the output directory of a batch."""
+    if os.path.isdir(input_pattern): return input_pattern
+    return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in input_files])
+
+def _batch_output_path(input_file_dir:str, root:str, output_dir:str) -> str:
+    """Output file of a file of a batch, at the same place under output_dir as under root, or next to its source."""
+    if not output_dir: return re.sub(r'\.[^.]*$', '.py', input_file_dir)
+    relative = os.path.relpath(os.path.abspath(input_file_dir), os.path.abspath(root))
+    output_file_dir = os.path.join(output_dir, re.sub(r'\.[^.]*$', '.py', relative))
+    os.makedirs(os.path.dirname(output_file_dir), exist_ok=True)
+    return output_file_dir
+
+def _translate_one(job:tuple) -> tuple[str, str, str]:
+    """
+    Translate a single file of a batch, in a worker process.
+
+    Args:
+        job (tuple): (input file, output file, keyword arguments of pl2py).
+
+    Returns:
+        tuple[str, str, str]: The input file, the output file and the error message, None on success.
+    """
+    input_file_dir, output_file_dir, options = job
+    try:
+        pl2py(input_file_dir, output_file_dir, **options)
+    except Exception as error:
+        return input_file_dir, output_file_dir, f"{type(error).__name__}: {error}"
+    return input_file_dir, output_file_dir, None
+
+def _run_counted(function, job:tuple) -> tuple:
+    """Run a job in a worker process, returning its result with the process id and the statistics of its line cache."""
+    return function(job), os.getpid(), _line_cache_counts()
+
+# numbers of the pools, keying the line caches of their workers
+_pool_numbers = itertools.count()
+
+class _Pool:
+    """
+    Process pool translating batches of files, or the chunks of a file, started on the first batch with more than
+    one job, so that small runs stay in-process.
+    The statistics of the line caches of the workers are collected with their results, see `line_cache_info`.
+
+    Args:
+        workers (int): Number of worker processes, None for the number of CPUs, 1 translates in-process.
+        line_cache (int): Size of the LRU cache of converted lines of each process, 0 disables it.
+    """
+    def __init__(self, workers:int, line_cache:int):
+        self.workers = workers
+        self.line_cache = line_cache
+        self._executor = None
+        self._number = next(_pool_numbers)
+
+    def _start(self) -> None:
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=set_line_cache, initargs=(self.line_cache,))
+
+    def _result(self, counted:tuple):
+        """Return the result of a job run by `_run_counted`, recording the statistics of the line cache of its worker."""
+        result, pid, cache = counted
+        if cache is not None: _worker_caches[self._number, pid] = cache
+        return result
+
+    def map(self, function, jobs:list) -> list:
+        if self._executor is None and (self.workers == 1 or len(jobs) <= 1):
+            if self.line_cache: set_line_cache(self.line_cache)
+            return [function(job) for job in jobs]
+        self._start()
+        # map keeps the results in submission order, so the output is deterministic
+        return [self._result(counted) for counted in self._executor.map(functools.partial(_run_counted, function), jobs)]
 
+    def imap(self, function, jobs):
+        """Yield (job, result) pairs in submission order, submitting at most two jobs per worker ahead, so jobs may be a stream."""
+        if self.workers == 1:
+            for job in jobs:
+                yield job, function(job)
+            return
+        self._start()
+        window = deque()
+        for job in jobs:
+            window.append((job, self._executor.submit(_run_counted, function, job)))
+            if len(window) >= 2 * self.workers:
+                job, future = window.popleft()
+                yield job, self._result(future.result())
+        while window:
+            job, future = window.popleft()
+            yield job, self._result(future.result())
+
+    def __enter__(self) -> '_Pool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._executor is not None: self._executor.shutdown()
+
+def _translate_jobs(jobs:list, pool:_Pool, manifest_dir:str, verbose:bool, options:dict) -> list[tuple[str, str, str]]:
+    """
+    Translate a batch of files on a pool, skipping the files that are up to date in the manifest.
+
+    Args:
+        jobs (list): (input file, output file, keyword arguments of pl2py) of each file.
+        pool (_Pool): Pool translating the files.
+        manifest_dir (str): Manifest file, None to translate every file.
+        verbose (bool): Print the result of each file.
+        options (dict): Keyword arguments of pl2py, used for the translator hash.
+
+    Returns:
+        list[tuple[str, str, str]]: (input file, output file, error message or None) of each job, in order.
+    """
+    # the manifest is only read and written here, workers never touch it
+    skipped = set()
+    if manifest_dir:
+        from internal.manifest import Manifest
+        manifest = Manifest(manifest_dir)
+        rules_hash = translator_hash(**options)
+        skipped = {job[0] for job in jobs if manifest.is_up_to_date(job[0], job[1], __version__, rules_hash)}
+    pending = [job for job in jobs if job[0] not in skipped]
+
+    translated = pool.map(_translate_one, pending)
+
+    if manifest_dir:
+        for input_file_dir, output_file_dir, error in translated:
+            if not error: manifest.record(input_file_dir, output_file_dir, __version__, rules_hash)
+        manifest.save()
+
+    translated = {result[0]: result for result in translated}
+    results = [translated.get(job[0], (job[0], job[1], None)) for job in jobs]
+    if verbose:
+        for input_file_dir, output_file_dir, error in results:
+            status = "skip  " if input_file_dir in skipped else "FAILED" if error else "ok    "
+            print(f"{status} {input_file_dir}: {error}" if error else f"{status} {input_file_dir} -> {output_file_dir}")
+    return results
+
+def pl2py_batch(input_pattern:str,
+                output_dir:str = None,
+                workers:int = None,
+                verbose:bool = False,
+                manifest_dir:str = None,
+                line_cache:int = 0,
+                **options
+                ) -> list[tuple[str, str, str]]:
+    """
+    Translate every Perl file of a directory or glob pattern, fanning the files out to a process pool.
+
+    Args:
+        input_pattern (str): A directory, searched recursively for .pl and .pm files, or a glob pattern.
+        output_dir (str, optional): Directory receiving the translated files, mirroring the input layout.
+            Defaults to writing each .py file next to its Perl source.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs, 1 translates in-process.
+        verbose (bool, optional): Print the result of each file.
+        manifest_dir (str, optional): Manifest file; files that are up to date in it are not translated again.
+        line_cache (int, optional): Size of the LRU cache of converted lines shared by the files of each process, 0 disables it.
+        **options: Keyword arguments passed on to pl2py for each file.
+
+    Returns:
+        list[tuple[str, str, str]]: (input file, output file, error message or None) of each file, in sorted input order.
+    """
+    input_files = collect_inputs(input_pattern)
+    if not input_files: return []
+    root = _input_root(input_pattern, input_files)
+    jobs = [(input_file_dir, _batch_output_path(input_file_dir, root, output_dir), options) for input_file_dir in input_files]
+
+    with _Pool(workers, line_cache) as pool:
+        return _translate_jobs(jobs, pool, manifest_dir, verbose, options)
+
+def pl2py_dependencies(input_files:list[str],
+                       output_dir:str = None,
+                       lib_paths:list[str] = (),
+                       workers:int = None,
+                       verbose:bool = False,
+                       manifest_dir:str = None,
+                       line_cache:int = 0,
+                       **options
+                       ) -> list[tuple[str, str, str]]:
+    """
+    Translate Perl programs together with every module they use or require, found through lib paths.
+
+    The module dependency graph is translated in topological waves on a process pool, modules before the files
+    using them. Modules are written at the path of their Python module, e.g. <output_dir>/ESPT/ONIOMtoPDB.py,
+    so the imports written for `use ESPT::ONIOMtoPDB` resolve from the translated programs.
+
+    Args:
+        input_files (list[str]): Perl programs to translate.
+        output_dir (str, optional): Directory receiving the translated files. Defaults to writing each .py file next to its Perl source.
+        lib_paths (list[str], optional): Lib paths searched for modules before the `use lib` paths of each file.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs, 1 translates in-process.
+        verbose (bool, optional): Print the waves and the result of each file.
+        manifest_dir (str, optional): Manifest file; files that are up to date in it are not translated again.
+        line_cache (int, optional): Size of the LRU cache of converted lines shared by the files of each process, 0 disables it.
+        **options: Keyword arguments passed on to pl2py for each file.
+
+    Returns:
+        list[tuple[str, str, str]]: (input file, output file, error message or None) of each file, wave by wave.
+    """
+    from internal.modules import ModuleGraph
+    graph = ModuleGraph(input_files, lib_paths)
+    if verbose:
+        for path, modules in graph.unresolved.items():
+            print(f"{path}: modules not found in lib paths, not translated: {', '.join(modules)}")
+    results = []
+    with _Pool(workers, line_cache) as pool:
+        for number, wave in enumerate(graph.waves(), 1):
+            if verbose: print(f"Wave {number}: {len(wave)} files")
+            jobs = []
+            for input_file_dir in wave:
+                output_file_dir = graph.output_path(input_file_dir, output_dir)
+                os.makedirs(os.path.dirname(os.path.abspath(output_file_dir)), exist_ok=True)
+                jobs.append((input_file_dir, output_file_dir, options))
+            results += _translate_jobs(jobs, pool, manifest_dir, verbose, options)
+    return results
+
+def pl2py_watch(input_pattern:str,
+                output:str = None,
+                interval:float = 0.2,
+                verbose:bool = False,
+                line_cache:int = 100000,
+                max_polls:int = None,
+                **options
+                ) -> None:
+    """
+    Watch Perl files and translate each one again as soon as its content changes.
+
+    The translator stays loaded in this process, with its rules compiled and a warm line cache,
+    so a saved file is translated without paying startup again, and only the files that changed are translated.
+
+    Args:
+        input_pattern (str): A Perl file, or a directory or glob pattern watched for .pl and .pm files, new files included.
+        output (str, optional): Output file for a single input file, output directory mirroring the input layout otherwise.
+            Defaults to writing each .py file next to its Perl source.
+        interval (float, optional): Seconds between two polls of the files.
+        verbose (bool, optional): Print the progress of each translation.
+        line_cache (int, optional): Size of the LRU cache of converted lines, 0 disables it.
+        max_polls (int, optional): Stop after this many polls. Defaults to watching until interrupted.
+        **options: Keyword arguments passed on to pl2py for each file.
+    """
+    batch = os.path.isdir(input_pattern) or glob.has_magic(input_pattern)
+    collect = (lambda: collect_inputs(input_pattern)) if batch else (lambda: [input_pattern])
+    set_line_cache(line_cache)
+    print(f"Watching {input_pattern}, press Ctrl-C to stop.", flush=True)
+    from internal.watch import Watcher
+    for changed in Watcher(collect, interval).changes(max_polls):
+        root = _input_root(input_pattern, collect()) if batch else None
+        for input_file_dir in changed:
+            output_file_dir = _batch_output_path(input_file_dir, root, output) if batch else output
+            start = time.perf_counter()
+            try:
+                pl2py(input_file_dir, output_file_dir, verbose=verbose, **options)
+            except Exception as error:
+                print(f"FAILED {input_file_dir}: {type(error).__name__}: {error}", flush=True)
+                continue
+            print(f"ok     {input_file_dir} in {(time.perf_counter() - start) * 1000:.1f} ms", flush=True)
+
+def __main__() -> None:
     import sys
-    if len(sys.argv) < 2:
-        print("Usage: pl2py.py <input_file> [output_file] [pydoc_dir] [verbose]")
-        sys.exit(1)
+    import argparse
+    parser = argparse.ArgumentParser(description="Translate Perl code into Python.")
+    parser.add_argument('input', type=str, help='Input Perl file, or a directory or glob pattern for batch mode')
+    parser.add_argument('output', type=str, nargs='?', default=None, help='Output Python file, or output directory in batch mode')
+    parser.add_argument('pydoc_dir', type=str, nargs='?', default="", help='Directory for the generated pydoc')
+    parser.add_argument('verbose', type=str, nargs='?', default="", help='Any non-empty value enables verbose output')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Number of worker processes in batch mode (default: number of CPUs); for a single file, number of processes converting it in chunks (default: 1)')
+    parser.add_argument('--keep-preprocessed', action='store_true', help='Also write the intermediate .pl2py file')
+    parser.add_argument('--manifest', type=str, default=None, help='Manifest file used to skip files that are already up to date')
+    parser.add_argument('--line-cache', type=int, default=0, help='Size of the LRU cache of converted lines of each process (default: disabled)')
+    parser.add_argument('--profile', type=str, nargs='?', const='json', default=None, choices=['json', 'pstats'],
+                        help='Write per-stage timings of each file to <output>.profile.json, or cProfile stats to <output>.pstats')
+    parser.add_argument('--deps', action='store_true', help='Also translate the modules used by the input, found through the lib paths, into the output directory')
+    parser.add_argument('-I', '--lib', type=str, action='append', default=[], help='Lib path searched for modules with --deps, can be repeated')
+    parser.add_argument('--watch', action='store_true', help='Keep running and translate the input files again whenever they change')
+    parser.add_argument('--interval', type=float, default=0.2, help='Seconds between two polls of the files in watch mode')
+    parser.add_argument('--mmap', action='store_true', help='Read the input files through a memory map')
+    parser.add_argument('--disable-pass', type=str, action='append', default=[], choices=list(PASSES.passes), help='Conversion pass not to run, can be repeated')
+    args = parser.parse_args()
+    verbose = bool(args.verbose)
+
+    if args.watch:
+        try:
+            pl2py_watch(args.input, args.output, args.interval, verbose, line_cache=args.line_cache or 100000,
+                        pydoc_dir=args.pydoc_dir, keep_preprocessed=args.keep_preprocessed, profile=args.profile,
+                        disabled_passes=tuple(args.disable_pass), use_mmap=args.mmap)
+        except KeyboardInterrupt:
+            pass
+        return
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    pydoc_dir = sys.argv[3] if len(sys.argv) > 3 else ""
-    verbose = bool(sys.argv[4]) if len(sys.argv) > 4 else False
+    batch = os.path.isdir(args.input) or glob.has_magic(args.input)
+    if batch or args.deps:
+        options = dict(workers=args.workers, verbose=verbose, manifest_dir=args.manifest, line_cache=args.line_cache,
+                       pydoc_dir=args.pydoc_dir, keep_preprocessed=args.keep_preprocessed, profile=args.profile,
+                       disabled_passes=tuple(args.disable_pass), use_mmap=args.mmap)
+        if args.deps:
+            input_files = collect_inputs(args.input) if batch else [args.input]
+            results = pl2py_dependencies(input_files, args.output, lib_paths=args.lib, **options)
+        else:
+            results = pl2py_batch(args.input, args.output, **options)
+        failed = [result for result in results if result[2]]
+        for input_file_dir, _, error in failed:
+            print(f"{input_file_dir}: {error}", file=sys.stderr)
+        print(f"Translated {len(results) - len(failed)} of {len(results)} files.")
+        if verbose and line_cache_info(): print(f"Line cache: {line_cache_info()}")
+        sys.exit(1 if failed or not results else 0)
 
-    pl2py(input_file, output_file, pydoc_dir, verbose)
+    set_line_cache(args.line_cache)
+    pl2py(args.input, args.output, args.pydoc_dir, verbose, keep_preprocessed=args.keep_preprocessed, manifest_dir=args.manifest, profile=args.profile,
+          disabled_passes=tuple(args.disable_pass), use_mmap=args.mmap, workers=args.workers or 1)
+    if verbose and line_cache_info(): print(f"Line cache: {line_cache_info()}")
 
 if __name__ == "__main__":
-    __main__()
\ No newline at end of file
+    __main__()
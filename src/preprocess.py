@@ -1,30 +1,122 @@
+import os
 import re
-import argparse
-import subprocess
+import itertools
 import datetime
+from typing import Iterable, Iterator
 
-from internal.write_to_file import write_to_file
+from internal.pod import PodRenderer
+from internal.modules import python_import
 
-def preprocess(input_file_dir: str, output_file_dir:str = None, shebang:str = '#!/usr/bin/python3') -> str:
-    
-    output_file_dir = output_file_dir if output_file_dir else re.sub(r'\.[^.]*$', '.pl2py', input_file_dir)
+# bytes of a memory-mapped input after which the pages already read are released
+_MMAP_RELEASE = 1 << 24
+
+def read_lines(input_file_dir: str, use_mmap: bool = False) -> Iterator[str]:
+    """Stream the lines of a source file.
+
+    Args:
+        input_file_dir (str): File to read.
+        use_mmap (bool, optional): Map the file in memory instead of reading it through a buffer. Lines are decoded as
+            UTF-8 with Windows line endings normalised, and the pages already read are released as the file is read,
+            so the mapping does not grow the resident memory with the size of the file. Defaults to a buffered read.
+
+    Yields:
+        str: The lines of the file, each ending with a newline except possibly the last one.
+    """
+    if not use_mmap:
+        with open(input_file_dir, 'r') as file:
+            yield from file
+        return
+    import mmap
+    with open(input_file_dir, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0: return # empty files cannot be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise'): mapped.madvise(mmap.MADV_SEQUENTIAL)
+            released = 0
+            for line in iter(mapped.readline, b''):
+                yield line.decode('utf-8').replace('\r\n', '\n')
+                position = mapped.tell() - mapped.tell() % mmap.PAGESIZE
+                if position - released >= _MMAP_RELEASE and hasattr(mmap, 'MADV_DONTNEED'):
+                    # clean file pages are read again from the page cache if needed, dropping them only lowers the RSS
+                    mapped.madvise(mmap.MADV_DONTNEED, released, position - released)
+                    released = position
+
+def iter_code(lines: Iterable[str]) -> Iterator[str]:
+    """Clean the code lines of Perl source: strip the POD and convert use/require statements into imports.
+
+    Args:
+        lines (Iterable[str]): Lines of Perl source.
+
+    Yields:
+        str: The cleaned code lines.
+    """
+    in_pod = False
+    for line in lines:
+        # remove perldoc "=...=cut" lines and every lines in between, they are rendered into the docstring separately
+        if line.startswith('='):
+            in_pod = not line.startswith('=cut')
+            continue
+        if in_pod: continue
+        # replace use/require of modules with python imports of the translated modules,
+        # e.g. use warnings with python's warning module and use File::Basename with python's os.path,
+        # and remove use strict as python does not need it
+        if line.lstrip().startswith(('use ', 'require ')):
+            converted = python_import(line)
+            if converted == '': continue
+            if converted is not None: line = converted + '\n'
+        yield line
+
+def iter_docstring(lines: Iterable[str]) -> Iterator[str]:
+    """Stream the module docstring rendered from the POD of Perl source, one line at a time.
 
-    content = ""
+    Args:
+        lines (Iterable[str]): Lines of Perl source.
 
-    # open the file
-    with open(input_file_dir, 'r') as file:
-        file_content = file.readlines()
-        print(f"Processing {len(file_content)} lines from {input_file_dir}...")
-        print(f"file content: {file_content}, type: {type(file_content)}")
+    Yields:
+        str: Lines of the docstring, from the opening to the closing quotes, each ending with a newline.
+    """
+    renderer = PodRenderer()
+    quotes = '"""'
+    def docstring_lines(rendered):
+        nonlocal quotes
+        for text in rendered:
+            yield quotes + text.replace('"""', '\\"\\"\\"') + '\n'
+            quotes = ''
+    for line in lines:
+        if renderer.feed(line): yield from docstring_lines(renderer.drain())
+    yield from docstring_lines(renderer.drain(final=True))
+    # an empty docstring stays on one line, otherwise a blank line separates the text from the closing quotes
+    if quotes:
+        yield '""""""\n'
+    else:
+        yield '\n'
+        yield '"""\n'
 
-        if '#!/usr/bin/perl' in file_content[0]:
-            content += shebang + '\n'
+def iter_preprocess(input_file_dir: str, shebang:str = '#!/usr/bin/python3', use_mmap: bool = False) -> Iterator[str]:
+    """Stream the preprocessed lines of a Perl file.
 
-        # add pydoc to the file based on the perldoc of the input file
-        perldoc=subprocess.run(["perldoc", input_file_dir], capture_output=True).stdout.decode('utf-8')
-        content += f'''
-"""{perldoc}"""
-__all__ = []
+    Yields the python header (shebang, pydoc and metadata, ending with the '=====Start Converting Now====='
+    marker) followed by the cleaned Perl lines. The pydoc is rendered from the POD of the file by the built-in
+    renderer, perldoc is not needed. The docstring has to come before the code but the POD is usually at the end
+    of the file, so the file is read twice, once for the POD and once for the code, and memory stays bounded
+    whatever the size of the file.
+
+    Args:
+        input_file_dir (str): Perl file to preprocess.
+        shebang (str, optional): Shebang replacing the Perl one. Defaults to '#!/usr/bin/python3'.
+        use_mmap (bool, optional): Read the file through a memory map, see `read_lines`.
+
+    Yields:
+        str: Preprocessed lines, each ending with a newline.
+    """
+    lines = read_lines(input_file_dir, use_mmap)
+    first_line = next(lines, '')
+    if '#!/usr/bin/perl' in first_line:
+        yield shebang + '\n'
+
+    # add pydoc to the file based on the perldoc of the input file
+    yield '\n'
+    yield from iter_docstring(itertools.chain((first_line,), lines))
+    content = f'''__all__ = []
 __author__ = "Zerui Ma <jerryma@smu.edu>"
 __date__ = "{datetime.datetime.now().strftime('%m-%d-%Y')}"
 __version__ = "2.0.0"
@@ -37,29 +129,28 @@ Guido van Rossum, for an excellent programming language.
 =====Start Converting Now=====
 
 '''
-        write_to_file(output_file_dir, content, 'w')
-
-        # remove use strict as python does not need it
-        file_content = [line for line in file_content if not line.startswith('use strict;')]
-        # replace use warnings with python's warning module
-        file_content = [line.replace('use warnings;', 'import warnings') for line in file_content]
-        # replace use File::Basename with python's os.path
-        file_content = [line.replace('use File::Basename;', 'import os') for line in file_content]
-        # remove perldoc "=...=cut" lines and every lines in between
-        perldoc_flag = False
-        for line in file_content:
-            if line.startswith('=cut'):
-                perldoc_flag = False
-                continue
-            if line.startswith('=') and not line.startswith('=cut'):
-                perldoc_flag = True
-                continue
-            if perldoc_flag:
-                continue
-            else: # add the line to content
-                write_to_file(output_file_dir, line, 'a')
+    yield from content.splitlines(keepends=True)
+
+    yield from iter_code(read_lines(input_file_dir, use_mmap))
+
+def preprocess(input_file_dir: str, output_file_dir:str = None, shebang:str = '#!/usr/bin/python3') -> str:
+    """Preprocess a Perl file and write the result to a .pl2py file.
+
+    Args:
+        input_file_dir (str): Perl file to preprocess.
+        output_file_dir (str, optional): Output file. Defaults to the input file name with the .pl2py extension.
+        shebang (str, optional): Shebang replacing the Perl one. Defaults to '#!/usr/bin/python3'.
+
+    Returns:
+        str: The path of the written file.
+    """
+    output_file_dir = output_file_dir if output_file_dir else re.sub(r'\.[^.]*$', '.pl2py', input_file_dir)
+    with open(output_file_dir, 'w') as outfile:
+        outfile.writelines(iter_preprocess(input_file_dir, shebang=shebang))
+    return output_file_dir
     
 def __main__():
+    import argparse
     parser = argparse.ArgumentParser(description="Preprocess a Perl file to Python.")
     parser.add_argument('-i', '--input', type=str, required=True, help='Input Perl file to preprocess')
     parser.add_argument('-o', '--output', type=str, required=False, help='Output Python file (default: input file name with .pl2py extension)')
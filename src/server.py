@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Persistent translation server.
+
+Keeps the translator loaded, with its rules compiled and a warm line cache, and answers translation requests
+from editors and scripts without paying interpreter startup and imports on every call. Requests are JSON objects,
+one per line, read from stdin or from the connections of a Unix socket:
+
+    {"id": 1, "op": "line", "code": "my $x = 1;"}
+    {"id": 2, "op": "snippet", "code": "if ($x) {\\n  print $x;\\n}\\n"}
+    {"id": 3, "op": "file", "input": "demo.pl", "output": "demo.py"}
+    {"id": 4, "op": "stats"}
+
+Every request gets one JSON response line, {"id", "ok", "result" or "error", "ms"}. Requests are handled
+concurrently, so responses may come back in a different order than the requests; match them on "id".
+"""
+
+import re
+import sys
+import json
+import time
+import threading
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO
+
+from internal.profiling import LatencyStats
+from pl2py import pl2py, pl2py_line, pl2py_snippet, set_line_cache, line_cache_info
+
+class TranslationServer:
+    """Translation requests handled against the translator loaded in this process.
+
+    Args:
+        workers (int, optional): Number of requests handled at the same time. Defaults to 4.
+        line_cache (int, optional): Size of the LRU cache of converted lines, 0 disables it. Defaults to 100000.
+    """
+    def __init__(self, workers: int = 4, line_cache: int = 100000):
+        self.workers = workers
+        self.latency = LatencyStats()
+        set_line_cache(line_cache)
+        self._operations = {
+            'line': lambda request: pl2py_line(request['code'], tuple(request.get('disabled_passes', ()))),
+            'snippet': lambda request: pl2py_snippet(request['code'], tuple(request.get('disabled_passes', ()))),
+            'file': self._translate_file,
+            'stats': lambda request: {'latency': self.latency.report(), 'line_cache': line_cache_info()},
+        }
+
+    @staticmethod
+    def _translate_file(request: dict) -> str:
+        """Translate the input file of a request and return the path of the Python file written."""
+        output = request.get('output') or None
+        pl2py(request['input'], output, disabled_passes=tuple(request.get('disabled_passes', ())))
+        return output if output else re.sub(r'\.[^.]*$', '.py', request['input'])
+
+    def handle(self, request: dict) -> dict:
+        """Answer one request.
+
+        Args:
+            request (dict): Request with an "op" among line, snippet, file and stats, and its arguments.
+
+        Returns:
+            dict: The response, with the id of the request; errors are reported in the response, never raised.
+        """
+        start = time.perf_counter()
+        response = {'id': request.get('id') if isinstance(request, dict) else None}
+        try:
+            operation = request.get('op') if isinstance(request, dict) else None
+            if operation not in self._operations: raise ValueError(f"unknown op {operation!r}, expected one of {', '.join(self._operations)}")
+            response['result'] = self._operations[operation](request)
+            response['ok'] = True
+        except Exception as error:
+            operation = 'error'
+            response['ok'] = False
+            response['error'] = f"{type(error).__name__}: {error}"
+        seconds = time.perf_counter() - start
+        self.latency.record(operation, seconds)
+        response['ms'] = round(seconds * 1000, 3)
+        return response
+
+    def handle_line(self, line: str) -> str:
+        """Answer one JSON request line with one JSON response line."""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as error:
+            return json.dumps({'id': None, 'ok': False, 'error': f"JSONDecodeError: {error}"})
+        return json.dumps(self.handle(request))
+
+    def serve_stream(self, input: IO[str], output: IO[str]) -> None:
+        """Answer the requests read from a stream until it ends, handling up to `workers` of them at the same time."""
+        lock = threading.Lock()
+        def respond(line):
+            response = self.handle_line(line)
+            with lock:
+                output.write(response + '\n')
+                output.flush()
+        with ThreadPoolExecutor(self.workers) as pool:
+            for line in input:
+                if line.strip(): pool.submit(respond, line)
+
+    def serve_stdio(self) -> None:
+        """Answer the requests read from stdin on stdout."""
+        self.serve_stream(sys.stdin, sys.stdout)
+
+    def serve_unix(self, path: str) -> None:
+        """Answer the requests of the connections of a Unix socket until interrupted, each connection in its own thread."""
+        server = self
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip(): continue
+                    self.wfile.write(server.handle_line(line.decode()).encode() + b'\n')
+                    self.wfile.flush()
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as unix_server:
+            unix_server.daemon_threads = True
+            print(f"Listening on {path}, press Ctrl-C to stop.", file=sys.stderr, flush=True)
+            unix_server.serve_forever()
+
+def __main__() -> None:
+    import os
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve Perl to Python translation requests as JSON lines.")
+    parser.add_argument('--socket', type=str, default=None, help='Unix socket to listen on (default: read requests from stdin)')
+    parser.add_argument('-j', '--workers', type=int, default=4, help='Number of requests handled at the same time')
+    parser.add_argument('--line-cache', type=int, default=100000, help='Size of the LRU cache of converted lines, 0 disables it')
+    args = parser.parse_args()
+
+    server = TranslationServer(args.workers, args.line_cache)
+    if args.socket is None:
+        server.serve_stdio()
+        return
+    try:
+        server.serve_unix(args.socket)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.socket): os.remove(args.socket)
+
+if __name__ == "__main__":
+    __main__()
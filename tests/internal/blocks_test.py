@@ -0,0 +1,148 @@
+import unittest
+from src.internal.blocks import BlockConverter, convert_blocks, loop_key
+from src.internal.lexer import tokenize
+
+def _convert(source: str) -> list[str]:
+    """Convert Perl source with a statement converter that only drops the trailing ';'."""
+    return list(convert_blocks(source.splitlines(), lambda statement: statement.rstrip(';')))
+
+class TestBlockConverter(unittest.TestCase):
+    def test_indents_nested_blocks(self):
+        self.assertEqual(_convert(
+            'if ($a) {\n'
+            '    while ($b) {\n'
+            '  $c = 1;\n'
+            '}\n'
+            '} elsif ($d) {\n'
+            '    $e = 2;\n'
+            '} else {\n'
+            '    $f = 3;\n'
+            '}\n'), [
+            'if ($a):',
+            '    while ($b):',
+            '        $c = 1',
+            'elif ($d):',
+            '    $e = 2',
+            'else:',
+            '    $f = 3',
+        ])
+
+    def test_joins_continuation_lines(self):
+        self.assertEqual(_convert('print "a"\n      if $debug >= 0;\n'), ['print "a" if $debug >= 0'])
+
+    def test_splits_statements_on_one_line(self):
+        self.assertEqual(_convert('sub help { system("perldoc x"); exit; }'), ['def help(*args):', '    args = list(args)', '    system("perldoc x")', '    exit'])
+
+    def test_hash_braces_are_not_blocks(self):
+        self.assertEqual(_convert('$input->{NAME} = $h{key};\nmy $r = { a => 1 };'), ['$input->{NAME} = $h{key}', 'my $r = { a => 1 }'])
+
+    def test_empty_block_gets_pass(self):
+        self.assertEqual(_convert('unless ($a) {\n}\n'), ['if not ($a):', '    pass'])
+
+    def test_comments_and_blank_lines(self):
+        self.assertEqual(_convert('# top\n\nfor ($i) { # loop\n}'), ['# top', '', 'for ($i):', '    # loop', '    pass'])
+
+    def test_counting_loops_become_ranges(self):
+        headers = lambda source: [line for line in _convert(source) if line.startswith('for')]
+        self.assertEqual(headers(
+            'for (my $i=0; $i<=$#ARGV; $i++) {}\n'
+            'for (my $i = 1; $i < scalar(@files); ++$i) {}\n'
+            'for ($i = 0; $i <= 10; $i += 2) {}\n'
+            'for (my $i = $#files; $i >= 0; $i--) {}\n'), [
+            'for $i in range(len(@ARGV)):',
+            'for $i in range(1, len(@files)):',
+            'for $i in range(0, 11, 2):',
+            'for $i in range(len(@files) - 1, -1, -1):',
+        ])
+        # not a counting loop
+        self.assertEqual(headers('for (my $i = 0; $i < 10; $i *= 2) {}'), ['for (my $i = 0; $i < 10; $i *= 2):'])
+        self.assertEqual(headers('for (;;) {}'), ['for (; ; ):'])
+
+    def test_varying_counting_loops_test_their_condition(self):
+        varying = {loop_key('(my $i = 0; $i < @a; $i++)'), loop_key('(my $k = 10; $k >= 0; $k -= 2)')}
+        converter = BlockConverter(lambda statement: statement.rstrip(';'), varying_loops=varying)
+        lines = [python for line in ['for (my $i = 0; $i < @a; $i++) { $i--; }', 'for (my $k = 10; $k >= 0; $k -= 2) {}',
+                                     'for (my $j = 0; $j < @a; $j++) {}'] for python in converter.feed(line)]
+        self.assertEqual(lines, [
+            '$i = -1',
+            'while ($i := $i + 1) < len(@a):',
+            '    $i--',
+            '$k = 12',
+            'while ($k := $k - 2) >= 0:',
+            '    pass',
+            'for $j in range(len(@a)):',
+            '    pass',
+        ])
+
+    def test_foreach_iterates_directly(self):
+        headers = lambda source: [line for line in _convert(source) if line.startswith('for')]
+        self.assertEqual(headers(
+            'foreach my $file (@files) {}\n'
+            'for my $n (1 .. $count) {}\n'
+            'for my $i (0..$#list) {}\n'
+            'foreach my $key (sort keys %h) {}\n'
+            'foreach my $value (values %h) {}\n'
+            'foreach $x ($a, $b) {}\n'
+            'foreach (@lines) {}\n'), [
+            'for $file in @files:',
+            'for $n in range(1, $count + 1):',
+            'for $i in range(len(@list)):',
+            'for $key in sorted(@h):',
+            'for $value in @h.values():',
+            'for $x in ($a, $b):',
+            'for $_ in @lines:',
+        ])
+
+    def test_read_loops_iterate_over_files(self):
+        headers = lambda source: [line for line in _convert(source) if line.startswith('for')]
+        self.assertEqual(headers(
+            'while (<FILEIN>) {}\n'
+            'while (my $line = <$fh>) {}\n'
+            'while (defined($line = <STDIN>)) {}\n'
+            'while (<>) {}\n'
+            'foreach my $line (<FH>) {}\n'), [
+            'for $_ in FILEIN:',
+            'for $line in $fh:',
+            'for $line in sys.stdin:',
+            'for $_ in fileinput.input():',
+            'for $line in FH:',
+        ])
+        self.assertEqual(_convert('while (<FH> && $x) {}'), ['while (<FH> && $x):', '    pass'])
+
+    def test_reads_slurp_after_local_record_separator(self):
+        self.assertEqual(_convert(
+            'my $line = <FH>;\n'
+            '{\n'
+            '    local $/;\n'
+            '    my $all = <FH>;\n'
+            '}\n'
+            'my $next = <FH>;\n'), [
+            'my $line = <FH>',
+            'if True:',
+            '    my $all = FH.read()',
+            'my $next = <FH>',
+        ])
+
+    def test_statement_tokens_are_passed_when_they_match_the_text(self):
+        statements = []
+        def convert(statement, tokens=None):
+            if statement[0] != '(': statements.append((statement, tokens)) # not the condition of a header
+            return statement
+        converter = BlockConverter(convert, statement_tokens=True)
+        for line in ['while ($a) {', 'my $x = "a;b"; $y++ }', 'if ($a) { } %h = ();', 'my $z = $x', '    / 2;']:
+            list(converter.feed(line))
+        list(converter.close())
+        self.assertEqual(statements[0], ('my $x = "a;b";', tokenize('my $x = "a;b";')))
+        self.assertEqual(statements[1], ('$y++', tokenize('$y++')))
+        # a statement after a '}' and a statement continued on another line are tokenized again
+        self.assertEqual(statements[2:], [('%h = ();', None), ('my $z = $x / 2;', None)])
+
+    def test_unclosed_block_at_end_of_file(self):
+        converter = BlockConverter(lambda statement: statement)
+        self.assertEqual(list(converter.feed('if ($a) {')), ['if ($a):'])
+        self.assertEqual(converter.depth, 1)
+        self.assertEqual(list(converter.close()), ['    pass'])
+        self.assertEqual(converter.depth, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import pytest
+from src.internal.buffers import BufferTable
+from src.internal.symbols import build_symbol_table
+
+def _table(source):
+    table = BufferTable()
+    for line in source.splitlines():
+        table.feed(line)
+    return table
+
+LOOP = "my $out = '';\nforeach my $atom (@atoms) {\n    $out .= sprintf('%5d', $atom);\n}\n"
+
+def test_strings_appended_in_loops_are_buffers():
+    """Test a scalar declared empty and appended to in a loop, however deeply nested, is a buffer, not outside loops."""
+    assert _table(LOOP).names == {'out'}
+    assert _table("my $out;\nwhile ($x) {\n  if ($y) {\n    $out .= 'a';\n  }\n}\n").names == {'out'}
+    assert _table("my $out = '';\nfor (my $i = 0; $i < $n; $i++) {\n    $out .= 'a';\n}\n").names == {'out'}
+    assert _table("for (my $i = 0; $i < $n; $i++) {\n    my $out = '';\n    for (my $j = 0; $j < $i; $j++) { $out .= 'a'; }\n}\n").names == {'out'}
+    assert _table("my $out = '';\nif ($x) {\n    $out .= 'a';\n}\n").names == set()
+    assert _table("my $out = 'header';\nfor (@atoms) {\n    $out .= 'a';\n}\n").names == set()
+
+@pytest.mark.parametrize("use", [
+    'print "$out\\n";',
+    '$out =~ s/a/b/;',
+    'chomp($out);',
+    'my $ref = \\$out;',
+    'my @out = (1);',
+    '$out x= 2;',
+    'print substr($out, 0, 1);',
+])
+def test_uses_that_cannot_be_rewritten_keep_the_string(use):
+    """Test a scalar interpolated, matched, modified in place, referenced or sharing its name with an array is no buffer."""
+    assert _table(LOOP + use).names == set()
+
+def test_names_mentioned_before_the_declaration_keep_the_string():
+    """Test a name used in a line that was not tokenized, before it was declared empty, cannot become a buffer."""
+    assert _table('print "$out";\n' + LOOP).names == set()
+    assert _table('print "$other";\n' + LOOP).names == {'out'}
+
+@pytest.mark.parametrize("line, expected", [
+    ("my $out = '';", "my $out = [];"),
+    ("my $out;", "my $out = [];"),
+    ("$out .= sprintf('%5d', $atom);", "$out.append(sprintf('%5d', $atom));"),
+    ("$out .= $atom if $atom", "$out.append(str($atom)) if $atom"),
+    ("$out .= $i + 1;", "$out.append(str($i + 1));"),
+    ("$out = $out . 'END';", "$out = [''.join($out) . 'END'];"),
+    ("return $out;", "return ''.join($out);"),
+    ("print OUT $other;", "print OUT $other;"),
+])
+def test_statements_use_the_buffers(line, expected):
+    """Test declarations and assignments make lists, appends append and every other use joins the buffer."""
+    assert _table(LOOP).rewrite(line) == expected
+
+def test_symbol_table_collects_buffers():
+    """Test the buffers are collected by the symbol table pre-pass and take part in its cache key."""
+    first = build_symbol_table(LOOP.splitlines(keepends=True))
+    second = build_symbol_table(["my $out = '';\n"])
+    assert first.buffers.names == {'out'}
+    assert first != second
@@ -0,0 +1,97 @@
+import pytest
+from src.internal.classes import ClassTable
+from src.internal.symbols import build_symbol_table
+
+ATOM = '''package Atom;
+sub new {
+    my ($class, %args) = @_;
+    my $self = { NAME => $args{name}, 'charge' => 0 };
+    bless $self, $class;
+    return $self;
+}
+sub label {
+    my $self = shift;
+    $self->{'label'} = "$self->{NAME}$self->{charge}";
+    return $self->{label};
+}
+'''
+
+def _table(source, package='Atom'):
+    table = ClassTable()
+    for line in source.splitlines():
+        table.feed(line)
+    table.package = package
+    return table
+
+def test_fields_of_blessed_packages_are_collected():
+    """Test the keys used on $self in a package that blesses become the slots of its class, in order of first use."""
+    assert _table(ATOM).names == {'Atom': ('NAME', 'charge', 'label')}
+    assert _table('package Point;\nsub new { return bless { x => 0, y => 0 }, shift; }\n').names == {'Point': ('x', 'y')}
+    assert _table('package Config;\nsub get { my $self = shift; return $self->{name}; }\n').names == {}
+
+def test_keys_of_constructors_spanning_lines_are_collected():
+    """Test every key of a hash literal written over several lines becomes a slot, not only those of its first line."""
+    source = 'package Atom;\nsub new {\n    my $self = {\n        NAME => undef,\n        CHARGE => 0,\n    };\n    return bless $self, shift;\n}\n'
+    assert _table(source).names == {'Atom': ('NAME', 'CHARGE')}
+
+def test_classes_reject_unknown_fields():
+    """Test the generated class sets its slots from keywords and raises on a keyword that is no slot."""
+    namespace = {}
+    exec(_table(ATOM, package=None).definition('package Atom;'), namespace)
+    atom = namespace['Atom'](NAME='C')
+    assert (atom.NAME, atom.charge) == ('C', None)
+    with pytest.raises(TypeError):
+        namespace['Atom'](CHARGE=0)
+
+@pytest.mark.parametrize("use", [
+    'sub get { my ($self, $key) = @_; return $self->{$key}; }',
+    'sub fields { my $self = shift; return keys %$self; }',
+    'sub copy { my $self = shift; return { %{$self} }; }',
+    'our @ISA = ("Molecule");',
+    'use parent -norequire, "Molecule";',
+])
+def test_packages_using_their_objects_as_hashes_keep_them(use):
+    """Test packages with keys not known in advance, whole-hash uses or parents are not translated into classes."""
+    assert _table(ATOM + use).names == {}
+
+def test_package_statements_define_the_classes():
+    """Test a blessed package statement becomes a class with slots and sets the package of the following statements."""
+    table = _table(ATOM + 'package main;\n', package=None)
+    assert table.definition('package Atom;') == (
+        "class Atom:\n"
+        "    __slots__ = ('NAME', 'charge', 'label')\n"
+        "\n"
+        "    def __init__(self, **fields):\n"
+        "        unknown = fields.keys() - set(self.__slots__)\n"
+        "        if unknown: raise TypeError(f\"Atom has no fields {', '.join(sorted(unknown))}\")\n"
+        "        for name in self.__slots__: setattr(self, name, fields.get(name))\n")
+    assert table.package == 'Atom'
+    assert table.definition('package main;') is None and table.package == 'main'
+    assert table.definition('print $x;') is None and table.package == 'main'
+
+@pytest.mark.parametrize("line, expected", [
+    ("my $self = { NAME => $args{name}, 'charge' => 0 };", "my $self = Atom(NAME=$args{name}, charge=0);"),
+    ("my $self = {};", "my $self = Atom();"),
+    ("bless $self, $class;", "$self;"),
+    ("return bless($self, ref($class) || $class);", "return $self;"),
+    ("return bless { NAME => 'C' }, $class;", "return Atom(NAME='C');"),
+    ("$self->{'label'} = 1;", "$self->{label} = 1;"),
+    ("my $other = { NAME => 1 };", "my $other = { NAME => 1 };"),
+])
+def test_statements_create_instances(line, expected):
+    """Test hashes blessed or assigned to $self become instances of the class of the current package."""
+    assert _table(ATOM).rewrite(line) == expected
+    assert _table(ATOM, package='main').rewrite(line) == line
+
+def test_package_after_follows_package_statements():
+    """Test the package a chunk of lines ends in is found from its package statements."""
+    table = ClassTable()
+    assert table.package_after(['my $x = 1;\n'], 'Atom') == 'Atom'
+    assert table.package_after(['package Atom;\n', 'sub new {}\n', 'package ESPT::Molecule;\n'], None) == 'ESPT::Molecule'
+
+def test_symbol_table_collects_classes():
+    """Test the classes are collected by the symbol table pre-pass and take part in its cache key."""
+    first = build_symbol_table(ATOM.splitlines(keepends=True))
+    second = build_symbol_table(['package Atom;\n'])
+    assert first.classes.names == {'Atom': ('NAME', 'charge', 'label')}
+    assert first != second
@@ -0,0 +1,35 @@
+import pytest
+from src.internal.filehandles import HandleTable, convert_reads, slurp_mode
+from src.internal.passes import PASSES
+
+@pytest.mark.parametrize("line, expected", [
+    ("my $line = <FH>;", "my $line = FH.readline();"),
+    ("my $answer = <STDIN>;", "my $answer = sys.stdin.readline();"),
+    ("my @lines = <$fh>;", "my @lines = $fh.readlines();"),
+    ("my $content = do { local $/; <$fh> };", "my $content = $fh.read();"),
+    ("my $content = do { local $/ = undef; <FH> };", "my $content = FH.read();"),
+    ("my @logs = <*.log>;", "my @logs = <*.log>;"),
+    ("if ($a < $b) { $c = $d > 1; }", "if ($a < $b) { $c = $d > 1; }"),
+])
+def test_reads_use_file_methods(line, expected):
+    """Test reads of a handle become readline(), readlines() in list assignments and read() for slurps, globs are left alone."""
+    assert convert_reads(line) == expected
+
+def test_reads_with_unset_record_separator_slurp():
+    """Test every read returns the rest of the file once the record separator is unset."""
+    assert convert_reads('my $all = <FH>;', slurp=True) == 'my $all = FH.read();'
+    assert convert_reads('my @all = <FH>;', slurp=True) == 'my @all = [FH.read()];'
+    assert all(slurp_mode(statement) for statement in ('local $/;', 'local $/ = undef;', 'undef $/;', '$/ = undef;'))
+    assert not slurp_mode('local $/ = "\\n";') and not slurp_mode('my $x = $/;')
+
+def test_readline_pass_runs_on_reads_only():
+    """Test the readline pass is only needed by files reading handles, and runs before the sigils are removed."""
+    assert 'readline' not in PASSES.needed(['my $x = 1;'])
+    assert PASSES.pipeline(PASSES.needed(['my @lines = <$fh>;']))('my @lines = <$fh>;') == 'lines: list[any] = fh.readlines()'
+
+def test_standard_handles_need_imports():
+    """Test reads of STDIN and <> record the imports of sys and fileinput, other handles none."""
+    table = HandleTable()
+    for line in ('while (<FH>) {', 'my $x = $a <$b;', 'my $answer = <STDIN>;', 'while (<>) {'):
+        table.feed(line)
+    assert table.imports() == ['import fileinput', 'import sys']
@@ -0,0 +1,55 @@
+import unittest
+from src.internal.lexer import Token, tokenize, mask_literals, unmask_literals
+from src.internal.syntax import convert_syntax
+
+def _significant(line: str) -> list[tuple[str, str]]:
+    return [(kind, text) for kind, text in tokenize(line) if kind != 'space']
+
+class TestTokenize(unittest.TestCase):
+    def test_round_trip(self):
+        line = 'print "a x b; c" x 3 . $b if $ARGV[$i] eq "-d"; # done'
+        self.assertEqual(''.join(token.text for token in tokenize(line)), line)
+
+    def test_token_kinds(self):
+        self.assertEqual(_significant('my @list = (1, $x);'), [
+            ('word', 'my'), ('variable', '@list'), ('op', '='), ('op', '('),
+            ('number', '1'), ('op', ','), ('variable', '$x'), ('op', ')'), ('op', ';')])
+
+    def test_regex_or_division(self):
+        self.assertEqual(_significant('$a = $b / 2 / $c;')[3], ('op', '/'))
+        self.assertEqual(_significant('next if /^$/;')[2], ('regex', '/^$/'))
+        self.assertEqual(_significant('$x =~ s/foo/bar/g;')[2], ('regex', 's/foo/bar/g'))
+        self.assertEqual(_significant('tr{a-z}{A-Z};')[0], ('regex', 'tr{a-z}{A-Z}'))
+
+    def test_sigils_or_operators(self):
+        self.assertEqual(_significant('%hash = ();')[0], ('variable', '%hash'))
+        self.assertEqual(_significant('$x = $y % 2;')[3], ('op', '%'))
+        self.assertEqual(_significant('&foo($#ARGV);'), [('variable', '&foo'), ('op', '('), ('variable', '$#ARGV'), ('op', ')'), ('op', ';')])
+
+    def test_quote_like(self):
+        self.assertEqual(_significant('my @w = qw(a b c);')[3], ('string', 'qw(a b c)'))
+        self.assertEqual(_significant('$h{q} = 1;')[2], ('word', 'q'))
+
+    def test_unterminated_string(self):
+        self.assertEqual(tokenize('print "abc'), [Token('word', 'print'), Token('space', ' '), Token('string', '"abc')])
+
+class TestMaskLiterals(unittest.TestCase):
+    def test_mask_and_unmask(self):
+        masked, literals = mask_literals('print "a x b; $c" x 3;')
+        self.assertEqual(masked, 'print "\x000\x00" x 3;')
+        self.assertEqual(literals, ['a x b; c'])
+        self.assertEqual(unmask_literals(masked, literals), 'print "a x b; c" x 3;')
+
+    def test_mask_given_tokens(self):
+        line = 'print "a x b; $c" x 3; # total'
+        self.assertEqual(mask_literals(line, tokens=tokenize(line)), mask_literals(line))
+
+    def test_nothing_to_mask(self):
+        self.assertEqual(mask_literals('$a = $b + 1;'), ('$a = $b + 1;', []))
+
+    def test_rules_do_not_fire_inside_literals(self):
+        masked, literals = mask_literals('die "last x or next; done" if $a eq $b;')
+        self.assertEqual(unmask_literals(convert_syntax(masked), literals), 'if $a == $b: raise Exception("last x or next; done")')
+
+if __name__ == "__main__":
+    unittest.main()
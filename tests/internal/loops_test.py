@@ -0,0 +1,43 @@
+import pytest
+from src.internal.loops import LoopTable
+from src.internal.blocks import loop_key
+from src.internal.symbols import build_symbol_table
+
+HEADER = 'for (my $i = 0; $i < @atoms; $i++) {\n'
+
+def _table(source):
+    table = LoopTable()
+    for line in source.splitlines():
+        table.feed(line)
+    return table
+
+@pytest.mark.parametrize("body", [
+    'splice(@atoms, $i, 1); $i--;',
+    '$i += 2;',
+    '++$i;',
+    'push @atoms, $atom;',
+    'shift(@atoms);',
+    '@atoms = grep { $_ } @atoms;',
+    'if ($x) {\n        for (my $j = 0; $j < 3; $j++) { $i = $j; }\n    }',
+])
+def test_loops_changing_their_counter_or_bound_vary(body):
+    """Test a counting loop whose body assigns its counter or resizes the array of its bound, however nested, varies."""
+    assert _table(HEADER + '    ' + body + '\n}\n').varying == {loop_key(HEADER[4:-2])}
+
+@pytest.mark.parametrize("body", [
+    'print $atoms[$i];',
+    'my $j = $i + 1;',
+    'push @other, $atoms[$i];',
+    'for (my $j = 0; $j < @atoms; $j++) { print $j; }',
+])
+def test_loops_reading_their_counter_and_bound_do_not_vary(body):
+    """Test a counting loop only reading its counter and bound array keeps its range."""
+    assert _table(HEADER + '    ' + body + '\n}\n').varying == set()
+
+def test_changes_after_the_loop_do_not_count():
+    """Test the counter and bound array may change once the loop is closed."""
+    assert _table(HEADER + '    print $i;\n}\npush @atoms, 1;\n$i = 0;\n').varying == set()
+
+def test_symbol_table_collects_loops():
+    """Test the varying loops are collected by the symbol table pre-pass."""
+    assert build_symbol_table([HEADER, '    $i++;\n', '}\n']).loops.varying == {loop_key(HEADER[4:-2])}
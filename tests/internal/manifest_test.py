@@ -0,0 +1,58 @@
+import pytest
+from src.internal.manifest import Manifest, file_hash, rule_set_hash
+
+@pytest.fixture
+def files(tmp_path):
+    """Fixture creating a Perl source and its translated output."""
+    source = tmp_path / "script.pl"
+    output = tmp_path / "script.py"
+    source.write_text("my $var = 1;\n")
+    output.write_text("var: any = 1\n")
+    return str(source), str(output), str(tmp_path / "manifest.json")
+
+def test_file_hash_changes_with_content(tmp_path):
+    """Test the file hash depends on the content only."""
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    first.write_text("same")
+    second.write_text("same")
+    assert file_hash(str(first)) == file_hash(str(second))
+    second.write_text("different")
+    assert file_hash(str(first)) != file_hash(str(second))
+
+def test_rule_set_hash_depends_on_extra(files):
+    """Test the rule set hash changes with the extra options."""
+    source, _, _ = files
+    assert rule_set_hash([source]) == rule_set_hash([source])
+    assert rule_set_hash([source], extra="a") != rule_set_hash([source], extra="b")
+
+def test_recorded_file_is_up_to_date(files):
+    """Test a recorded file is up to date, also after reloading the manifest from disk."""
+    source, output, manifest_dir = files
+    manifest = Manifest(manifest_dir)
+    assert not manifest.is_up_to_date(source, output, "0.0.0", "rules")
+    manifest.record(source, output, "0.0.0", "rules")
+    manifest.save()
+    assert Manifest(manifest_dir).is_up_to_date(source, output, "0.0.0", "rules")
+
+def test_changes_invalidate_entry(files):
+    """Test changing the version, the rule set, the source or the output invalidates the entry."""
+    source, output, manifest_dir = files
+    manifest = Manifest(manifest_dir)
+    manifest.record(source, output, "0.0.0", "rules")
+    assert not manifest.is_up_to_date(source, output, "0.0.1", "rules")
+    assert not manifest.is_up_to_date(source, output, "0.0.0", "other rules")
+    with open(source, 'a') as file:
+        file.write("my $other = 2;\n")
+    assert not manifest.is_up_to_date(source, output, "0.0.0", "rules")
+    manifest.record(source, output, "0.0.0", "rules")
+    with open(output, 'w') as file:
+        file.write("edited by hand\n")
+    assert not manifest.is_up_to_date(source, output, "0.0.0", "rules")
+
+def test_missing_output(files, tmp_path):
+    """Test a deleted output is not up to date."""
+    source, output, manifest_dir = files
+    manifest = Manifest(manifest_dir)
+    manifest.record(source, output, "0.0.0", "rules")
+    (tmp_path / "script.py").unlink()
+    assert not manifest.is_up_to_date(source, output, "0.0.0", "rules")
@@ -0,0 +1,61 @@
+import os
+import pytest
+from src.internal.modules import python_import, scan_dependencies, resolve_module, ModuleGraph, Dependency
+
+@pytest.mark.parametrize("line, expected", [
+    ('use strict;\n', ''),
+    ('use warnings;\n', 'import warnings'),
+    ('use File::Basename;\n', 'import os'),
+    ('use ESPT::ONIOMtoPDB 0.2;\n', 'import ESPT.ONIOMtoPDB'),
+    ('    require ESPT::Glog;  # lazy\n', '    import ESPT.Glog'),
+    ('use POSIX qw(floor ceil);\n', 'from POSIX import floor, ceil'),
+    ('use Data::Dumper ();\n', 'import Data.Dumper'),
+    ('use Fcntl qw(:flock);\n', 'from Fcntl import *'),
+    ('use base qw(ESPT::Base);\n', 'import ESPT.Base'),
+    ('use lib "/opt/tao";\n', 'import sys; sys.path.insert(0, "/opt/tao")'),
+    ('use constant PI => 3.14;\n', None),
+    ('require "config.pl";\n', None),
+    ('my $user = 1;\n', None),
+])
+def test_python_import(line, expected):
+    """Test use/require statements are converted into imports of the translated modules."""
+    assert python_import(line) == expected
+
+@pytest.fixture
+def program(tmp_path):
+    """Fixture creating a program using modules of a lib directory, one of them missing."""
+    lib = tmp_path / "lib" / "ESPT"
+    lib.mkdir(parents=True)
+    (lib / "ONIOMtoPDB.pm").write_text("package ESPT::ONIOMtoPDB;\nuse base qw(ESPT::Base);\nuse ESPT::Glog;\n1;\n")
+    (lib / "Base.pm").write_text("package ESPT::Base;\nrequire ESPT::Glog;\n1;\n")
+    (lib / "Glog.pm").write_text("package ESPT::Glog;\n1;\n")
+    main = tmp_path / "bin" / "main.pl"
+    main.parent.mkdir()
+    main.write_text("use strict;\nuse lib '../lib';\n\n=head1 NAME\n\nuse Not::Code;\n\n=cut\n\nuse ESPT::ONIOMtoPDB 0.2;\nuse POSIX;\n")
+    return str(main), str(tmp_path / "lib")
+
+def test_scan_dependencies(program):
+    """Test lib paths are taken relative to the file and POD is skipped."""
+    main, lib = program
+    lib_paths, dependencies = scan_dependencies(main)
+    assert lib_paths == [lib]
+    assert dependencies == [Dependency('ESPT::ONIOMtoPDB', 10), Dependency('POSIX', 11)]
+    assert resolve_module('ESPT::Glog', lib_paths) == os.path.join(lib, 'ESPT', 'Glog.pm')
+    assert resolve_module('POSIX', lib_paths) is None
+
+def test_graph_waves_put_dependencies_first(program):
+    """Test the graph follows use, base and require through the inherited lib paths, and orders it in waves."""
+    main, lib = program
+    graph = ModuleGraph([main])
+    module = lambda name: os.path.join(lib, 'ESPT', name + '.pm')
+    assert graph.waves() == [[module('Glog')], [module('Base')], [module('ONIOMtoPDB')], [main]]
+    assert graph.unresolved == {main: ['POSIX']}
+    assert graph.output_path(module('ONIOMtoPDB'), 'out') == os.path.join('out', 'ESPT', 'ONIOMtoPDB.py')
+    assert graph.output_path(main, 'out') == os.path.join('out', 'main.py')
+
+def test_cycle_is_translated_in_one_wave(tmp_path):
+    """Test modules using each other end up in the same wave instead of failing."""
+    (tmp_path / "A.pm").write_text("package A;\nuse B;\n1;\n")
+    (tmp_path / "B.pm").write_text("package B;\nuse A;\n1;\n")
+    graph = ModuleGraph([str(tmp_path / "A.pm")], [str(tmp_path)])
+    assert graph.waves() == [sorted([str(tmp_path / "A.pm"), str(tmp_path / "B.pm")])]
@@ -0,0 +1,73 @@
+import pytest
+from src.internal.rules import Rule
+from src.internal.syntax import convert_syntax
+from src.internal.remove_sigils import remove_sigils
+from src.internal.passes import Pass, PassRegistry, PASSES
+
+@pytest.mark.parametrize("line", [
+    'if ($a eq $b) {',
+    'print "Hello, World!\\n" if $debug >= 0;',
+    'my @list = (1, 2, 3);',
+    'our ($gfile, $pdbfile);',
+    '$self->{G_FILE_NAME} = $gfile;',
+])
+def test_default_pipeline_matches_convert_syntax_and_remove_sigils(line):
+    """Test the default passes convert a line like convert_syntax, remove_sigils and the arrow rewrite did."""
+    expected = remove_sigils(convert_syntax(line)).replace('self->{G_FILE_NAME}', 'self.G_FILE_NAME')
+    assert PASSES.pipeline()(line) == expected
+
+def test_passes_are_ordered_by_dependencies():
+    """Test a pass runs after the passes it depends on, whatever the registration order."""
+    registry = PassRegistry([
+        Pass('second', lambda line: line + '2', after=('first',)),
+        Pass('first', lambda line: line + '1'),
+    ])
+    pipeline = registry.pipeline()
+    assert pipeline.names == ['first', 'second']
+    assert pipeline('x') == 'x12'
+
+def test_dependency_cycle_is_rejected():
+    """Test passes depending on each other raise ValueError."""
+    registry = PassRegistry([
+        Pass('a', str.upper, after=('b',)),
+        Pass('b', str.lower, after=('a',)),
+    ])
+    with pytest.raises(ValueError):
+        registry.pipeline()
+
+def test_independent_regex_passes_are_fused():
+    """Test adjacent regex passes are fused into one stage unless one depends on the other."""
+    registry = PassRegistry([
+        Pass('dollar', rules=(Rule('dollar', r'\$', 'S', ('$',)),)),
+        Pass('at', rules=(Rule('at', r'@', 'A', ('@',)),)),
+        Pass('after_at', rules=(Rule('a', r'A', 'array', ('A',)),), after=('at',)),
+    ])
+    pipeline = registry.pipeline()
+    assert pipeline.names == ['dollar+at', 'after_at']
+    assert pipeline('$x @y') == 'Sx arrayy'
+
+def test_unneeded_and_disabled_passes_are_skipped():
+    """Test passes whose triggers do not occur in a file, and disabled passes, are left out of the pipeline."""
+    needed = PASSES.needed(['my $x = 1;', '$y = $x . "a";'])
+    assert 'print' not in needed and 'arrow' not in needed
+    assert {'operators', 'semicolon', 'remove_sigils'} <= needed
+    pipeline = PASSES.pipeline(needed, disabled=('semicolon',))
+    assert pipeline.names == ['operators', 'remove_sigils']
+    with pytest.raises(ValueError):
+        PASSES.pipeline(disabled=('unknown',))
+
+def test_passes_triggered_by_the_output_of_needed_passes_are_needed():
+    """Test a pass triggered by a literal another needed pass produces is needed on files without that literal."""
+    needed = PASSES.needed(['print "hello"'])
+    assert {'print', 'semicolon'} <= needed
+    assert PASSES.pipeline(needed)('print "hello"') == PASSES.pipeline()('print "hello"')
+
+def test_register_project_pass():
+    """Test a project-specific pass is registered once, and can be replaced explicitly."""
+    registry = PassRegistry([Pass('upper', str.upper)])
+    with pytest.raises(ValueError):
+        registry.register(Pass('upper', str.lower))
+    registry.register(Pass('upper', str.lower), replace=True)
+    assert registry.pipeline()('AbC') == 'abc'
+    with pytest.raises(ValueError):
+        registry.register(Pass('empty'))
@@ -0,0 +1,76 @@
+import unittest
+from src.internal.pod import PodRenderer, render_formatting
+
+POD = """=head1 NAME
+
+demo - a demo script
+
+=head1 OPTIONS
+
+=over 16
+
+=item B<-g> I<file>
+
+Gaussian file.
+
+=item -verylongoptionname
+
+Long labels go on their own line.
+
+=back
+
+=head2 Example
+
+    demo -g foo.gjf
+
+=cut
+"""
+
+def _render(text: str) -> str:
+    renderer = PodRenderer()
+    for line in text.splitlines(keepends=True):
+        renderer.feed(line)
+    return renderer.render()
+
+class TestPodRenderer(unittest.TestCase):
+    def test_feed_consumes_pod_lines_only(self):
+        renderer = PodRenderer()
+        self.assertFalse(renderer.feed("my $var = 1;\n"))
+        self.assertTrue(renderer.feed("=head1 NAME\n"))
+        self.assertTrue(renderer.feed("\n"))
+        self.assertTrue(renderer.feed("=cut\n"))
+        self.assertFalse(renderer.feed("\n"))
+
+    def test_render(self):
+        self.assertEqual(_render(POD),
+            "NAME\n"
+            "    demo - a demo script\n"
+            "\n"
+            "OPTIONS\n"
+            "    -g *file*       Gaussian file.\n"
+            "\n"
+            "    -verylongoptionname\n"
+            "                    Long labels go on their own line.\n"
+            "\n"
+            "  Example\n"
+            "        demo -g foo.gjf\n"
+            "\n")
+
+    def test_no_pod(self):
+        self.assertEqual(_render("print 'hello';\n"), "")
+
+    def test_render_formatting(self):
+        self.assertEqual(render_formatting("B<bold> C<code> L<text|perlpod> E<lt>tagE<gt>"), 'bold "code" text <tag>')
+        self.assertEqual(render_formatting("C<< $a->{b} >> B<I<nested>>"), '"$a->{b}" *nested*')
+
+    def test_drain_streams_the_rendering(self):
+        renderer = PodRenderer()
+        lines = []
+        for line in POD.splitlines(keepends=True):
+            renderer.feed(line)
+            lines.extend(renderer.drain())
+        lines.extend(renderer.drain(final=True))
+        self.assertEqual('\n'.join(lines) + '\n\n', _render(POD))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import json
+import types
+import pytest
+from src.internal.profiling import Profiler
+
+def test_wrap_records_calls_and_callbacks():
+    """Test a wrapped function is timed on every call and callbacks see each timing."""
+    seen = []
+    profiler = Profiler(lambda stage, seconds: seen.append(stage))
+    double = profiler.wrap('double', lambda x: 2 * x)
+    assert [double(1), double(2)] == [2, 4]
+    report = profiler.report()['stages']
+    assert report['double']['calls'] == 2
+    assert report['double']['seconds'] >= 0
+    assert seen == ['double', 'double']
+
+def test_iterate_times_each_item():
+    """Test iterate yields the items unchanged, recording one call per item and one for the end."""
+    profiler = Profiler()
+    assert list(profiler.iterate('lines', iter('abc'))) == ['a', 'b', 'c']
+    assert profiler.report()['stages']['lines']['calls'] == 4
+
+def test_instrument_restores_module_functions():
+    """Test instrumented module functions are timed through the module globals and restored afterwards."""
+    module = types.SimpleNamespace(step=lambda line: line.upper())
+    original = module.step
+    profiler = Profiler()
+    with profiler.instrument(module, ('step',), 'rules.'):
+        assert module.step('a') == 'A'
+    assert module.step is original
+    assert profiler.report()['stages']['rules.step']['calls'] == 1
+
+def test_stage_and_json_report(tmp_path):
+    """Test a stage context manager is recorded even on errors and the report is written as JSON."""
+    profiler = Profiler()
+    with pytest.raises(ValueError):
+        with profiler.stage('failing'):
+            raise ValueError
+    report_file = tmp_path / "profile.json"
+    profiler.dump_json(str(report_file))
+    report = json.loads(report_file.read_text())
+    assert report['stages']['failing']['calls'] == 1
+    assert 'rules' in report
+    profiler.reset()
+    assert profiler.report()['stages'] == {}
@@ -0,0 +1,56 @@
+import pytest
+from src.internal.regexes import RegexTable, Regex, parse_regex
+from src.internal.symbols import build_symbol_table
+
+@pytest.mark.parametrize("text, expected", [
+    ('/a+/i', ('m', 'a+', None, 'i')),
+    ('m{^\\s*#}', ('m', '^\\s*#', None, '')),
+    ('s/a\\/b/c\\/d/g', ('s', 'a\\/b', 'c/d', 'g')),
+    ('s{\\s+} {_}gx', ('s', '\\s+', '_', 'gx')),
+    ('tr/a-z/A-Z/', None),
+    ('/unterminated', None),
+])
+def test_parse_regex(text, expected):
+    """Test match and substitution literals are split into pattern, replacement and modifiers, whatever their delimiters."""
+    assert parse_regex(text) == expected
+
+def _table(*lines):
+    table = RegexTable()
+    for line in lines:
+        table.feed(line)
+    return table
+
+def test_regexes_are_collected_once_with_their_flags():
+    """Test every distinct pattern gets one constant, in order of first use, and interpolating patterns none."""
+    table = _table('if ($line =~ /SCF\\s+Done/i) {', 'next if $line !~ m{SCF\\s+Done}i;', '$x =~ s/(?<n>a)\\z/b/gx;', '$x =~ /$pattern/;')
+    assert table.names == {Regex('SCF\\s+Done', 'i'): '_RE_1', Regex('(?P<n>a)\\Z', 'x'): '_RE_2'}
+    assert table.constants() == ['import re', '_RE_1 = re.compile(r"SCF\\s+Done", re.I)', '_RE_2 = re.compile(r"(?P<n>a)\\Z", re.X)']
+    assert _table('print $x;').constants() == []
+
+@pytest.mark.parametrize("line, expected", [
+    ('$line =~ /(\\d+)/', '_RE_1.search($line)'),
+    ('$line !~ /(\\d+)/', 'not _RE_1.search($line)'),
+    ('my @all = $line =~ /(\\d+)/g;', 'my @all = _RE_1.findall($line);'),
+    ('$line =~ s/(\\d+)/<$1>/;', '$line = _RE_1.sub(r"<\\g<1>>", $line, count=1);'),
+    ('$line =~ s{(\\d+)}{"$&"}g', '$line = _RE_1.sub(r\'"\\g<0>"\', $line)'),
+    ('$n = ($line =~ s/(\\d+)/x/g);', '$n = ($line =~ s/(\\d+)/x/g);'),
+    ('$line =~ s/(\\d+)/$x/;', '$line =~ s/(\\d+)/$x/;'),
+    ('$price =~ s/USD/\\$/g;', '$price = _RE_1.sub(r"$", $price);'),
+    ('my ($first) = $line =~ /(\\d+)/g;', 'my ($first) = _RE_1.findall($line);'),
+    ('($line =~ /(\\d+)/g)', '($line =~ /(\\d+)/g)'),
+    ('$count++ if $line =~ /(\\d+)/g;', '$count++ if $line =~ /(\\d+)/g;'),
+])
+def test_call_sites_use_the_constants(line, expected):
+    """Test matches become method calls of the constants, and what cannot be hoisted is left to the conversion rules."""
+    assert _table(line).rewrite(line) == expected
+
+def test_regexes_missing_from_the_table_are_left():
+    """Test a statement whose regex was not collected, e.g. joined from several lines, is not rewritten."""
+    assert _table('$line =~ /(\\d+)/').rewrite('$line =~ /other/') == '$line =~ /other/'
+
+def test_symbol_table_collects_regexes():
+    """Test the regexes are collected by the symbol table pre-pass and take part in its cache key."""
+    first = build_symbol_table(['our $debug;\n', 'if ($line =~ /a/) {\n'])
+    second = build_symbol_table(['our $debug;\n'])
+    assert first.regexes.names == {Regex('a', ''): '_RE_1'}
+    assert first != second
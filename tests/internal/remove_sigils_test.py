@@ -49,6 +49,10 @@ class TestRemoveSigil(unittest.TestCase):
         self.assertEqual(_convert_declarations("our(var1, var2);"), "global var1, var2")
         self.assertEqual(remove_sigils("our (var1, var2);"), "global var1, var2")
 
+    def test_declarations_of_names_sharing_a_prefix(self):
+        self.assertEqual(_convert_declarations("$x = 1; my $xy = $x;"), "$x = 1; xy: any = $x;")
+        self.assertEqual(_convert_declarations("my $a = 1; our @ab = $a;"), "a: any = 1; AB: list[any] = $a;")
+
     def test_sigils_in_function_declaration_with_shift(self):
         self.assertEqual(_convert_declarations("sub $func_name { my $var = shift; }"), "def func_name(**args): Callable[..., Any] { var: Any = shift; }")
         self.assertEqual(remove_sigils("sub $func_name { my $var = shift; }"), "def func_name(*args): Callable[..., Any] { var: Any = args.pop(0); }")
@@ -0,0 +1,61 @@
+import gc
+import unittest
+from src.internal.rules import Rule, RuleSet, KeywordIndex, rule_stats
+
+class TestRuleSet(unittest.TestCase):
+    def test_constant_replacement(self):
+        rules = RuleSet([Rule('eq', r'(?<= )eq(?= )', '=='), Rule('ne', r'(?<= )ne(?= )', '!=')])
+        self.assertEqual(rules.sub("$a eq $b ne $c"), "$a == $b != $c")
+
+    def test_backreferences_are_renumbered(self):
+        rules = RuleSet([
+            Rule('swap', r'(\w+)<->(\w+)', r'\2<->\1'),
+            Rule('quote', r'([\'"])(\w+)\1', r'<\2>'),
+        ])
+        self.assertEqual(rules.sub("a<->b 'c' \"d\""), "b<->a <c> <d>")
+
+    def test_first_rule_wins_at_same_position(self):
+        rules = RuleSet([Rule('long', r'ab', 'X'), Rule('short', r'a', 'Y')])
+        self.assertEqual(rules.sub("ab a"), "X Y")
+
+    def test_no_match(self):
+        rules = RuleSet([Rule('eq', r'(?<= )eq(?= )', '==')])
+        self.assertEqual(rules.sub("equal"), "equal")
+
+class TestKeywordIndex(unittest.TestCase):
+    def test_candidates(self):
+        index = KeywordIndex('test_candidates', {'decl': ('my ', 'our '), 'shift': ('shift',), 'always': ()})
+        self.assertEqual(index.candidates("my $var = shift;"), {'decl', 'shift', 'always'})
+        self.assertEqual(index.candidates("print $var;"), {'always'})
+
+    def test_overlapping_triggers(self):
+        index = KeywordIndex('test_overlapping', {'repeat': (' x ',), 'concat': (' . ',)})
+        self.assertEqual(index.candidates("$a x . $b"), {'repeat', 'concat'})
+
+    def test_prefix_triggers(self):
+        index = KeywordIndex('test_prefix', {'hash': ('my',), 'decl': ('my ',)})
+        self.assertEqual(index.candidates("my %hash"), {'hash', 'decl'})
+
+    def test_stats(self):
+        index = KeywordIndex('test_stats', {'decl': ('my ',), 'shift': ('shift',)})
+        index.candidates("my $var = 1;")
+        index.candidates("$var = 2;")
+        self.assertEqual(rule_stats()['test_stats'], {'decl': {'hits': 1, 'skips': 1}, 'shift': {'hits': 0, 'skips': 2}})
+        index.reset_stats()
+        self.assertEqual(index.stats()['decl'], {'hits': 0, 'skips': 0})
+
+    def test_discarded_indices_are_not_reported(self):
+        index = KeywordIndex('test_discarded', {'decl': ('my ',)})
+        self.assertIn('test_discarded', rule_stats())
+        del index
+        gc.collect()
+        self.assertNotIn('test_discarded', rule_stats())
+
+    def test_rule_set_skips_rules_without_triggers(self):
+        rules = RuleSet([Rule('eq', r'(?<= )eq(?= )', '==', (' eq ',)), Rule('last', r'\blast\b', 'break', ('last',))], name='test_rule_set')
+        self.assertEqual(rules.sub("$a eq $b"), "$a == $b")
+        self.assertEqual(rules.sub("$a = $b"), "$a = $b")
+        self.assertEqual(rules.index.stats(), {'eq': {'hits': 1, 'skips': 1}, 'last': {'hits': 0, 'skips': 2}})
+
+if __name__ == "__main__":
+    unittest.main()
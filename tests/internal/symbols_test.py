@@ -0,0 +1,51 @@
+from src.internal.symbols import Symbol, SymbolTable, build_symbol_table
+from src.internal.lexer import mask_literals
+
+PERL_LINES = [
+    'our $version = "1.2";\n',
+    'our ($debug, @files, %charges);\n',
+    '\n',
+    '=head1 NAME\n',
+    'our $documented = 1;\n',
+    '=cut\n',
+    'sub read_file {\n',
+    '    my $self = shift;\n',
+    '    my ($name, $count) = @_;\n',
+    '}\n',
+    'my $debug_level = 1;\n',
+    'our $name;\n',
+]
+
+def test_declarations_are_recorded_with_scope_and_line():
+    """Test every declaration is recorded once with its sigil, scope and line number, POD excluded."""
+    table = build_symbol_table(PERL_LINES)
+    assert table.lookup('version') == [Symbol('version', '$', 'our', 1)]
+    assert table.lookup('files') == [Symbol('files', '@', 'our', 2)]
+    assert table.lookup('charges') == [Symbol('charges', '%', 'our', 2)]
+    assert table.lookup('read_file') == [Symbol('read_file', '&', 'sub', 7)]
+    assert table.lookup('self') == [Symbol('self', '$', 'my', 8)]
+    assert table.lookup('documented') == []
+
+def test_only_unambiguous_globals_are_renamed():
+    """Test our variables are renamed, unless the same name is also declared with my."""
+    table = build_symbol_table(PERL_LINES)
+    assert table.renames == {'version': 'VERSION', 'debug': 'DEBUG', 'files': 'FILES', 'charges': 'CHARGES'}
+
+def test_every_reference_is_rewritten():
+    """Test all references to a global are renamed, whatever their sigil, and other names are left alone."""
+    table = build_symbol_table(PERL_LINES)
+    assert table.rewrite('print $version if $debug >= 0 and $debug_level;') == 'print $VERSION if $DEBUG >= 0 and $debug_level;'
+    assert table.rewrite('$files[0] = $charges{$name} + $#files;') == '$FILES[0] = $CHARGES{$name} + $#FILES;'
+
+def test_interpolated_globals_are_renamed():
+    """Test globals interpolated in strings get the same name as in code."""
+    table = build_symbol_table(PERL_LINES)
+    masked, literals = mask_literals('print "version $version\\n";', table.renames)
+    assert literals == ['version VERSION\\n']
+
+def test_tables_with_the_same_renames_are_equal():
+    """Test symbol tables compare by their renames, so cached lines can be shared between files."""
+    first = build_symbol_table(['our $debug;\n'])
+    second = build_symbol_table(['my $x;\n', 'our $debug = 0;\n'])
+    assert first == second and hash(first) == hash(second)
+    assert first != SymbolTable()
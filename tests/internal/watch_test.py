@@ -0,0 +1,42 @@
+import os
+from src.internal.watch import Watcher
+
+def test_poll_reports_new_and_changed_files(tmp_path):
+    """Test every file is new on the first poll, then only files whose content changed are reported."""
+    first, second = tmp_path / "a.pl", tmp_path / "b.pl"
+    first.write_text("my $x = 1;\n")
+    second.write_text("my $y = 2;\n")
+    watcher = Watcher(lambda: sorted(str(path) for path in tmp_path.glob("*.pl")))
+    assert watcher.poll() == [str(first), str(second)]
+    assert watcher.poll() == []
+    second.write_text("my $y = 3;\n")
+    assert watcher.poll() == [str(second)]
+
+def test_touched_file_is_not_reported(tmp_path):
+    """Test a file saved without changing its content is not reported."""
+    source = tmp_path / "a.pl"
+    source.write_text("my $x = 1;\n")
+    watcher = Watcher(lambda: [str(source)])
+    watcher.poll()
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert watcher.poll() == []
+
+def test_new_deleted_and_restored_files(tmp_path):
+    """Test files appearing later are picked up, and a deleted file is reported again when it comes back."""
+    watcher = Watcher(lambda: sorted(str(path) for path in tmp_path.glob("*.pl")))
+    assert watcher.poll() == []
+    source = tmp_path / "a.pl"
+    source.write_text("1;\n")
+    assert watcher.poll() == [str(source)]
+    source.unlink()
+    assert watcher.poll() == []
+    source.write_text("1;\n")
+    assert watcher.poll() == [str(source)]
+
+def test_changes_stops_after_max_polls(tmp_path):
+    """Test changes yields only the polls that found changes and stops after max_polls."""
+    source = tmp_path / "a.pl"
+    source.write_text("1;\n")
+    watcher = Watcher(lambda: [str(source)], interval=0)
+    assert list(watcher.changes(max_polls=3)) == [[str(source)]]
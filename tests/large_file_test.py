@@ -0,0 +1,74 @@
+import os
+import sys
+import subprocess
+import pytest
+from benchmarks.corpus import generate_perl, write_corpus
+
+# size of the files of the quick run, which checks large files are translated but is too small to tell streaming
+# from loading the whole file
+SMALL_FILE_MB = 4
+# size of the files of the memory bound check, far larger than the bound; translating them takes about a minute, so
+# the check only runs when PL2PY_SLOW_TESTS is set, e.g. `PL2PY_SLOW_TESTS=1 python -m pytest tests/large_file_test.py`
+LARGE_FILE_MB = 256
+# hard limit of the peak resident memory of the translation, whatever the size of the file
+PEAK_RSS_MB = 64
+slow = pytest.mark.skipif(not os.environ.get('PL2PY_SLOW_TESTS'), reason=f'translates a {LARGE_FILE_MB} MB file; set PL2PY_SLOW_TESTS=1 to run it')
+
+def _write_perl_file(perl_file, size_mb: int):
+    """Write a generated Perl script of size_mb, its POD included, padded with long comments so it converts quickly."""
+    padding = '# ' + 'padding ' * 256 + '\n'
+    chunk = ''.join(line + '\n' + padding for line in generate_perl(2000))
+    with open(perl_file, 'w') as file:
+        for _ in range(size_mb * 2**20 // len(chunk) + 1):
+            file.write(chunk)
+    return perl_file
+
+def _translate(perl_file, mode: list) -> float:
+    """Translate perl_file with the CLI, check its output, and return the peak RSS of the translation in MB."""
+    output_file = perl_file.with_suffix('.py')
+    process = subprocess.Popen([sys.executable, "src/pl2py.py", str(perl_file), str(output_file), "--line-cache", "10000", *mode])
+    _, status, usage = os.wait4(process.pid, 0)
+    try:
+        assert status == 0
+        assert output_file.stat().st_size > perl_file.stat().st_size
+        return usage.ru_maxrss / 1024 # ru_maxrss is in KiB on Linux
+    finally:
+        output_file.unlink(missing_ok=True)
+
+@pytest.fixture(scope='module')
+def small_perl_file(tmp_path_factory):
+    """Fixture writing a generated Perl script of SMALL_FILE_MB."""
+    perl_file = _write_perl_file(tmp_path_factory.mktemp('small') / 'small.pl', SMALL_FILE_MB)
+    yield perl_file
+    perl_file.unlink()
+
+@pytest.fixture(scope='module')
+def large_perl_file(tmp_path_factory):
+    """Fixture writing a generated Perl script of LARGE_FILE_MB."""
+    perl_file = _write_perl_file(tmp_path_factory.mktemp('large') / 'large.pl', LARGE_FILE_MB)
+    yield perl_file
+    perl_file.unlink()
+
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason='peak RSS of a child process needs os.wait4')
+@pytest.mark.parametrize('mode', [[], ['--mmap']])
+def test_large_file_is_translated(small_perl_file, mode):
+    """Test the CLI translates a file of SMALL_FILE_MB, POD and docstring included, by default and through a memory map."""
+    assert _translate(small_perl_file, mode) < PEAK_RSS_MB
+
+@slow
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason='peak RSS of a child process needs os.wait4')
+@pytest.mark.parametrize('mode', [[], ['--mmap']])
+def test_large_file_is_translated_in_bounded_memory(large_perl_file, mode):
+    """Test the CLI streams a file of LARGE_FILE_MB, four times the bound, under a fixed peak RSS."""
+    assert _translate(large_perl_file, mode) < PEAK_RSS_MB
+
+@pytest.mark.parametrize('style', ['script', 'module'])
+def test_parallel_translation_matches_sequential(tmp_path, style):
+    """Test a file converted in chunks by several processes gives the output of the sequential conversion."""
+    perl_file = write_corpus(str(tmp_path / 'corpus.pl'), 12000, style=style)
+    outputs = []
+    for workers in ('1', '3'):
+        output_file = tmp_path / f'corpus_{workers}.py'
+        subprocess.run([sys.executable, "src/pl2py.py", perl_file, str(output_file), "-j", workers], check=True)
+        outputs.append(output_file.read_text())
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import subprocess
+import textwrap
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+def _python(code: str) -> str:
+    """Run Python code in src/, where pl2py finds its internal modules, and return what it prints."""
+    result = subprocess.run([sys.executable, '-c', textwrap.dedent(code)], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    return result.stdout
+
+def test_translated_subs_shift_their_arguments():
+    """Test a translated sub taking its arguments with shift runs, the arguments being a list."""
+    assert _python('''
+        from pl2py import pl2py_snippet
+        namespace = {}
+        exec(pl2py_snippet("sub add {\\n    my $a = shift;\\n    my $b = shift;\\n    return $a + $b;\\n}\\n"), namespace)
+        print(namespace['add'](2, 3))
+    ''') == '5\n'
+
+def test_chunked_conversion_keeps_slurp_mode(tmp_path):
+    """Test reads after a top-level `local $/;` slurp in a conversion in chunks as in the sequential conversion."""
+    perl_file = tmp_path / 'slurp.pl'
+    perl_file.write_text('open(my $fh, "<", "a.log");\nlocal $/;\n' + ''.join(f'my $x{i} = {i};\n' for i in range(30)) + 'my $all = <$fh>;\n')
+    _python(f'''
+        import pl2py
+        pl2py.CHUNK_LINES = 10
+        for workers in (1, 2):
+            pl2py.pl2py({str(perl_file)!r}, {str(tmp_path)!r} + f'/slurp_{{workers}}.py', workers=workers)
+    ''')
+    sequential, chunked = (tmp_path / 'slurp_1.py').read_text(), (tmp_path / 'slurp_2.py').read_text()
+    assert 'all: any = fh.read()' in sequential
+    assert chunked == sequential
+
+def test_translated_reads_of_stdin_import_sys(tmp_path):
+    """Test a translated script reading the standard input imports sys and runs."""
+    perl_file, python_file = tmp_path / 'stdin.pl', tmp_path / 'stdin.py'
+    perl_file.write_text('my @lines = <STDIN>;\n')
+    _python(f'import pl2py; pl2py.pl2py({str(perl_file)!r}, {str(python_file)!r})')
+    assert 'import sys\n' in python_file.read_text()
+    subprocess.run([sys.executable, str(python_file)], input='a\nb\n', text=True, check=True)
+
+def test_rules_version_hashes_every_internal_module():
+    """Test the rule set hash covers every module under internal/ and preprocess.py, not a fixed list of them."""
+    hashed = _python('''
+        import os, internal.manifest, pl2py
+        hashed = []
+        internal.manifest.rule_set_hash = lambda source_files: hashed.extend(source_files) or ''
+        pl2py.rules_version()
+        print(' '.join(sorted(os.path.basename(source_file) for source_file in hashed)))
+    ''').split()
+    internal = sorted(name for name in os.listdir(os.path.join(SRC_DIR, 'internal')) if name.endswith('.py'))
+    assert {'modules.py', 'preprocess.py', 'pl2py.py'} <= set(hashed)
+    assert set(internal) <= set(hashed)
+
+@pytest.fixture
+def perl_tree(tmp_path):
+    """Fixture writing a tree of Perl sources, one of which cannot be decoded, and a file that is no Perl source."""
+    tree = tmp_path / 'perl'
+    (tree / 'lib' / 'ESPT').mkdir(parents=True)
+    (tree / 'main.pl').write_text('my $x = 1;\n')
+    (tree / 'lib' / 'ESPT' / 'Atom.pm').write_text('my $name = "C";\n')
+    (tree / 'lib' / 'util.pl').write_text('my $y = 2;\n')
+    (tree / 'broken.pl').write_bytes(b'\xff\xfe my $z;\n')
+    (tree / 'notes.txt').write_text('not Perl\n')
+    return tree
+
+def _batch(input_pattern: str, output_dir: str, workers: int) -> list[list[str]]:
+    """Translate a batch with pl2py_batch in src/, returning its (input, output, error) results."""
+    return json.loads(_python(f'''
+        import json, pl2py
+        print(json.dumps(pl2py.pl2py_batch({input_pattern!r}, {output_dir!r}, workers={workers})))
+    '''))
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_batch_translates_a_directory(perl_tree, tmp_path, workers):
+    """Test a directory is searched recursively for Perl sources, translated into a mirrored tree in sorted order, and
+    a file failing to translate is reported without stopping the batch."""
+    output_dir = tmp_path / 'python'
+    results = _batch(str(perl_tree), str(output_dir), workers)
+    assert [(os.path.relpath(source, perl_tree), os.path.relpath(output, output_dir)) for source, output, _ in results] == [
+        ('broken.pl', 'broken.py'),
+        (os.path.join('lib', 'ESPT', 'Atom.pm'), os.path.join('lib', 'ESPT', 'Atom.py')),
+        (os.path.join('lib', 'util.pl'), os.path.join('lib', 'util.py')),
+        ('main.pl', 'main.py'),
+    ]
+    assert results[0][2].startswith('UnicodeDecodeError') and [error for _, _, error in results[1:]] == [None] * 3
+    assert 'x: any = 1' in (output_dir / 'main.py').read_text()
+    assert (output_dir / 'lib' / 'ESPT' / 'Atom.py').is_file()
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_batch_translates_a_glob_pattern(perl_tree, tmp_path, workers):
+    """Test a glob pattern selects its files, mirrored under the output directory from their common directory."""
+    output_dir = tmp_path / 'python'
+    results = _batch(str(perl_tree / 'lib' / '**' / '*.p[lm]'), str(output_dir), workers)
+    assert [(os.path.relpath(source, perl_tree), os.path.relpath(output, output_dir), error) for source, output, error in results] == [
+        (os.path.join('lib', 'ESPT', 'Atom.pm'), os.path.join('ESPT', 'Atom.py'), None),
+        (os.path.join('lib', 'util.pl'), 'util.py', None),
+    ]
+    assert _batch(str(perl_tree / '*.none'), str(output_dir), workers) == []
+
+def test_line_cache():
+    """Test the line cache translates as without it, reports its hit rate and size cap, and is disabled by a size of 0."""
+    results = json.loads(_python('''
+        import json, pl2py
+        code = 'my $x = 1;\\n' * 3 + 'my @y = (1, 2);\\nprint "$x\\\\n";\\n'
+        uncached = pl2py.pl2py_snippet(code)
+        pl2py.set_line_cache(2)
+        cached = pl2py.pl2py_snippet(code)
+        info = pl2py.line_cache_info()
+        pl2py.set_line_cache(0)
+        print(json.dumps({'same': cached == uncached, 'info': info, 'disabled': pl2py.line_cache_info(),
+                          'after': pl2py.pl2py_snippet(code) == uncached}))
+    '''))
+    assert results['same'] and results['after']
+    # the repeated statement hits twice, the last statement evicts it from the cache of two lines
+    assert results['info'] == {'hits': 2, 'misses': 3, 'maxsize': 2, 'currsize': 2, 'hit_rate': 0.4}
+    assert results['disabled'] is None
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_line_cache_statistics_sum_the_workers(perl_tree, tmp_path, workers):
+    """Test the line cache statistics of a batch count every lookup, whichever process converted the line."""
+    info = json.loads(_python(f'''
+        import json, pl2py
+        pl2py.pl2py_batch({str(perl_tree)!r}, {str(tmp_path / 'python')!r}, workers={workers}, line_cache=100)
+        print(json.dumps(pl2py.line_cache_info()))
+    '''))
+    # one lookup per statement of the three files that decode
+    assert info['hits'] + info['misses'] == 3 and info['maxsize'] in range(100, 100 * workers + 1, 100)
+
+def test_line_cache_and_workers_do_not_change_the_output(tmp_path):
+    """Test a file is translated the same by default, through the line cache and in chunks, even without any ';'."""
+    perl_file = tmp_path / 'hello.pl'
+    perl_file.write_text('print "hello"\nprint "world" if $debug\n')
+    outputs = []
+    for options in ([], ['--line-cache', '10'], ['-j', '2']):
+        python_file = tmp_path / f'hello_{len(outputs)}.py'
+        subprocess.run([sys.executable, 'pl2py.py', str(perl_file), str(python_file), *options], cwd=SRC_DIR, capture_output=True, check=True)
+        outputs.append(python_file.read_text())
+    assert outputs[0] == outputs[1] == outputs[2]
+
+def test_buffers_stringify_what_they_append():
+    """Test a number appended to a list buffer is joined as a string, as Perl's `.=` does."""
+    assert _python('''
+        from pl2py import pl2py_snippet
+        namespace = {}
+        exec(pl2py_snippet("my $s = '';\\nfor (my $i = 0; $i < 10; $i++) {\\n    $s .= $i;\\n}\\nmy $digits = $s;\\n"), namespace)
+        print(namespace['digits'])
+    ''') == '0123456789\n'
+
+def test_loops_changing_their_counter_test_their_condition():
+    """Test a counting loop whose body moves its counter runs as in Perl rather than over a precomputed range."""
+    assert _python('''
+        from pl2py import pl2py_snippet
+        namespace = {}
+        exec(pl2py_snippet("my $n = 0;\\nfor (my $i = 0; $i < 10; $i++) {\\n    $i += 2;\\n    $n = $n + 1;\\n}\\n"), namespace)
+        print(namespace['n'])
+    ''') == '4\n'
@@ -0,0 +1,45 @@
+import sys
+import subprocess
+import pytest
+
+PERL_SOURCE = """#!/usr/bin/perl
+use strict;
+use warnings;
+use File::Basename;
+
+our $version = "1.2";
+
+=head1 NAME
+
+demo - a demo script
+
+=cut
+
+1;
+"""
+
+@pytest.fixture
+def perl_file(tmp_path):
+    """Fixture to create a small Perl script with a POD section."""
+    perl_file = tmp_path / "demo.pl"
+    perl_file.write_text(PERL_SOURCE)
+    return perl_file
+
+def _preprocess(perl_file):
+    """Run the preprocess CLI on a file and return the lines it wrote."""
+    output_file = perl_file.with_suffix('.pl2py')
+    subprocess.run([sys.executable, "src/preprocess.py", "-i", str(perl_file), "-o", str(output_file)], check=True)
+    return output_file.read_text().splitlines(keepends=True)
+
+def test_preprocess_header(perl_file):
+    """Test the shebang is replaced and the POD is rendered into the docstring."""
+    lines = _preprocess(perl_file)
+    assert lines[0] == '#!/usr/bin/python3\n'
+    assert lines[2:5] == ['"""NAME\n', '    demo - a demo script\n', '\n']
+    assert '=====Start Converting Now=====\n' in lines
+
+def test_preprocess_body(perl_file):
+    """Test use statements are converted and the POD block is stripped from the code."""
+    lines = _preprocess(perl_file)
+    body = lines[lines.index('=====Start Converting Now=====\n') + 1:]
+    assert body == ['\n', '#!/usr/bin/perl\n', 'import warnings\n', 'import os\n', '\n', 'our $version = "1.2";\n', '\n', '\n', '1;\n']
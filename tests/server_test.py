@@ -0,0 +1,39 @@
+import sys
+import json
+import subprocess
+
+def _serve(requests, *args):
+    """Send JSON requests to the server over stdin and return its responses by id."""
+    stdin = ''.join(json.dumps(request) + '\n' for request in requests) + 'not json\n'
+    result = subprocess.run([sys.executable, "src/server.py", *args], input=stdin, capture_output=True, text=True, check=True)
+    responses = [json.loads(line) for line in result.stdout.splitlines()]
+    return {response['id']: response for response in responses}
+
+def test_translation_requests(tmp_path):
+    """Test line, snippet and file requests are answered, each with its id and latency."""
+    perl_file = tmp_path / "demo.pl"
+    perl_file.write_text("my $x = 1;\nif ($x) {\n    $x = 2;\n}\n")
+    responses = _serve([
+        {'id': 1, 'op': 'line', 'code': 'my $x = 1;'},
+        {'id': 2, 'op': 'snippet', 'code': 'if ($x) {\n    $x = 2;\n}\n'},
+        {'id': 3, 'op': 'file', 'input': str(perl_file)},
+    ])
+    assert responses[1]['ok'] and responses[1]['result'] == 'x: any = 1'
+    assert responses[2]['result'] == 'if (x):\n    x = 2'
+    assert responses[3]['result'] == str(tmp_path / "demo.py")
+    assert 'if (x):\n    x = 2\n' in (tmp_path / "demo.py").read_text()
+    assert all(response['ms'] >= 0 for response in responses.values() if response['id'] is not None)
+
+def test_errors_are_reported_in_responses():
+    """Test bad requests get an error response instead of stopping the server."""
+    responses = _serve([{'id': 'a', 'op': 'compile'}, {'id': 'b', 'op': 'file', 'input': 'missing.pl'}])
+    assert not responses['a']['ok'] and 'unknown op' in responses['a']['error']
+    assert responses['b']['error'].startswith('FileNotFoundError')
+    assert responses[None]['error'].startswith('JSONDecodeError')
+
+def test_stats_count_requests():
+    """Test latency stats are kept per operation, with a single worker so the requests run in order."""
+    responses = _serve([{'id': i, 'op': 'line', 'code': 'my $x = 1;'} for i in range(5)] + [{'id': 'stats', 'op': 'stats'}], '-j', '1')
+    stats = responses['stats']['result']
+    assert stats['latency']['line']['count'] == 5
+    assert stats['line_cache']['hits'] == 4